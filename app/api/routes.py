@@ -1,27 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
-from app.core.db import get_session
-from app.models.schemas import SearchRequest, SearchResponse
+from app.core.db import fill_sessionmaker, get_read_session, pool_stats, replica_stats
+from app.core.timing import SERIALIZE, metrics_enabled, timed
+from app.models.schemas import (
+    BatchSearchRequest,
+    BatchSearchResponse,
+    PoolStatsResponse,
+    ReloadResponse,
+    SearchRequest,
+    SearchResponse,
+)
+from app.services.dictionary_reloader import reload_dictionaries
 from app.services.geo_service import GeoService
+from app.services.metrics_exporter import CONTENT_TYPE, render_metrics
+from app.services.response_cache import invalidate_response_cache
 
 router = APIRouter()
 
 
+def _json_response(model: BaseModel) -> Response:
+    # Serialized here instead of by FastAPI so the stage can be timed;
+    # model_dump_json also skips the jsonable_encoder pass.
+    with timed(SERIALIZE):
+        body = model.model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
 @router.post("/search", response_model=SearchResponse, status_code=status.HTTP_200_OK)
 async def search_endpoint(
     request: SearchRequest,
-    session: Annotated[AsyncSession, Depends(get_session)],
-) -> SearchResponse:
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> Response:
     """
     High-level endpoint: parse context -> geo search -> return results.
     """
     try:
         # Keep orchestration in the service layer; endpoint stays thin.
-        service = GeoService(session)
+        service = GeoService(session, fill_sessionmaker=fill_sessionmaker())
         response = await service.search(request)
-        return response
     except Exception as exc:
         # Fail fast with a generic 500 to avoid leaking internal errors.
         raise HTTPException(status_code=500, detail=str(exc))
+    return _json_response(response)
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse, status_code=status.HTTP_200_OK)
+async def search_batch_endpoint(
+    request: BatchSearchRequest,
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> Response:
+    """
+    Many (location, context) pairs in one call; results come back per item
+    in request order, with per-item errors for invalid locations.
+    """
+    try:
+        service = GeoService(session)
+        response = await service.search_batch(request)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    return _json_response(response)
+
+
+def require_admin_token(x_admin_token: Annotated[Optional[str], Header()] = None) -> None:
+    # Admin routes stay closed unless ADMIN_TOKEN is configured.
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected or not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+@router.post(
+    "/admin/reload-dictionaries",
+    response_model=ReloadResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def reload_dictionaries_endpoint() -> ReloadResponse:
+    """
+    Rebuild category/brand lemma tables from the data files and swap them in.
+    """
+    lexicon = await reload_dictionaries()
+    return ReloadResponse(
+        generation=lexicon.generation,
+        categories=len(lexicon.category_lemmas),
+        brands=len(lexicon.brand_lemma_map),
+    )
+
+
+@router.get(
+    "/admin/pool",
+    response_model=PoolStatsResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def pool_stats_endpoint() -> PoolStatsResponse:
+    """
+    Connection pool occupancy and checkout wait times for this worker, plus
+    read-replica health and lag when replicas are configured.
+    """
+    return PoolStatsResponse(**pool_stats(), replicas=replica_stats())
+
+
+@router.post(
+    "/admin/invalidate-search-cache",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin_token)],
+)
+async def invalidate_search_cache_endpoint() -> None:
+    """
+    Drop cached search cells, e.g. after places were loaded by another process.
+    """
+    invalidate_response_cache("admin request")
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """
+    Prometheus scrape target for this worker; 404 unless METRICS_ENABLED.
+    """
+    if not metrics_enabled():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -1,16 +1,28 @@
+import logging
 import os
+import random
+import time
+from typing import Dict, List, Optional
 
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.core.env import load_env
+from app.core.env import env_bool, env_float, env_int, load_env
+from app.core.metrics import Histogram
+from app.core.replicas import ROUND_ROBIN, STRATEGIES, Replica, ReplicaRouter, connection_error
+from app.core.timing import POOL, install_stage_timing, metrics_enabled, record, server_timing_enabled
 
 
 load_env()
 
+sql_logger = logging.getLogger("app.sql")
+
 
 def _build_database_url() -> str:
     url = os.getenv("DATABASE_URL")
@@ -26,19 +38,112 @@ def _build_database_url() -> str:
     raise RuntimeError("DATABASE_URL or DB_* environment variables must be set")
 
 
+def replica_urls() -> List[str]:
+    """Read-replica URLs from DATABASE_REPLICA_URLS (comma-separated); empty means primary only."""
+    value = os.getenv("DATABASE_REPLICA_URLS") or ""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkout wait time (waiting for a free
+    connection or opening one) and timeouts. Each engine has its own pool,
+    so the primary and every replica are reported separately.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_seconds = Histogram()
+        self.timeouts = 0
+
+    def recreate(self) -> "TimedQueuePool":
+        # engine.dispose() swaps in a new pool; keep the counters running.
+        pool = super().recreate()
+        pool.wait_seconds = self.wait_seconds
+        pool.timeouts = self.timeouts
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.wait_seconds.observe(elapsed)
+            record(POOL, elapsed)
+
+
+def engine_options() -> dict:
+    """
+    create_async_engine keyword arguments from DB_* settings. Defaults suit a
+    single uvicorn worker; size DB_POOL_SIZE + DB_MAX_OVERFLOW to the number
+    of requests one worker runs concurrently.
+    """
+    connect_args = {
+        # asyncpg prepares each distinct SQL string once per connection;
+        # the nearest-places shapes need at most 16 slots.
+        "prepared_statement_cache_size": env_int("DB_PREPARED_STATEMENT_CACHE_SIZE", 100),
+    }
+    command_timeout = env_float("DB_COMMAND_TIMEOUT", 0)
+    if command_timeout > 0:
+        connect_args["command_timeout"] = command_timeout
+
+    return {
+        # Echo logs every statement synchronously; SQL_LOG_SAMPLE_RATE is
+        # the production-friendly alternative.
+        "echo": env_bool("DB_ECHO"),
+        "poolclass": TimedQueuePool,
+        "pool_size": env_int("DB_POOL_SIZE", 5),
+        "max_overflow": env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": env_float("DB_POOL_TIMEOUT", 30.0),
+        # Recycle before typical proxy/firewall idle cutoffs; -1 disables.
+        "pool_recycle": env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True),
+        # SQLAlchemy's compiled-statement cache (entries per engine).
+        "query_cache_size": env_int("DB_QUERY_CACHE_SIZE", 500),
+        "connect_args": connect_args,
+    }
+
+
+def install_sql_sampling(engine: AsyncEngine, rate: float) -> None:
+    """Log roughly `rate` of executed statements with their duration."""
+    if rate <= 0:
+        return
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if random.random() < rate:
+            conn.info["sql_sample_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("sql_sample_started", None)
+        if started is not None:
+            # Statement text only: parameters may carry user input.
+            sql_logger.info("%.2f ms %s", (time.perf_counter() - started) * 1000, statement)
+
+
+def install_instrumentation(engine: AsyncEngine) -> None:
+    """Statement sampling and, when either is on, per-request stage timing."""
+    install_sql_sampling(engine, env_float("SQL_LOG_SAMPLE_RATE", 0.0))
+    if metrics_enabled() or server_timing_enabled():
+        install_stage_timing(engine)
+
+
 _engine = None
 _sessionmaker = None
+_replica_router: Optional[ReplicaRouter] = None
 
 
 def _get_engine():
     global _engine, _sessionmaker
     if _engine is None:
         database_url = _build_database_url()
-        _engine = create_async_engine(
-            database_url,
-            # Keep SQL echo on for local debugging; switch off in production envs.
-            echo=True,
-        )
+        _engine = create_async_engine(database_url, **engine_options())
+        install_instrumentation(_engine)
         _sessionmaker = async_sessionmaker(
             bind=_engine,
             # Avoid invalidating ORM objects after commit; useful for read-after-write flows.
@@ -48,8 +153,101 @@ def _get_engine():
     return _engine, _sessionmaker
 
 
+def _get_replica_router() -> Optional[ReplicaRouter]:
+    global _replica_router
+    if _replica_router is None:
+        urls = replica_urls()
+        if not urls:
+            return None
+        strategy = (os.getenv("DB_REPLICA_STRATEGY") or ROUND_ROBIN).strip().lower()
+        if strategy not in STRATEGIES:
+            raise RuntimeError(f"DB_REPLICA_STRATEGY must be one of {STRATEGIES}, got {strategy!r}")
+        replicas = []
+        for url in urls:
+            # Same pool settings as the primary, per replica.
+            engine = create_async_engine(url, **engine_options())
+            install_instrumentation(engine)
+            replicas.append(Replica(url, engine))
+        _replica_router = ReplicaRouter(
+            replicas,
+            strategy=strategy,
+            max_lag_s=env_float("DB_REPLICA_MAX_LAG", 5.0),
+            check_timeout_s=env_float("DB_REPLICA_CHECK_TIMEOUT", 2.0),
+        )
+    return _replica_router
+
+
+def replica_stats() -> Optional[dict]:
+    router = _get_replica_router()
+    return router.stats() if router is not None else None
+
+
+def pool_stats(engine: Optional[AsyncEngine] = None) -> dict:
+    """Live pool occupancy plus the checkout wait-time histogram of one engine (the primary by default)."""
+    if engine is None:
+        engine, _ = _get_engine()
+    pool = engine.sync_engine.pool
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool counts overflow from -pool_size; only positive values are extra connections.
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": getattr(pool, "_max_overflow", 0),
+        "timeouts": getattr(pool, "timeouts", 0),
+        "wait_seconds": pool.wait_seconds.snapshot() if isinstance(pool, TimedQueuePool) else Histogram().snapshot(),
+    }
+
+
+def engine_pool_stats() -> Dict[str, dict]:
+    """pool_stats() of the primary ("primary") and of each replica, by replica name."""
+    engine, _ = _get_engine()
+    stats = {"primary": pool_stats(engine)}
+    router = _get_replica_router()
+    if router is not None:
+        for replica in router.replicas:
+            stats[replica.name] = pool_stats(replica.engine)
+    return stats
+
+
+def fill_sessionmaker() -> Optional[async_sessionmaker]:
+    """
+    Session factory on the primary for response cache fills when reads may
+    go to a replica, else None. A cell filled from a lagging replica right
+    after an invalidation would cache the old rows for the whole TTL.
+    """
+    if _get_replica_router() is None:
+        return None
+    _, sessionmaker = _get_engine()
+    return sessionmaker
+
+
 async def get_session():
     # FastAPI dependency that scopes a session to the request lifecycle.
     _, sessionmaker = _get_engine()
     async with sessionmaker() as session:
         yield session
+
+
+async def get_read_session():
+    """
+    FastAPI dependency for read-only requests: a session on a healthy read
+    replica within DB_REPLICA_MAX_LAG, or on the primary when none is
+    configured or none qualifies. A connection failure during the request
+    ejects the replica; the request still fails, later ones go elsewhere.
+    """
+    router = _get_replica_router()
+    replica = router.pick() if router is not None else None
+    if replica is None:
+        _, sessionmaker = _get_engine()
+        async with sessionmaker() as session:
+            yield session
+        return
+    async with replica.sessionmaker() as session:
+        try:
+            yield session
+        except Exception as error:
+            cause = connection_error(error)
+            if cause is not None:
+                replica.eject(f"request failed: {cause!r}")
+            raise
@@ -0,0 +1,84 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Bits per axis. 16 gives cells of ~306 m north-south and ~612 m * cos(lat)
+# east-west (~263 m in Arkhangelsk), so a 500 m search covers ~25 cells.
+# Stored keys depend on it: changing it means recomputing places.cell_key
+# (in a new migration; e4a7d2c9b815 keeps its frozen copy of this layout).
+CELL_BITS = 16
+
+# Larger coverings lose to the plain GiST scan; callers fall back to it.
+MAX_COVER_CELLS = 256
+
+
+def _spread_bits(v):
+    # 16-bit value -> every other bit of a 32-bit value (Morton/Z-order);
+    # works on ints and int64 arrays alike, hence bits <= 16.
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def _axis_indexes(latitude: float, longitude: float, bits: int) -> Tuple[int, int]:
+    size = 1 << bits
+    row = min(size - 1, max(0, math.floor((latitude + 90.0) / 180.0 * size)))
+    col = math.floor((longitude + 180.0) / 360.0 * size) % size
+    return row, col
+
+
+def _key(row: int, col: int) -> int:
+    # Longitude on even bits, latitude on odd bits, as in a geohash.
+    return _spread_bits(col) | (_spread_bits(row) << 1)
+
+
+def cell_key(latitude: float, longitude: float, bits: int = CELL_BITS) -> int:
+    """Z-order integer of the grid cell containing the point (geohash-style)."""
+    row, col = _axis_indexes(latitude, longitude, bits)
+    return _key(row, col)
+
+
+def cell_keys(latitudes: np.ndarray, longitudes: np.ndarray, bits: int = CELL_BITS) -> np.ndarray:
+    """Vectorized cell_key for bulk loads and backfills."""
+    size = 1 << bits
+    lats = np.asarray(latitudes, dtype=np.float64)
+    lons = np.asarray(longitudes, dtype=np.float64)
+    rows = np.clip(np.floor((lats + 90.0) / 180.0 * size), 0, size - 1).astype(np.int64)
+    cols = np.mod(np.floor((lons + 180.0) / 360.0 * size), size).astype(np.int64)
+    return _spread_bits(cols) | (_spread_bits(rows) << 1)
+
+
+def cells_covering(
+    latitude: float,
+    longitude: float,
+    radius_m: float,
+    bits: int = CELL_BITS,
+    max_cells: int = MAX_COVER_CELLS,
+) -> Optional[List[int]]:
+    """
+    Keys of every cell that intersects the circle's bounding box, or None
+    when that takes more than max_cells (large radius or near a pole).
+    """
+    size = 1 << bits
+    # Generous degree spans, as in the in-memory index: exact distances are checked afterwards.
+    d_lat = radius_m / 110_000.0
+    cos_lat = math.cos(math.radians(min(89.999, abs(latitude) + d_lat)))
+    d_lon = radius_m / (110_000.0 * max(cos_lat, 1e-6))
+    if d_lon >= 180.0:
+        return None
+
+    row_lo, col_lo = _axis_indexes(latitude - d_lat, longitude - d_lon, bits)
+    row_hi, col_hi = _axis_indexes(latitude + d_lat, longitude + d_lon, bits)
+    # Crossing the antimeridian wraps the column range.
+    col_count = (col_hi - col_lo) % size + 1
+    if (row_hi - row_lo + 1) * col_count > max_cells:
+        return None
+    return [
+        _key(row, (col_lo + offset) % size)
+        for row in range(row_lo, row_hi + 1)
+        for offset in range(col_count)
+    ]
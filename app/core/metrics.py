@@ -0,0 +1,89 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+# Seconds; spans an idle pool (sub-millisecond) up to a saturated one.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram. Snapshots use cumulative bucket counts
+    keyed by upper bound, the layout Prometheus expects.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, value_sum = self.count, self.sum
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[f"{bound:g}"] = running
+        cumulative["+Inf"] = total
+        return {"buckets": cumulative, "count": total, "sum": value_sum}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+
+
+# Request stages run from tens of microseconds (parsing a cached context)
+# to seconds (a saturated pool).
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005) + LATENCY_BUCKETS
+
+Labels = Dict[str, str]
+
+
+def _label_text(labels: Labels, extra: str = "") -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels.items()]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    # repr() is the shortest round-tripping form; bools become 0/1.
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def prometheus_samples(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> List[str]:
+    """Text exposition lines of one counter or gauge family."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_label_text(labels)} {_number(value)}")
+    return lines
+
+
+def prometheus_histogram(name: str, help_text: str, series: Iterable[Tuple[Labels, Dict]]) -> List[str]:
+    """Text exposition lines of one histogram family from Histogram.snapshot() values."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, snapshot in series:
+        for bound, count in snapshot["buckets"].items():
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{_label_text(labels, le)} {count}")
+        lines.append(f"{name}_sum{_label_text(labels)} {_number(float(snapshot['sum']))}")
+        lines.append(f"{name}_count{_label_text(labels)} {snapshot['count']}")
+    return lines
@@ -0,0 +1,181 @@
+import asyncio
+import itertools
+import logging
+from typing import Iterable, List, Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round_robin"
+LEAST_CONNECTIONS = "least_connections"
+STRATEGIES = (ROUND_ROBIN, LEAST_CONNECTIONS)
+
+# Seconds a standby is behind, or NULL when its WAL receiver is not streaming
+# or has heard nothing from the primary for :receiver_timeout seconds: such a
+# standby replays everything it has and would otherwise look current forever.
+# pg_last_xact_replay_timestamp() stops moving while the primary is idle, so
+# a streaming standby that has replayed everything it received counts as
+# current; a primary listed as a replica reports 0. Reading
+# pg_stat_wal_receiver needs superuser or pg_read_all_stats (pg_monitor).
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE status = 'streaming'
+              AND last_msg_receipt_time > now() - make_interval(secs => :receiver_timeout)
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+# PostgreSQL's default wal_receiver_timeout; the primary's keepalives arrive well within it.
+RECEIVER_TIMEOUT_S = 60.0
+
+
+def connection_error(error: Optional[BaseException]) -> Optional[BaseException]:
+    """
+    The lost or refused connection behind an error, following __cause__ and
+    __context__ (routes re-raise database errors as HTTPException), or None.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, OSError):
+            return error
+        if isinstance(error, exc.DBAPIError) and (
+            error.connection_invalidated or isinstance(error, exc.InterfaceError)
+        ):
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class Replica:
+    """One read replica: its engine, session factory and last known health."""
+
+    def __init__(self, url: str, engine: AsyncEngine):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        # Optimistic until the first check: a fresh worker should not pile onto the primary.
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.ejections = 0
+
+    def checked_out(self) -> int:
+        return self.engine.sync_engine.pool.checkedout()
+
+    def eject(self, reason: str) -> None:
+        if self.healthy:
+            self.ejections += 1
+            logger.warning("Read replica %s ejected: %s", self.name, reason)
+        self.healthy = False
+        self.last_error = reason
+
+    def readmit(self, lag_seconds: float) -> None:
+        if not self.healthy:
+            logger.info("Read replica %s back in rotation (lag %.1fs)", self.name, lag_seconds)
+        self.healthy = True
+        self.lag_seconds = lag_seconds
+        self.last_error = None
+
+
+class ReplicaRouter:
+    """
+    Picks the replica for a read-only session. Replicas that fail a health
+    check or a request are ejected until a later check succeeds; replicas
+    more than max_lag_s behind are skipped until they catch up. pick()
+    returns None when nothing qualifies and the caller reads the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: Iterable[Replica],
+        strategy: str = ROUND_ROBIN,
+        max_lag_s: float = 5.0,
+        check_timeout_s: float = 2.0,
+        receiver_timeout_s: float = RECEIVER_TIMEOUT_S,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+        self.replicas: List[Replica] = list(replicas)
+        self.strategy = strategy
+        self.max_lag_s = max_lag_s
+        self.check_timeout_s = check_timeout_s
+        self.receiver_timeout_s = receiver_timeout_s
+        self._cursor = itertools.count()
+        self.reads_on_replicas = 0
+        self.reads_on_primary = 0
+
+    def eligible(self) -> List[Replica]:
+        return [
+            replica
+            for replica in self.replicas
+            if replica.healthy and (replica.lag_seconds is None or replica.lag_seconds <= self.max_lag_s)
+        ]
+
+    def pick(self) -> Optional[Replica]:
+        candidates = self.eligible()
+        if not candidates:
+            self.reads_on_primary += 1
+            return None
+        self.reads_on_replicas += 1
+        if self.strategy == LEAST_CONNECTIONS:
+            return min(candidates, key=lambda replica: replica.checked_out())
+        return candidates[next(self._cursor) % len(candidates)]
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            lag = await asyncio.wait_for(self._probe(replica), self.check_timeout_s)
+        except Exception as error:
+            replica.eject(f"health check failed: {error!r}")
+            return
+        if lag is None:
+            replica.eject("WAL receiver is not streaming from the primary")
+            return
+        replica.readmit(float(lag))
+
+    async def _probe(self, replica: Replica):
+        async with replica.engine.connect() as conn:
+            return await conn.scalar(REPLICA_LAG_SQL, {"receiver_timeout": self.receiver_timeout_s})
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def watch(self, interval_s: float) -> None:
+        """Re-check every replica forever; run as a background task."""
+        while True:
+            await asyncio.sleep(interval_s)
+            await self.check_all()
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "max_lag_seconds": self.max_lag_s,
+            "reads_on_replicas": self.reads_on_replicas,
+            "reads_on_primary": self.reads_on_primary,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "checked_out": replica.checked_out(),
+                    "ejections": replica.ejections,
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+        }
@@ -0,0 +1,166 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.env import env_bool, load_env
+from app.core.metrics import STAGE_BUCKETS, Histogram
+
+
+load_env()
+
+# Stages of a search request, in the order they happen. "pool" is the wait
+# for a database connection and "db" the statements' execution on it; either
+# is absent when the request never reached the database.
+PARSE = "parse"
+POOL = "pool"
+DB = "db"
+SERIALIZE = "serialize"
+TOTAL = "total"
+STAGES = (PARSE, POOL, DB, SERIALIZE)
+
+TIMED_PATHS = ("/search", "/search/batch")
+
+
+def metrics_enabled() -> bool:
+    return env_bool("METRICS_ENABLED")
+
+
+def server_timing_enabled() -> bool:
+    return env_bool("SERVER_TIMING")
+
+
+class RequestTimings:
+    """Seconds per stage for one request; repeated stages add up."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        entries.append(f"{TOTAL};dur={total * 1000:.3f}")
+        return ", ".join(entries)
+
+
+# Set only while StageTimingMiddleware handles a timed request, so every
+# timer below costs one ContextVar lookup when timing is off. The object is
+# mutable: SQLAlchemy's greenlets and executor hand-offs run on copies of the
+# context and still add to the same timings.
+_CURRENT: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _CURRENT.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+class timed:
+    """`with timed(PARSE): ...` adds the block's duration to the current request."""
+
+    __slots__ = ("stage", "timings", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "timed":
+        self.timings = _CURRENT.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timings is not None:
+            self.timings.add(self.stage, time.perf_counter() - self.started)
+
+
+_HISTOGRAMS: Dict[Tuple[str, str], Histogram] = {}
+
+
+def stage_histograms() -> List[Tuple[Dict[str, str], Histogram]]:
+    return [({"handler": handler, "stage": stage}, histogram) for (handler, stage), histogram in sorted(_HISTOGRAMS.items())]
+
+
+def observe(handler: str, timings: RequestTimings, total: float) -> None:
+    for stage, seconds in list(timings.stages.items()) + [(TOTAL, total)]:
+        histogram = _HISTOGRAMS.get((handler, stage))
+        if histogram is None:
+            histogram = _HISTOGRAMS.setdefault((handler, stage), Histogram(STAGE_BUCKETS))
+        histogram.observe(seconds)
+
+
+def reset_stage_histograms() -> None:
+    _HISTOGRAMS.clear()
+
+
+def install_stage_timing(engine: AsyncEngine) -> None:
+    """Add statement execution time on `engine` to the request's "db" stage."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if _CURRENT.get() is not None:
+            conn.info["stage_timing_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("stage_timing_started", None)
+        if started is not None:
+            record(DB, time.perf_counter() - started)
+
+
+class StageTimingMiddleware:
+    """
+    ASGI middleware timing requests to `paths`: adds a Server-Timing header
+    (`header`) and feeds the per-stage histograms behind /metrics
+    (`metrics`). With both off it passes requests straight through.
+    """
+
+    def __init__(
+        self,
+        app,
+        paths: Iterable[str] = TIMED_PATHS,
+        header: Optional[bool] = None,
+        metrics: Optional[bool] = None,
+    ):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.header = server_timing_enabled() if header is None else header
+        self.metrics = metrics_enabled() if metrics is None else metrics
+        self.enabled = self.header or self.metrics
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        started = time.perf_counter()
+
+        async def send_timed(message):
+            # The body is already serialized when the response starts.
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                if self.metrics:
+                    observe(scope["path"], timings, total)
+                if self.header:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", timings.server_timing(total).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _CURRENT.set(timings)
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _CURRENT.reset(token)
@@ -1,8 +1,64 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 import uvicorn
 from fastapi import FastAPI
 from app.api.routes import router as api_router
+from app.core.db import _build_database_url, _get_engine, _get_replica_router
+from app.core.env import env_bool, env_float
+from app.core.timing import StageTimingMiddleware
+from app.repositories.backends import MEMORY, init_places_backend, places_backend, request_places_index_reload
+from app.repositories.places_copy import asyncpg_dsn, listen_for_place_changes
+from app.services.context_parser import prefill_lemma_cache
+from app.services.dictionary_reloader import watch_dictionaries
+from app.services.parse_executor import get_parse_executor, shutdown_parse_executor
+from app.services.response_cache import get_response_cache, invalidate_response_cache
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Opt-in warm-up so the first requests skip pymorphy3 for known vocabulary.
+    if env_bool("LEMMA_CACHE_PREFILL"):
+        prefill_lemma_cache()
+    await get_parse_executor().start()
+    if places_backend() == MEMORY:
+        _, sessionmaker = _get_engine()
+        await init_places_backend(sessionmaker)
+    tasks = []
+    interval = env_float("LEXICON_WATCH_INTERVAL", 0)
+    if interval > 0:
+        tasks.append(asyncio.create_task(watch_dictionaries(interval)))
+    memory_backend = places_backend() == MEMORY
+    if get_response_cache() is not None or memory_backend:
+        _, sessionmaker = _get_engine()
+
+        def on_places_changed(reason: str) -> None:
+            invalidate_response_cache(reason)
+            if memory_backend:
+                request_places_index_reload(sessionmaker)
+
+        # Loaders and other workers announce place changes on the primary.
+        tasks.append(
+            asyncio.create_task(listen_for_place_changes(asyncpg_dsn(_build_database_url()), on_places_changed))
+        )
+    replicas = _get_replica_router()
+    if replicas is not None:
+        # Learn health and lag before the first read is routed.
+        await replicas.check_all()
+        tasks.append(asyncio.create_task(replicas.watch(env_float("DB_REPLICA_CHECK_INTERVAL", 5.0))))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if replicas is not None:
+        await replicas.dispose()
+    shutdown_parse_executor()
+
 
-app = FastAPI(title="Geo Context Search Service")
+app = FastAPI(title="Geo Context Search Service", lifespan=lifespan)
+# Server-Timing header (SERVER_TIMING) and stage histograms (METRICS_ENABLED); a pass-through when both are off.
+app.add_middleware(StageTimingMiddleware)
 
 
 app.include_router(api_router, prefix="")
@@ -1,32 +1,122 @@
+import re
+import struct
 from datetime import datetime
 
-from sqlalchemy import String, Text, func
+from sqlalchemy import BigInteger, DDL, Index, String, Text, event, func, inspect
 from sqlalchemy.orm import Mapped, mapped_column
-from geoalchemy2 import Geography
+from geoalchemy2 import Geography, WKBElement, WKTElement
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import TIMESTAMP
 
+from app.core.geocell import cell_key
 from app.models.base import Base
 
 
 class Place(Base):
     __tablename__ = "places"
+    __table_args__ = (
+        # Trigram index serves substring/fuzzy street_norm filters.
+        Index(
+            "ix_places_street_norm_trgm",
+            "street_norm",
+            postgresql_using="gin",
+            postgresql_ops={"street_norm": "gin_trgm_ops"},
+        ),
+        # Cell prefilter (see app.core.geocell) with the usual equality filters.
+        Index("ix_places_cell_key_category_brand", "cell_key", "category", "brand"),
+        # Upsert target for imports (scripts/import_places.py); NULL source_id never conflicts.
+        Index("uq_places_source_source_id", "source", "source_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(Text, nullable=False)
     category: Mapped[str | None] = mapped_column(String, index=True)
     brand: Mapped[str | None] = mapped_column(String, index=True)
     address: Mapped[str | None] = mapped_column(Text)
+    # Lemmatized street from address (see normalize_street); set on write.
+    street_norm: Mapped[str | None] = mapped_column(Text)
 
+    # GiST index (idx_places_geog) backs ST_DWithin and KNN ordering.
     geog: Mapped[str] = mapped_column(
-        Geography(geometry_type="POINT", srid=4326),
+        Geography(geometry_type="POINT", srid=4326, spatial_index=True),
         nullable=False,
     )
 
+    # Z-order grid cell of geog (app.core.geocell.cell_key); set on write.
+    cell_key: Mapped[int | None] = mapped_column(BigInteger)
+
     source: Mapped[str | None] = mapped_column(String)
+    # Identifier of the row in its source dataset.
+    source_id: Mapped[str | None] = mapped_column(Text)
     metadata_json: Mapped[dict | None] = mapped_column(JSONB)
 
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         server_default=func.now(),
     )
+
+
+# gin_trgm_ops needs pg_trgm; create it alongside the table (metadata.create_all).
+event.listen(Place.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+def _street_norm(address: str | None) -> str | None:
+    # Imported lazily: pulls in the parser (and pymorphy3) only on writes.
+    from app.services.context_parser import normalize_street
+
+    return normalize_street(address)
+
+
+@event.listens_for(Place, "before_insert")
+def _fill_street_norm_on_insert(mapper, connection, target: Place) -> None:
+    if target.street_norm is None:
+        target.street_norm = _street_norm(target.address)
+
+
+@event.listens_for(Place, "before_update")
+def _fill_street_norm_on_update(mapper, connection, target: Place) -> None:
+    if inspect(target).attrs.address.history.has_changes():
+        target.street_norm = _street_norm(target.address)
+
+
+_WKT_POINT = re.compile(r"POINT\s*\(\s*([-+0-9.eE]+)\s+([-+0-9.eE]+)", re.IGNORECASE)
+_EWKB_SRID_FLAG = 0x20000000
+
+
+def _point_lat_lon(geog) -> tuple[float, float] | None:
+    """(lat, lon) of an (E)WKT string/element or EWKB point, None if unrecognized."""
+    if isinstance(geog, WKTElement):
+        geog = geog.data
+    if isinstance(geog, str):
+        match = _WKT_POINT.search(geog)
+        if match is None:
+            return None
+        lon, lat = float(match.group(1)), float(match.group(2))
+        return lat, lon
+    if isinstance(geog, WKBElement) and isinstance(geog.data, (bytes, memoryview)):
+        data = bytes(geog.data)
+        order = "<" if data[0] == 1 else ">"
+        (geom_type,) = struct.unpack_from(order + "I", data, 1)
+        if geom_type & 0xFF != 1:
+            return None
+        offset = 9 if geom_type & _EWKB_SRID_FLAG else 5
+        lon, lat = struct.unpack_from(order + "dd", data, offset)
+        return lat, lon
+    return None
+
+
+def _cell_key(geog) -> int | None:
+    point = _point_lat_lon(geog)
+    return cell_key(*point) if point is not None else None
+
+
+@event.listens_for(Place, "before_insert")
+def _fill_cell_key_on_insert(mapper, connection, target: Place) -> None:
+    if target.cell_key is None:
+        target.cell_key = _cell_key(target.geog)
+
+
+@event.listens_for(Place, "before_update")
+def _fill_cell_key_on_update(mapper, connection, target: Place) -> None:
+    if inspect(target).attrs.geog.history.has_changes():
+        target.cell_key = _cell_key(target.geog)
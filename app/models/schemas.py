@@ -1,5 +1,12 @@
+import math
+
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+
+def coordinates_in_range(latitude: float, longitude: float) -> bool:
+    """True for finite WGS84 coordinates; anything else makes PostGIS' geography cast raise."""
+    return math.isfinite(latitude) and math.isfinite(longitude) and -90 <= latitude <= 90 and -180 <= longitude <= 180
 
 
 class SearchRequest(BaseModel):
@@ -39,3 +46,67 @@ class SearchResult(BaseModel):
 
 class SearchResponse(BaseModel):
     results: List[SearchResult]
+
+
+# Upper bound on points per /search/batch call; keeps one statement bounded.
+MAX_BATCH_ITEMS = 100
+
+
+class BatchSearchItem(BaseModel):
+    # Validated per item in the service so one bad location fails only its item.
+    location: str = Field(..., description="Coordinates in format 'latitude:longitude'", examples=["64.5430:40.5369"])
+    context: str = Field(..., description="Natural language search context", examples=["Аптека рядом"])
+
+
+class BatchSearchRequest(BaseModel):
+    items: List[BatchSearchItem] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class BatchSearchItemResult(BaseModel):
+    results: List[SearchResult] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class BatchSearchResponse(BaseModel):
+    # Same order as BatchSearchRequest.items.
+    items: List[BatchSearchItemResult]
+
+
+class ReloadResponse(BaseModel):
+    generation: int
+    categories: int
+    brands: int
+
+
+class HistogramSnapshot(BaseModel):
+    buckets: Dict[str, int]
+    count: int
+    sum: float
+
+
+class ReplicaStats(BaseModel):
+    name: str
+    healthy: bool
+    lag_seconds: Optional[float] = None
+    checked_out: int
+    ejections: int
+    last_error: Optional[str] = None
+
+
+class ReplicaSetStats(BaseModel):
+    strategy: str
+    max_lag_seconds: float
+    reads_on_replicas: int
+    reads_on_primary: int
+    replicas: List[ReplicaStats]
+
+
+class PoolStatsResponse(BaseModel):
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    timeouts: int
+    wait_seconds: HistogramSnapshot
+    replicas: Optional[ReplicaSetStats] = None
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+from typing import Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.env import env_float, load_env
+from app.repositories.memory_places_repository import (
+    InMemoryPlacesRepository,
+    PlacesIndex,
+    load_places_index,
+)
+from app.repositories.nearest_statements import GIST, PREFILTERS
+from app.repositories.places_repository import PlacesRepository
+
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+POSTGIS = "postgis"
+MEMORY = "memory"
+BACKENDS = (POSTGIS, MEMORY)
+
+_INDEX: Optional[PlacesIndex] = None
+_RELOAD: Optional[asyncio.Task] = None
+_RELOAD_PENDING = False
+
+
+def places_backend() -> str:
+    backend = (os.getenv("PLACES_BACKEND") or POSTGIS).strip().lower()
+    if backend not in BACKENDS:
+        raise RuntimeError(f"PLACES_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    return backend
+
+
+def places_prefilter() -> str:
+    """PLACES_PREFILTER for the PostGIS backend: gist (default) or cells."""
+    prefilter = (os.getenv("PLACES_PREFILTER") or GIST).strip().lower()
+    if prefilter not in PREFILTERS:
+        raise RuntimeError(f"PLACES_PREFILTER must be one of {PREFILTERS}, got {prefilter!r}")
+    return prefilter
+
+
+async def init_places_backend(sessionmaker: async_sessionmaker) -> Optional[PlacesIndex]:
+    """
+    Build the in-memory index from the places table when that backend is
+    selected. Safe to call again to pick up new rows; the swap is atomic.
+    """
+    global _INDEX
+    if places_backend() != MEMORY:
+        return None
+    async with sessionmaker() as session:
+        index = await load_places_index(session, cell_size_m=env_float("PLACES_INDEX_CELL_M", 500.0))
+    _INDEX = index
+    return index
+
+
+async def _reload_places_index(sessionmaker: async_sessionmaker) -> None:
+    global _RELOAD, _RELOAD_PENDING
+    try:
+        while _RELOAD_PENDING:
+            _RELOAD_PENDING = False
+            try:
+                index = await init_places_backend(sessionmaker)
+            except Exception:
+                logger.exception("Rebuilding the in-memory places index failed; keeping the previous one")
+                continue
+            if index is not None:
+                logger.info("In-memory places index rebuilt: %d places", len(index))
+    finally:
+        _RELOAD = None
+
+
+def request_places_index_reload(sessionmaker: async_sessionmaker) -> Optional[asyncio.Task]:
+    """
+    Rebuild the in-memory index in the background, e.g. after a bulk load.
+    Requests arriving during a rebuild coalesce into one more rebuild;
+    searches keep using the previous index until the swap.
+    """
+    global _RELOAD, _RELOAD_PENDING
+    if places_backend() != MEMORY:
+        return None
+    _RELOAD_PENDING = True
+    if _RELOAD is None:
+        _RELOAD = asyncio.get_running_loop().create_task(_reload_places_index(sessionmaker))
+    return _RELOAD
+
+
+def set_places_index(index: Optional[PlacesIndex]) -> None:
+    global _INDEX
+    _INDEX = index
+
+
+def get_places_repository(session: AsyncSession) -> Union[PlacesRepository, InMemoryPlacesRepository]:
+    # Fall back to PostGIS until the index has been built.
+    index = _INDEX
+    if index is not None and places_backend() == MEMORY:
+        return InMemoryPlacesRepository(index)
+    return PlacesRepository(session, prefilter=places_prefilter())
@@ -0,0 +1,286 @@
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, func, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from geoalchemy2 import Geometry
+
+from app.models.place import Place
+from app.repositories.places_repository import NearbyPlace, NearbyQuery
+
+
+# WGS84 ellipsoid, the same one PostGIS geography distances use.
+_WGS84_A = 6378137.0
+_WGS84_E2 = 6.69437999014e-3
+
+# Placeholder code for rows without category/brand.
+_NO_CODE = -1
+
+
+def _radii_of_curvature(lat_deg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Meridional (M) and prime-vertical (N) radii in metres at the given latitudes."""
+    sin_lat = np.sin(np.radians(lat_deg))
+    w = np.sqrt(1.0 - _WGS84_E2 * sin_lat * sin_lat)
+    m = _WGS84_A * (1.0 - _WGS84_E2) / (w ** 3)
+    n = _WGS84_A / w
+    return m, n
+
+
+def ellipsoid_distance_m(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Distance on the WGS84 ellipsoid using local radii of curvature at the
+    mid latitude. Agrees with PostGIS ST_Distance(geography) to within
+    millimetres at the few-kilometre scale this service searches.
+    """
+    mid_lat = (lats + lat) / 2.0
+    m, n = _radii_of_curvature(mid_lat)
+    d_north = np.radians(lats - lat) * m
+    d_east = np.radians(lons - lon) * n * np.cos(np.radians(mid_lat))
+    return np.hypot(d_north, d_east)
+
+
+class PlacesIndex:
+    """
+    In-memory snapshot of the places table: coordinates in NumPy arrays,
+    bucketed into a lat/lon grid so a radius query only touches nearby cells.
+    The rows never change (only the per-row Place objects are built lazily);
+    later writes need a new index, see backends.request_places_index_reload.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Tuple[int, str, Optional[str], Optional[str], Optional[str], Optional[str], float, float]],
+        cell_size_m: float = 500.0,
+    ):
+        # rows: (id, name, category, brand, address, street_norm, latitude, longitude)
+        self.cell_deg = cell_size_m / 111_320.0
+        count = len(rows)
+
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)
+        lats = np.fromiter((r[6] for r in rows), dtype=np.float64, count=count)
+        lons = np.fromiter((r[7] for r in rows), dtype=np.float64, count=count)
+
+        self._category_codes = {}
+        self._brand_codes = {}
+        categories = np.fromiter(
+            (self._code(self._category_codes, r[2]) for r in rows), dtype=np.int32, count=count
+        )
+        brands = np.fromiter((self._code(self._brand_codes, r[3]) for r in rows), dtype=np.int32, count=count)
+
+        cell_y = np.floor(lats / self.cell_deg).astype(np.int64)
+        cell_x = np.floor(lons / self.cell_deg).astype(np.int64)
+        self._x_min = int(cell_x.min()) if count else 0
+        self._x_span = int(cell_x.max()) - self._x_min + 1 if count else 1
+        keys = cell_y * self._x_span + (cell_x - self._x_min)
+
+        # Sorted by cell key: each grid row's x-range is one contiguous slice.
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self.ids = ids[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.categories = categories[order]
+        self.brands = brands[order]
+        self._rows = [rows[i] for i in order.tolist()]
+        self._street_norms = [r[5] or "" for r in self._rows]
+        # Built lazily per row; queries only need the few that survive filters.
+        self._places: List[Optional[Place]] = [None] * count
+
+    @staticmethod
+    def _code(codes: dict, value: Optional[str]) -> int:
+        if value is None:
+            return _NO_CODE
+        return codes.setdefault(value, len(codes))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _candidate_slices(self, latitude: float, longitude: float, radius_m: float) -> Iterable[Tuple[int, int]]:
+        # Generous degree spans: distances are checked exactly afterwards.
+        d_lat = radius_m / 110_000.0
+        d_lon = radius_m / (110_000.0 * max(0.01, math.cos(math.radians(min(89.0, abs(latitude) + d_lat)))))
+        y_lo = math.floor((latitude - d_lat) / self.cell_deg)
+        y_hi = math.floor((latitude + d_lat) / self.cell_deg)
+        x_lo = max(math.floor((longitude - d_lon) / self.cell_deg) - self._x_min, 0)
+        x_hi = min(math.floor((longitude + d_lon) / self.cell_deg) - self._x_min, self._x_span - 1)
+        if x_lo > x_hi:
+            return
+        for y in range(y_lo, y_hi + 1):
+            lo = np.searchsorted(self._keys, y * self._x_span + x_lo, side="left")
+            hi = np.searchsorted(self._keys, y * self._x_span + x_hi, side="right")
+            if lo < hi:
+                yield int(lo), int(hi)
+
+    def _place(self, i: int) -> Place:
+        place = self._places[i]
+        if place is None:
+            pid, name, category, brand, address, street_norm, _, _ = self._rows[i]
+            # Transient instance: same attributes callers read from ORM rows.
+            place = Place(
+                id=pid, name=name, category=category, brand=brand, address=address, street_norm=street_norm
+            )
+            self._places[i] = place
+        return place
+
+    def _search(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: int,
+        category: Optional[str],
+        brand: Optional[str],
+        street: Optional[str],
+    ) -> List[Tuple[int, float]]:
+        """Return (row position, rounded distance) of the nearest matches, in order."""
+        slices = list(self._candidate_slices(latitude, longitude, radius_m))
+        if not slices:
+            return []
+        idx = np.concatenate([np.arange(lo, hi) for lo, hi in slices])
+
+        if category:
+            code = self._category_codes.get(category)
+            if code is None:
+                return []
+            idx = idx[self.categories[idx] == code]
+        if brand:
+            code = self._brand_codes.get(brand)
+            if code is None:
+                return []
+            idx = idx[self.brands[idx] == code]
+        if idx.size == 0:
+            return []
+
+        dist = ellipsoid_distance_m(latitude, longitude, self.lats[idx], self.lons[idx])
+        within = dist <= radius_m
+        idx, dist = idx[within], dist[within]
+
+        if street:
+            # Substring match on street_norm, as the SQL LIKE '%...%' filter.
+            keep = np.fromiter((street in self._street_norms[i] for i in idx.tolist()), dtype=bool, count=idx.size)
+            idx, dist = idx[keep], dist[keep]
+
+        # Same ordering key as SQL: distance rounded to centimetres; id breaks ties.
+        rounded = np.round(dist, 2)
+        order = np.lexsort((self.ids[idx], rounded))[:limit]
+        return [(int(idx[o]), float(rounded[o])) for o in order.tolist()]
+
+    def find_nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> List[dict]:
+        return [
+            {
+                "place": self._place(i),
+                "distance_meters": distance,
+                "latitude": float(self.lats[i]),
+                "longitude": float(self.lons[i]),
+            }
+            for i, distance in self._search(latitude, longitude, radius_m, limit, category, brand, street)
+        ]
+
+    def find_nearest_lean(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> List[NearbyPlace]:
+        return [
+            NearbyPlace(int(self.ids[i]), self._rows[i][1], float(self.lats[i]), float(self.lons[i]), distance)
+            for i, distance in self._search(latitude, longitude, radius_m, limit, category, brand, street)
+        ]
+
+
+async def load_places_index(session: AsyncSession, cell_size_m: float = 500.0) -> PlacesIndex:
+    """Read every place (without metadata/geography blobs) and build the index."""
+    stmt = select(
+        Place.id,
+        Place.name,
+        Place.category,
+        Place.brand,
+        Place.address,
+        Place.street_norm,
+        func.ST_Y(cast(Place.geog, Geometry("POINT", srid=4326))),
+        func.ST_X(cast(Place.geog, Geometry("POINT", srid=4326))),
+    )
+    result = await session.stream(stmt)
+    rows = [tuple(row) async for row in result]
+    return PlacesIndex(rows, cell_size_m=cell_size_m)
+
+
+class InMemoryPlacesRepository:
+    """PlacesRepository counterpart answering find_nearest from a PlacesIndex."""
+
+    def __init__(self, index: PlacesIndex):
+        self.index = index
+
+    async def find_nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> List[dict]:
+        return self.index.find_nearest(
+            latitude=latitude,
+            longitude=longitude,
+            radius_m=radius_m,
+            limit=limit,
+            category=category,
+            brand=brand,
+            street=street,
+        )
+
+    async def find_nearest_lean(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> List[NearbyPlace]:
+        return self.index.find_nearest_lean(
+            latitude=latitude,
+            longitude=longitude,
+            radius_m=radius_m,
+            limit=limit,
+            category=category,
+            brand=brand,
+            street=street,
+        )
+
+    async def find_nearest_batch(
+        self,
+        queries: Sequence[NearbyQuery],
+        radius_m: float = 500,
+        limit: int = 5,
+    ) -> List[List[NearbyPlace]]:
+        return [
+            self.index.find_nearest_lean(
+                latitude=query.latitude,
+                longitude=query.longitude,
+                radius_m=radius_m,
+                limit=limit,
+                category=query.category,
+                brand=query.brand,
+                street=query.street,
+            )
+            for query in queries
+        ]
@@ -0,0 +1,332 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, any_, bindparam, cast, column, func, or_, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import BigInteger, Float, Integer, Numeric, String
+
+from geoalchemy2 import Geography, Geometry
+
+from app.models.place import Place
+
+
+# KNN (<->) orders geography by spherical distance while results are ranked by
+# spheroidal ST_Distance; fetch a few extra candidates so near-ties cannot
+# push a true top-N place out of the result.
+KNN_OVERFETCH = 10
+
+# Projections: whole Place entities, or the NearbyPlace columns only.
+FULL = "full"
+LEAN = "lean"
+
+# Which optional filters a query uses: (category, brand, street).
+Shape = Tuple[bool, bool, bool]
+
+# How candidates are narrowed before exact distance math: the GiST index on
+# geog alone, or the cell_key B-tree with the cells covering the circle.
+GIST = "gist"
+CELLS = "cells"
+PREFILTERS = (GIST, CELLS)
+
+# Cache key of the multi-point statement; it has a single shape.
+BATCH = "batch"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def query_shape(category: Optional[str], brand: Optional[str], street: Optional[str]) -> Shape:
+    return bool(category), bool(brand), bool(street)
+
+
+def build_nearest_statement(kind: str, shape: Shape, prefilter: str = GIST) -> Select:
+    """
+    Nearest-places query for one filter shape. Every request value is a
+    named bind parameter, so the statement can be built once and reused.
+    """
+    has_category, has_brand, has_street = shape
+    point = cast(
+        func.ST_SetSRID(
+            func.ST_MakePoint(bindparam("longitude", type_=Float), bindparam("latitude", type_=Float)),
+            4326,
+        ),
+        Geography(geometry_type="POINT", srid=4326),
+    )
+
+    candidates = select(Place.id).where(func.ST_DWithin(Place.geog, point, bindparam("radius_m", type_=Float)))
+
+    if prefilter == GIST:
+        # Index-assisted nearest-neighbour scan: the GiST index on geog yields
+        # rows in distance order, ST_DWithin cuts off at the radius.
+        candidates = candidates.order_by(Place.geog.op("<->")(point))
+    elif prefilter == CELLS:
+        # Equality on the covering cells lets ix_places_cell_key_category_brand
+        # narrow rows before any geography math. Sphere distance is the same
+        # metric as <-> but cannot be served by the GiST index, so the planner
+        # is not tempted back into the KNN scan.
+        candidates = candidates.where(
+            Place.cell_key == any_(bindparam("cells", type_=ARRAY(BigInteger)))
+        ).order_by(func.ST_Distance(Place.geog, point, False))
+    else:
+        raise ValueError(f"Unknown prefilter {prefilter!r}; expected one of {PREFILTERS}")
+    candidates = candidates.limit(bindparam("candidate_limit", type_=Integer))
+
+    # Optional filters applied at SQL level for better performance.
+    if has_category:
+        candidates = candidates.where(Place.category == bindparam("category", type_=String))
+
+    if has_brand:
+        candidates = candidates.where(Place.brand == bindparam("brand", type_=String))
+
+    if has_street:
+        # street is a normalize_street() key; trigram index on street_norm
+        # serves the substring match.
+        candidates = candidates.where(Place.street_norm.like(bindparam("street_pattern", type_=String), escape="\\"))
+
+    candidates = candidates.subquery()
+
+    # PostGIS distance in meters when using geography columns.
+    distance_expr = func.round(cast(func.ST_Distance(Place.geog, point), Numeric), 2)
+    geometry = cast(Place.geog, Geometry("POINT", srid=4326))
+    lat_expr = func.ST_Y(geometry).label("latitude")
+    lon_expr = func.ST_X(geometry).label("longitude")
+
+    if kind == FULL:
+        columns = (Place, distance_expr.label("distance_meters"), lat_expr, lon_expr)
+    elif kind == LEAN:
+        # float8 decodes far cheaper than numeric -> Decimal.
+        columns = (Place.id, Place.name, lat_expr, lon_expr, cast(distance_expr, Float).label("distance_meters"))
+    else:
+        raise ValueError(f"Unknown nearest statement kind {kind!r}")
+
+    return (
+        select(*columns)
+        .join(candidates, candidates.c.id == Place.id)
+        .order_by(distance_expr, Place.id)
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+def build_batch_nearest_statement() -> Select:
+    """
+    Nearest places for many points in one statement: the points arrive as
+    parallel arrays, unnest() turns them into rows and each row drives the
+    same KNN scan as build_nearest_statement through a LATERAL join. Absent
+    filters are NULL in their array and disable the condition for that row.
+    """
+    points = (
+        func.unnest(
+            bindparam("items", type_=ARRAY(Integer)),
+            bindparam("latitudes", type_=ARRAY(Float)),
+            bindparam("longitudes", type_=ARRAY(Float)),
+            bindparam("categories", type_=ARRAY(String)),
+            bindparam("brands", type_=ARRAY(String)),
+            bindparam("street_patterns", type_=ARRAY(String)),
+        )
+        .table_valued(
+            column("item", Integer),
+            column("latitude", Float),
+            column("longitude", Float),
+            column("category", String),
+            column("brand", String),
+            column("street_pattern", String),
+        )
+        .render_derived()
+        .alias("q")
+    )
+    point = cast(
+        func.ST_SetSRID(func.ST_MakePoint(points.c.longitude, points.c.latitude), 4326),
+        Geography(geometry_type="POINT", srid=4326),
+    )
+    geometry = cast(Place.geog, Geometry("POINT", srid=4326))
+
+    candidates = (
+        select(
+            Place.id,
+            Place.name,
+            func.ST_Y(geometry).label("latitude"),
+            func.ST_X(geometry).label("longitude"),
+            func.round(cast(func.ST_Distance(Place.geog, point), Numeric), 2).label("distance"),
+        )
+        .where(func.ST_DWithin(Place.geog, point, bindparam("radius_m", type_=Float)))
+        .where(or_(points.c.category.is_(None), Place.category == points.c.category))
+        .where(or_(points.c.brand.is_(None), Place.brand == points.c.brand))
+        .where(or_(points.c.street_pattern.is_(None), Place.street_norm.like(points.c.street_pattern, escape="\\")))
+        .order_by(Place.geog.op("<->")(point))
+        .limit(bindparam("candidate_limit", type_=Integer))
+        .correlate(points)
+        .subquery("c")
+    )
+    nearest = (
+        select(
+            candidates.c.id,
+            candidates.c.name,
+            candidates.c.latitude,
+            candidates.c.longitude,
+            cast(candidates.c.distance, Float).label("distance_meters"),
+        )
+        .order_by(candidates.c.distance, candidates.c.id)
+        .limit(bindparam("limit", type_=Integer))
+        .lateral("r")
+    )
+    return (
+        select(
+            points.c.item,
+            nearest.c.id,
+            nearest.c.name,
+            nearest.c.latitude,
+            nearest.c.longitude,
+            nearest.c.distance_meters,
+        )
+        .select_from(points)
+        .join(nearest, true())
+        .order_by(points.c.item, nearest.c.distance_meters, nearest.c.id)
+    )
+
+
+def nearest_params(
+    latitude: float,
+    longitude: float,
+    radius_m: float,
+    limit: int,
+    category: Optional[str],
+    brand: Optional[str],
+    street: Optional[str],
+    cells: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Bind values for build_nearest_statement(kind, query_shape(category, brand, street));
+    `cells` is required by the CELLS prefilter.
+    """
+    params: Dict[str, Any] = {
+        "latitude": float(latitude),
+        "longitude": float(longitude),
+        "radius_m": float(radius_m),
+        "limit": int(limit),
+        "candidate_limit": int(limit) + KNN_OVERFETCH,
+    }
+    if category:
+        params["category"] = category
+    if brand:
+        params["brand"] = brand
+    if street:
+        params["street_pattern"] = f"%{_escape_like(street)}%"
+    if cells is not None:
+        params["cells"] = list(cells)
+    return params
+
+
+def batch_nearest_params(
+    points: Sequence[Tuple[float, float, Optional[str], Optional[str], Optional[str]]],
+    radius_m: float,
+    limit: int,
+) -> Dict[str, Any]:
+    """Bind values for build_batch_nearest_statement; `item` is the position in points."""
+    return {
+        "items": list(range(len(points))),
+        "latitudes": [float(p[0]) for p in points],
+        "longitudes": [float(p[1]) for p in points],
+        "categories": [p[2] or None for p in points],
+        "brands": [p[3] or None for p in points],
+        "street_patterns": [f"%{_escape_like(p[4])}%" if p[4] else None for p in points],
+        "radius_m": float(radius_m),
+        "limit": int(limit),
+        "candidate_limit": int(limit) + KNN_OVERFETCH,
+    }
+
+
+class RenderedStatement:
+    """Driver-level SQL for one statement plus how to lay out its parameters."""
+
+    __slots__ = ("sql", "positions", "defaults")
+
+    def __init__(self, sql: str, positions: Optional[Tuple[str, ...]], defaults: Dict[str, Any]):
+        self.sql = sql
+        self.positions = positions
+        # Values of binds SQLAlchemy created for literals (SRID, round digits).
+        self.defaults = defaults
+
+    def parameters(self, params: Dict[str, Any]):
+        values = {**self.defaults, **params}
+        if self.positions is None:
+            return values
+        return tuple(values[name] for name in self.positions)
+
+
+class NearestStatementCache:
+    """
+    Statements for each projection, filter shape and prefilter plus the
+    batch statement, built and compiled once per process. `misses` only
+    grows while new shapes are first seen; in steady state every lookup
+    is a hit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements: Dict[Tuple[str, Shape, str], Select] = {}
+        self._rendered: Dict[Tuple[Any, str], RenderedStatement] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def statement(self, kind: str, shape: Shape, prefilter: str = GIST) -> Select:
+        key = (kind, shape, prefilter)
+        with self._lock:
+            stmt = self._statements.get(key)
+            if stmt is not None:
+                self.hits += 1
+                return stmt
+            self.misses += 1
+            stmt = build_nearest_statement(kind, shape, prefilter)
+            self._statements[key] = stmt
+            return stmt
+
+    def _render(self, key, dialect: Dialect, build: Callable[[], Select]) -> RenderedStatement:
+        key = (key, f"{dialect.name}+{dialect.driver}")
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self.hits += 1
+                return rendered
+            self.misses += 1
+            compiled = build().compile(dialect=dialect)
+            positions = tuple(compiled.positiontup) if compiled.positional else None
+            rendered = RenderedStatement(compiled.string, positions, dict(compiled.params))
+            self._rendered[key] = rendered
+            return rendered
+
+    def rendered(self, shape: Shape, dialect: Dialect, prefilter: str = GIST) -> RenderedStatement:
+        """Lean statement compiled to the dialect's SQL string."""
+        return self._render((shape, prefilter), dialect, lambda: build_nearest_statement(LEAN, shape, prefilter))
+
+    def rendered_batch(self, dialect: Dialect) -> RenderedStatement:
+        return self._render(BATCH, dialect, build_batch_nearest_statement)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "statements": len(self._statements) + len(self._rendered),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._rendered.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_STATEMENTS = NearestStatementCache()
+
+
+def get_statement_cache() -> NearestStatementCache:
+    return _STATEMENTS
+
+
+def statement_cache_stats() -> dict:
+    return _STATEMENTS.stats()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import struct
+from typing import Callable, Optional
+
+import asyncpg
+
+from app.core.cache import LRUCache
+
+
+# Bulk loaders write places with COPY, outside the ORM, so they compute the
+# columns the Place write listeners would fill (street_norm, cell_key) here.
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_STREET_NORMS = LRUCache(65_536)
+
+# API workers LISTEN on this channel and drop cached search results (and
+# rebuild the in-memory index) when a notification arrives; loaders writing
+# places outside the API notify it.
+PLACES_CHANGED_CHANNEL = "places_changed"
+
+
+def asyncpg_dsn(url: str) -> str:
+    """DATABASE_URL (SQLAlchemy form) as a plain asyncpg DSN."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def ewkb_point(longitude: float, latitude: float) -> bytes:
+    # Little-endian EWKB point with SRID 4326: geography's binary COPY format.
+    return struct.pack("<BIIdd", 1, 0x20000001, 4326, longitude, latitude)
+
+
+def address_street_norm(address: Optional[str]) -> Optional[str]:
+    """normalize_street(address), memoized per street: addresses repeat streets a lot."""
+    if not address:
+        return None
+    street = address.split(",", 1)[0]
+    norm = _STREET_NORMS.get(street, _MISSING)
+    if norm is _MISSING:
+        # Imported lazily like the ORM listener: pulls in pymorphy3.
+        from app.services.context_parser import normalize_street
+
+        norm = normalize_street(street)
+        _STREET_NORMS.set(street, norm)
+    return norm
+
+
+async def copy_connection(dsn: str) -> asyncpg.Connection:
+    """asyncpg connection that accepts ewkb_point() bytes for geography columns."""
+    conn = await asyncpg.connect(dsn)
+    schema = await conn.fetchval(
+        "SELECT typnamespace::regnamespace::text FROM pg_type WHERE typname = 'geography'"
+    )
+    await conn.set_type_codec("geography", schema=schema, encoder=bytes, decoder=bytes, format="binary")
+    return conn
+
+
+async def notify_places_changed(conn: asyncpg.Connection, reason: str) -> None:
+    """Tell every API worker that places changed; delivered when the current transaction commits."""
+    await conn.execute("SELECT pg_notify($1, $2)", PLACES_CHANGED_CHANNEL, reason)
+
+
+async def listen_for_place_changes(dsn: str, on_change: Callable[[str], None], retry_s: float = 5.0) -> None:
+    """
+    Call on_change(reason) for every PLACES_CHANGED_CHANNEL notification,
+    until cancelled. Notifications sent while the listener is disconnected
+    are lost, so it also calls on_change after each reconnect.
+    """
+    connected_before = False
+    while True:
+        try:
+            conn = await asyncpg.connect(dsn)
+        except (OSError, asyncpg.PostgresError) as error:
+            logger.warning("Places change listener cannot connect: %r; retrying in %.0fs", error, retry_s)
+            await asyncio.sleep(retry_s)
+            continue
+        closed = asyncio.Event()
+        try:
+            conn.add_termination_listener(lambda _: closed.set())
+            await conn.add_listener(
+                PLACES_CHANGED_CHANNEL, lambda _conn, _pid, channel, payload: on_change(payload or channel)
+            )
+            if connected_before:
+                on_change("change listener reconnected")
+            connected_before = True
+            await closed.wait()
+            logger.warning("Places change listener lost its connection")
+        finally:
+            if not conn.is_closed():
+                await conn.close()
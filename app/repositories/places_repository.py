@@ -1,17 +1,88 @@
-from typing import Optional, List
+from typing import NamedTuple, Optional, List, Sequence, Tuple
 
-from sqlalchemy import select, func, cast
-from sqlalchemy.types import Numeric
+from sqlalchemy import Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from geoalchemy2 import Geometry
+from app.core.geocell import cells_covering
+from app.repositories.nearest_statements import (
+    CELLS,
+    FULL,
+    GIST,
+    LEAN,
+    PREFILTERS,
+    batch_nearest_params,
+    get_statement_cache,
+    nearest_params,
+    query_shape,
+)
 
-from app.models.place import Place
+
+class NearbyPlace(NamedTuple):
+    """Compact search row: only what SearchResult needs, no ORM state."""
+
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    distance_meters: float
+
+
+class NearbyQuery(NamedTuple):
+    """One point of a batch search with its optional filters."""
+
+    latitude: float
+    longitude: float
+    category: Optional[str] = None
+    brand: Optional[str] = None
+    street: Optional[str] = None
 
 
 class PlacesRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, prefilter: str = GIST):
+        if prefilter not in PREFILTERS:
+            raise ValueError(f"Unknown prefilter {prefilter!r}; expected one of {PREFILTERS}")
         self.session = session
+        # GIST: KNN on the geography index. CELLS: cell_key B-tree first
+        # (needs places.cell_key backfilled), exact geography math after.
+        self.prefilter = prefilter
+
+    def _prefilter_for(self, latitude: float, longitude: float, radius_m: float) -> Tuple[str, Optional[List[int]]]:
+        if self.prefilter == CELLS:
+            cells = cells_covering(latitude, longitude, radius_m)
+            # Too many cells for the circle: the GiST scan is the better plan.
+            if cells is not None:
+                return CELLS, cells
+        return GIST, None
+
+    def build_nearest_query(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> Select:
+        """The cached FULL statement with these values bound (for EXPLAIN and tests)."""
+        prefilter, cells = self._prefilter_for(latitude, longitude, radius_m)
+        stmt = get_statement_cache().statement(FULL, query_shape(category, brand, street), prefilter)
+        return stmt.params(nearest_params(latitude, longitude, radius_m, limit, category, brand, street, cells))
+
+    def build_nearest_lean_query(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> Select:
+        """Same search as build_nearest_query, projecting NearbyPlace columns only."""
+        prefilter, cells = self._prefilter_for(latitude, longitude, radius_m)
+        stmt = get_statement_cache().statement(LEAN, query_shape(category, brand, street), prefilter)
+        return stmt.params(nearest_params(latitude, longitude, radius_m, limit, category, brand, street, cells))
 
     async def find_nearest(
         self,
@@ -24,37 +95,13 @@ class PlacesRepository:
         street: Optional[str] = None,
     ) -> List[dict]:
 
-        point = func.ST_SetSRID(
-            func.ST_MakePoint(longitude, latitude),
-            4326,
-        )
-
-        # PostGIS distance in meters when using geography columns.
-        distance_expr = func.round(cast(func.ST_Distance(Place.geog, point), Numeric), 2)
-
-        stmt = (
-            select(
-                Place,
-                distance_expr.label("distance_meters"),
-                func.ST_Y(cast(Place.geog, Geometry("POINT", srid=4326))).label("latitude"),
-                func.ST_X(cast(Place.geog, Geometry("POINT", srid=4326))).label("longitude"),
-            )
-            .where(func.ST_DWithin(Place.geog, point, radius_m))
-            .order_by(distance_expr)
-            .limit(limit)
-        )
-
-        # Optional filters applied at SQL level for better performance.
-        if category:
-            stmt = stmt.where(Place.category == category)
-
-        if brand:
-            stmt = stmt.where(Place.brand == brand)
-
-        if street:
-            stmt = stmt.where(func.lower(Place.address).ilike(f"%{street.lower()}%"))
-
-        result = await self.session.execute(stmt)
+        # Same statement object per filter shape, so SQLAlchemy's compiled
+        # cache serves it; values travel as bind parameters.
+        prefilter, cells = self._prefilter_for(latitude, longitude, radius_m)
+        stmt = get_statement_cache().statement(FULL, query_shape(category, brand, street), prefilter)
+        params = nearest_params(latitude, longitude, radius_m, limit, category, brand, street, cells)
+
+        result = await self.session.execute(stmt, params)
         rows = result.all()
 
         return [
@@ -66,3 +113,51 @@ class PlacesRepository:
             }
             for row in rows
         ]
+
+    async def find_nearest_lean(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float = 500,
+        limit: int = 5,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        street: Optional[str] = None,
+    ) -> List[NearbyPlace]:
+        """
+        Column-only variant of find_nearest: executes on the session's
+        connection, so no ORM entities are hydrated or tracked.
+        """
+        connection = await self.session.connection()
+        # SQL rendered once per filter shape and sent as-is: no statement
+        # construction or compilation per call, and asyncpg reuses the
+        # connection's prepared statement for it.
+        prefilter, cells = self._prefilter_for(latitude, longitude, radius_m)
+        rendered = get_statement_cache().rendered(query_shape(category, brand, street), connection.dialect, prefilter)
+        params = nearest_params(latitude, longitude, radius_m, limit, category, brand, street, cells)
+
+        result = await connection.exec_driver_sql(rendered.sql, rendered.parameters(params))
+        return [NearbyPlace._make(row) for row in result.tuples()]
+
+    async def find_nearest_batch(
+        self,
+        queries: Sequence[NearbyQuery],
+        radius_m: float = 500,
+        limit: int = 5,
+    ) -> List[List[NearbyPlace]]:
+        """
+        find_nearest_lean for many points in one round trip. The result list
+        is aligned with queries; a point with no matches gets an empty list.
+        """
+        results: List[List[NearbyPlace]] = [[] for _ in queries]
+        if not queries:
+            return results
+
+        connection = await self.session.connection()
+        rendered = get_statement_cache().rendered_batch(connection.dialect)
+        params = batch_nearest_params(queries, radius_m, limit)
+
+        result = await connection.exec_driver_sql(rendered.sql, rendered.parameters(params))
+        for item, *columns in result.tuples():
+            results[item].append(NearbyPlace._make(columns))
+        return results
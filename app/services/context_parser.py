@@ -1,18 +1,43 @@
 import json
+import logging
+import os
 import re
+import threading
 from pathlib import Path
-from typing import Optional, List, Set
+from typing import TYPE_CHECKING, Optional, List, Set
 
-import pymorphy3
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
+from app.core.cache import LRUCache
+from app.core.env import env_float, env_int, load_env
+from app.services.lexicon import Lexicon, build_lexicon, load_artifact, save_artifact, sources_checksum
 
-_MORPH = pymorphy3.MorphAnalyzer()
+if TYPE_CHECKING:
+    import pymorphy3
+
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# Built on first use: constructing the analyzer is the bulk of import cost.
+_MORPH = None
+_MORPH_LOCK = threading.Lock()
+
+# Traffic reuses a small vocabulary, so memoize token -> lemma lookups.
+DEFAULT_LEMMA_CACHE_SIZE = 50_000
+_LEMMA_CACHE = LRUCache(env_int("LEMMA_CACHE_SIZE", DEFAULT_LEMMA_CACHE_SIZE))
+
+# Optional cache of finished ParsedContext results; disabled when size is 0.
+_PARSE_CACHE = LRUCache(env_int("PARSE_CACHE_SIZE", 0), ttl=env_float("PARSE_CACHE_TTL", 0))
+_parse_cache_generation = None
 
 # Data files allow updating categories/brands without code changes.
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 CATEGORIES_PATH = DATA_DIR / "categories.json"
 BRANDS_PATH = DATA_DIR / "brands.json"
+# Precompiled lemma tables, see scripts/build_lexicon.py.
+LEXICON_ARTIFACT_PATH = Path(os.getenv("LEXICON_ARTIFACT_PATH") or DATA_DIR / "lexicon.json")
 
 _STREET_PATTERNS = [
     r"на\s+улице\s+([А-Яа-яA-Za-z0-9\-\s]+)",
@@ -23,8 +48,30 @@ _STREET_PATTERNS = [
     r"в\s+районе\s+([А-Яа-яA-Za-z0-9\-\s]+)",
 ]
 
+# Last resort: "на <street>" at the very end once punctuation is ignored,
+# i.e. what r"на\s+(...)$" finds on the normalized text.
+_STREET_TAIL_PATTERN = r"на[\s,.;:?!]+([А-Яа-яA-Za-z0-9\-][А-Яа-яA-Za-z0-9\-\s,.;:?!]*)$"
+
+# All patterns in one zero-width alternation: a single finditer reports, at
+# every position, the highest-priority pattern matching there. Group N holds
+# the capture of pattern N - 1.
+_STREET_RE = re.compile(
+    "(?=" + "|".join(f"(?:{pat})" for pat in [*_STREET_PATTERNS, _STREET_TAIL_PATTERN]) + ")",
+    flags=re.IGNORECASE,
+)
+_TAIL_GROUP = len(_STREET_PATTERNS) + 1
+_STREET_SUFFIXES = {"улица", "ул", "проспект", "пр", "пер", "переулок", "район"}
+# Street-type lemmas dropped by normalize_street, so "на Троицком проспекте"
+# and "Троицкий проспект, 35" share one key.
+_STREET_TYPE_LEMMAS = _STREET_SUFFIXES | {
+    "пр-т", "набережная", "наб", "площадь", "пл", "шоссе", "бульвар", "б-р", "проезд", "тупик",
+}
+
 
 class ParsedContext(BaseModel):
+    # Frozen: cached instances are shared between requests.
+    model_config = ConfigDict(frozen=True)
+
     category: Optional[str] = None
     brand: Optional[str] = None
     street: Optional[str] = None
@@ -57,114 +104,267 @@ def _tokens(text: str) -> List[str]:
     return _TOKEN_RE.findall(text)
 
 
-def _lemmatize_token(token: str) -> str:
+def _get_morph() -> "pymorphy3.MorphAnalyzer":
+    global _MORPH
+    if _MORPH is None:
+        with _MORPH_LOCK:
+            if _MORPH is None:
+                # Deferred import: pymorphy3 and its dictionaries are most of the startup cost.
+                import pymorphy3
+
+                _MORPH = pymorphy3.MorphAnalyzer()
+    return _MORPH
+
+
+def _lemmatize_uncached(token: str) -> str:
     # return normal form (lemma) from pymorphy3
-    parsed = _MORPH.parse(token)
+    parsed = _get_morph().parse(token)
     if parsed:
         return parsed[0].normal_form
     return token
 
 
+def _lemmatize_token(token: str) -> str:
+    lemma = _LEMMA_CACHE.get(token)
+    if lemma is None:
+        lemma = _lemmatize_uncached(token)
+        _LEMMA_CACHE.set(token, lemma)
+    return lemma
+
+
 def _lemmatize_list(tokens: List[str]) -> List[str]:
     return [_lemmatize_token(t) for t in tokens]
 
 
-def _build_lemma_keyword_sets(categories_config: dict) -> dict:
-    """
-    Build dict: {category: set(lemma_keywords)}
-    Lemmatize keywords from config to allow matching across cases/cases.
-    """
-    out = {}
-    for cat, keywords in categories_config.items():
-        lemmas = set()
+def _dictionary_tokens() -> List[str]:
+    """Tokens of every category keyword and brand name from the data files."""
+    out = []
+    for keywords in _CATEGORIES_CONFIG.values():
         for kw in keywords:
-            kw_norm = _normalize_text(kw)
-            kw_tokens = _tokens(kw_norm)
-            kw_lemmas = _lemmatize_list(kw_tokens)
-            lemmas.update(kw_lemmas)
-        out[cat] = lemmas
+            out.extend(_tokens(_normalize_text(kw)))
+    for b in _BRANDS:
+        out.extend(_tokens(_normalize_text(b)))
     return out
 
 
-_CATEGORY_LEMMAS = _build_lemma_keyword_sets(_CATEGORIES_CONFIG)
+def configure_lemma_cache(maxsize: int) -> None:
+    """Resize the token -> lemma cache; shrinking evicts least recently used entries."""
+    _LEMMA_CACHE.resize(maxsize)
+
+
+def prefill_lemma_cache() -> int:
+    """
+    Warm the lemma cache with dictionary tokens and their lemmas so the first
+    requests do not pay for pymorphy3. Returns number of cached entries.
+    Counters are left untouched; prefill is not traffic.
+    """
+    for token in _dictionary_tokens():
+        if token in _LEMMA_CACHE:
+            continue
+        lemma = _lemmatize_uncached(token)
+        _LEMMA_CACHE.set(token, lemma)
+        # Lemmas show up verbatim in user text too ("аптека", "корм").
+        if lemma not in _LEMMA_CACHE:
+            _LEMMA_CACHE.set(lemma, _lemmatize_uncached(lemma))
+    return len(_LEMMA_CACHE)
+
+
+def lemma_cache_stats() -> dict:
+    """Snapshot of lemma cache size and hit/miss/eviction counters."""
+    return _LEMMA_CACHE.stats()
+
+
+def _lemmatize_phrase(text: str) -> List[str]:
+    return [_lemmatize_uncached(t) for t in _tokens(_normalize_text(text))]
+
+
+_LEXICON: Optional[Lexicon] = None
+_LEXICON_LOCK = threading.Lock()
+
 
-_BRAND_LEMMA_MAP = {}
-for b in _BRANDS:
-    # Store brand names by lemma sequence to match across cases/inflections.
-    b_norm = _normalize_text(b)
-    tokens = _tokens(b_norm)
+def _source_paths() -> List[Path]:
+    return [CATEGORIES_PATH, BRANDS_PATH]
+
+
+def _compile_lexicon(categories_config: Optional[dict] = None, brands: Optional[List[str]] = None) -> Lexicon:
+    """Derive lemma tables from the JSON sources with pymorphy3."""
+    return build_lexicon(
+        _CATEGORIES_CONFIG if categories_config is None else categories_config,
+        _BRANDS if brands is None else brands,
+        _lemmatize_phrase,
+        source_checksum=sources_checksum(_source_paths()),
+    )
+
+
+def _load_lexicon(categories_config: Optional[dict] = None, brands: Optional[List[str]] = None) -> Lexicon:
+    lexicon = load_artifact(LEXICON_ARTIFACT_PATH, sources_checksum(_source_paths()))
+    if lexicon is None:
+        logger.info("Lexicon artifact missing or stale at %s; deriving tables", LEXICON_ARTIFACT_PATH)
+        lexicon = _compile_lexicon(categories_config, brands)
+    return lexicon
+
+
+def _get_lexicon() -> Lexicon:
+    """
+    Load lemma tables on first use: from the precompiled artifact when it
+    matches the JSON sources, otherwise by lemmatizing the sources.
+    """
+    global _LEXICON
+    lexicon = _LEXICON
+    if lexicon is not None:
+        return lexicon
+    with _LEXICON_LOCK:
+        if _LEXICON is None:
+            _LEXICON = _load_lexicon()
+        return _LEXICON
+
+
+def reload_lexicon() -> Lexicon:
+    """
+    Re-read categories.json/brands.json, build complete new tables and only
+    then swap them in with a single assignment. Requests already running
+    keep the Lexicon they started with; nobody sees a half-built one.
+    """
+    global _CATEGORIES_CONFIG, _BRANDS, _LEXICON
+    # Serializes reloads with each other and with the first lazy load.
+    with _LEXICON_LOCK:
+        categories_config = _load_json(CATEGORIES_PATH) or {}
+        brands = _load_json(BRANDS_PATH) or []
+        lexicon = _load_lexicon(categories_config, brands)
+        _CATEGORIES_CONFIG, _BRANDS = categories_config, brands
+        _LEXICON = lexicon
+    logger.info(
+        "Reloaded lexicon generation %s: %d categories, %d brands",
+        lexicon.generation,
+        len(lexicon.category_lemmas),
+        len(lexicon.brand_lemma_map),
+    )
+    return lexicon
+
+
+def build_lexicon_artifact(path: Optional[Path] = None) -> Path:
+    """Compile the category/brand tables and write them as a versioned artifact."""
+    path = path or LEXICON_ARTIFACT_PATH
+    save_artifact(_compile_lexicon(), path)
+    return path
+
+
+def _lemmatize_street(street_raw: str) -> str:
+    tokens = _tokens(street_raw.lower())
     lemmas = _lemmatize_list(tokens)
-    key = " ".join(lemmas)
-    _BRAND_LEMMA_MAP[key] = b
-
-
-def _detect_street(original_text: str, normalized_text: str) -> Optional[str]:
-    for pat in _STREET_PATTERNS:
-        m = re.search(pat, original_text, flags=re.IGNORECASE)
-        if m:
-            street_raw = m.group(1).strip()
-            street_raw = re.sub(r"\s+(улица|ул|проспект|пр|пер|переулок|район)$", "", street_raw, flags=re.IGNORECASE)
-            street_norm = street_raw.lower()
-            tokens = _tokens(street_norm)
-            lemmas = _lemmatize_list(tokens)
-            # Return lemmatized street to align with how addresses are stored.
-            return " ".join(lemmas).strip()
-    m2 = re.search(r"на\s+([а-яa-z0-9\-\s]+)$", normalized_text)
-    if m2:
-        street_norm = m2.group(1).strip().lower()
-        tokens = _tokens(street_norm)
-        lemmas = _lemmatize_list(tokens)
-        return " ".join(lemmas).strip()
-    return None
-
-
-def _detect_category_from_lemmas(lemmas: Set[str]) -> Optional[str]:
-    # For each category take intersection size; choose best match by largest intersection
-    best_cat = None
-    best_score = 0
-    for cat, kw_lemmas in _CATEGORY_LEMMAS.items():
-        score = len(lemmas & kw_lemmas)
-        if score > best_score:
-            best_score = score
-            best_cat = cat
-    # require at least one matching lemma to claim category
-    if best_score > 0:
-        return best_cat
-    return None
-
-
-def _detect_brand_from_lemmas(lemmas: List[str]) -> Optional[str]:
+    # Return lemmatized street to align with how addresses are stored.
+    return " ".join(lemmas).strip()
+
+
+def normalize_street(text: Optional[str]) -> Optional[str]:
     """
-    Try to match brands by comparing sequences of lemmas.
-    We create sliding n-gram from lemmas and check presence in BRAND_LEMMA_MAP keys.
+    Canonical street key shared by parsed contexts and stored addresses:
+    lemmatized like _detect_street, minus street-type words and anything
+    after the first comma (house number). Used for places.street_norm.
     """
-    joined = " ".join(lemmas)
-    # direct exact match first
-    if joined in _BRAND_LEMMA_MAP:
-        return _BRAND_LEMMA_MAP[joined]
-    # sliding window up to length of brand tokens (max 4 words maybe)
-    lemma_list = lemmas
-    n = len(lemma_list)
-    brand_keys = list(_BRAND_LEMMA_MAP.keys())
-    max_brand_len = max((len(k.split()) for k in brand_keys), default=0)
-    for size in range(max_brand_len, 0, -1):
-        for i in range(0, n - size + 1):
-            seg = " ".join(lemma_list[i : i + size])
-            if seg in _BRAND_LEMMA_MAP:
-                return _BRAND_LEMMA_MAP[seg]
-    # heuristic fallback: proper noun detection via original tokens capitalization (optional)
-    return None
+    if not text:
+        return None
+    street_part = text.split(",", 1)[0]
+    lemmas = [
+        lemma
+        for lemma in _lemmatize_list(_tokens(street_part.lower()))
+        if lemma not in _STREET_TYPE_LEMMAS and not lemma.isdigit()
+    ]
+    return " ".join(lemmas) or None
+
+
+def _detect_street(original_text: str) -> Optional[str]:
+    """
+    Single pass over the text. Patterns keep their priority: the first one in
+    _STREET_PATTERNS matching anywhere wins, at its leftmost position.
+    """
+    best_group = None
+    best_capture = None
+    for m in _STREET_RE.finditer(original_text):
+        group = m.lastindex
+        if best_group is None or group < best_group:
+            best_group, best_capture = group, m.group(group)
+            if group == 1:
+                break
+    if best_group is None:
+        return None
+
+    street_raw = best_capture.strip()
+    if best_group != _TAIL_GROUP:
+        # Drop a trailing street-type word: "Троицкий проспект" -> "Троицкий".
+        parts = street_raw.rsplit(None, 1)
+        if len(parts) == 2 and parts[1].lower() in _STREET_SUFFIXES:
+            street_raw = parts[0]
+    return _lemmatize_street(street_raw)
+
+
+def _detect_category_from_lemmas(lemmas: Set[str], lexicon: Lexicon) -> Optional[str]:
+    # Largest keyword overlap wins; ties go to the category listed first.
+    # At least one matching lemma is required to claim a category.
+    return lexicon.category_index.best_match(lemmas)
+
+
+def _detect_brand_from_lemmas(lemmas: List[str], lexicon: Lexicon) -> Optional[str]:
+    """
+    Match brands by lemma sequence: the longest brand found anywhere in the
+    request wins, leftmost first on ties.
+    """
+    return lexicon.brand_matcher.find_longest(lemmas)
+
+
+def _parse_cache_key(text: str) -> str:
+    # Case and whitespace never change the result; punctuation can
+    # (it bounds the street capture), so unlike _normalize_text it is kept.
+    return " ".join(text.lower().split())
+
+
+def configure_parse_cache(maxsize: int, ttl: Optional[float] = None) -> None:
+    """Resize the ParsedContext cache (0 disables it) and set entry TTL in seconds."""
+    _PARSE_CACHE.resize(maxsize)
+    _PARSE_CACHE.ttl = ttl or None
+
+
+def clear_parse_cache() -> None:
+    _PARSE_CACHE.clear()
+
+
+def parse_cache_stats() -> dict:
+    """Size, hit rate and eviction/expiry counters of the ParsedContext cache."""
+    return _PARSE_CACHE.stats()
 
 
 def parse_context(text: str) -> ParsedContext:
     """
     Parse Russian natural-language search context into structured ParsedContext.
+    Repeated phrasings are served from the result cache when it is enabled.
 
     Requires pymorphy3 installed.
 
     Returns:
         ParsedContext(category, brand, street)
     """
+    global _parse_cache_generation
+    lexicon = _get_lexicon()
+    if _PARSE_CACHE.maxsize == 0:
+        return _parse_context(text, lexicon)
+
+    generation = lexicon.generation
+    if generation != _parse_cache_generation:
+        # Dictionaries changed: old entries can never be hit again, free them.
+        _PARSE_CACHE.invalidate()
+        _parse_cache_generation = generation
+
+    # Generation is part of the key so a parse racing a swap cannot store
+    # a result computed from the old tables under the new generation.
+    key = (generation, _parse_cache_key(text))
+    parsed = _PARSE_CACHE.get(key)
+    if parsed is None:
+        parsed = _parse_context(text, lexicon)
+        _PARSE_CACHE.set(key, parsed)
+    return parsed
+
+
+def _parse_context(text: str, lexicon: Lexicon) -> ParsedContext:
     if not text or not text.strip():
         return ParsedContext()
 
@@ -174,8 +374,13 @@ def parse_context(text: str) -> ParsedContext:
     lemmas = _lemmatize_list(toks)
     lemma_set = set(lemmas)
 
-    category = _detect_category_from_lemmas(lemma_set)
-    brand = _detect_brand_from_lemmas(lemmas)
-    street = _detect_street(original, normalized)
+    category = _detect_category_from_lemmas(lemma_set, lexicon)
+    brand = _detect_brand_from_lemmas(lemmas, lexicon)
+    street = _detect_street(original)
 
     return ParsedContext(category=category, brand=brand, street=street)
+
+
+def parse_contexts(texts: List[str]) -> List[ParsedContext]:
+    """Parse a batch of contexts; output order matches input order."""
+    return [parse_context(text) for text in texts]
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+from app.services import context_parser
+from app.services.lexicon import Lexicon
+from app.services.parse_executor import get_parse_executor
+
+
+logger = logging.getLogger(__name__)
+
+
+async def reload_dictionaries() -> Lexicon:
+    """
+    Rebuild lemma tables off the event loop and swap them in once complete.
+    Process-pool parse workers are replaced by a warmed-up pool afterwards.
+    """
+    lexicon = await asyncio.to_thread(context_parser.reload_lexicon)
+    await get_parse_executor().refresh()
+    return lexicon
+
+
+def _sources_signature() -> Tuple[Tuple[str, Optional[int], Optional[int]], ...]:
+    out = []
+    for path in context_parser._source_paths():
+        try:
+            stat = path.stat()
+            out.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            out.append((str(path), None, None))
+    return tuple(out)
+
+
+async def watch_dictionaries(interval: float) -> None:
+    """
+    Poll categories.json/brands.json and reload when either changes.
+    Polling keeps this dependency-free; the files are tiny to stat.
+    """
+    signature = _sources_signature()
+    while True:
+        await asyncio.sleep(interval)
+        current = _sources_signature()
+        if current == signature:
+            continue
+        signature = current
+        try:
+            await reload_dictionaries()
+        except Exception:
+            # Keep serving with the current tables; a later edit can fix the file.
+            logger.exception("Dictionary reload failed; keeping current lexicon")
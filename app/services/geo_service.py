@@ -1,16 +1,61 @@
 from typing import Optional, List
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.models.schemas import SearchRequest, SearchResponse, SearchResult
-from app.repositories.places_repository import PlacesRepository
-from app.services.context_parser import parse_context
+from app.core.env import env_bool, env_int, load_env
+from app.core.timing import PARSE, timed
+from app.models.schemas import (
+    BatchSearchItemResult,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    SearchRequest,
+    SearchResponse,
+    SearchResult,
+    coordinates_in_range,
+)
+from app.repositories.backends import get_places_repository
+from app.repositories.places_repository import NearbyPlace, NearbyQuery
+from app.services.context_parser import normalize_street, parse_context
+from app.services.parse_executor import get_parse_executor
+from app.services.response_cache import CellCandidates, ResponseCache, get_response_cache
+from app.services.single_flight import SingleFlight
+
+
+load_env()
+
+# Opt-in: identical concurrent searches share one query. Locations are
+# compared after rounding to this many decimal places (4 ~ 11 m); followers
+# receive the leader's rows, so their distances and radius cut-off are the
+# leader's, off by up to that much. The response cache is the exact option.
+SEARCH_COALESCE = env_bool("SEARCH_COALESCE", False)
+SEARCH_COALESCE_PRECISION = env_int("SEARCH_COALESCE_PRECISION", 4)
+
+_SEARCH_FLIGHTS = SingleFlight()
+# Response cache fills, counted apart from coalesced searches.
+_CELL_FILLS = SingleFlight()
+
+# Radius and result count of /search (find_nearest_rows defaults).
+SEARCH_RADIUS_M = 500
+SEARCH_LIMIT = 5
+
+
+def search_coalescing_stats() -> dict:
+    return _SEARCH_FLIGHTS.stats()
+
+
+def cell_fill_coalescing_stats() -> dict:
+    return _CELL_FILLS.stats()
 
 
 class GeoService:
-    def __init__(self, session: AsyncSession):
-        # Repository encapsulates all DB-specific geo queries.
-        self.repository = PlacesRepository(session)
+    def __init__(self, session: AsyncSession, fill_sessionmaker: Optional[async_sessionmaker] = None):
+        # Repository encapsulates all geo queries; PLACES_BACKEND picks
+        # PostGIS or the in-memory index.
+        self.repository = get_places_repository(session)
+        # Response cache fills go to the primary when `session` may be on a
+        # lagging replica (see app.core.db.fill_sessionmaker).
+        self.fill_sessionmaker = fill_sessionmaker
 
     async def find_nearest_places(
             self,
@@ -31,43 +76,183 @@ class GeoService:
             limit=limit,
             category=category,
             brand=brand,
-            street=street,
+            # Same normalization as places.street_norm so the filter compares like with like.
+            street=normalize_street(street),
         )
 
         return rows
 
+    async def find_nearest_rows(
+            self,
+            latitude: float,
+            longitude: float,
+            radius_m: float = 500,
+            limit: int = 5,
+            category: Optional[str] = None,
+            brand: Optional[str] = None,
+            street: Optional[str] = None,
+    ) -> List[NearbyPlace]:
+
+        # Lean variant for the search path: plain column tuples, no ORM entities.
+        return await self.repository.find_nearest_lean(
+            latitude=latitude,
+            longitude=longitude,
+            radius_m=radius_m,
+            limit=limit,
+            category=category,
+            brand=brand,
+            street=normalize_street(street),
+        )
+
     async def search(self, request: SearchRequest) -> SearchResponse:
 
-        # Parse free-form context into structured filters.
-        parsed = parse_context(request.context)
+        # Parse free-form context into structured filters; CPU-bound, so it
+        # runs wherever the configured executor puts it (inline by default).
+        with timed(PARSE):
+            parsed = await get_parse_executor().run(parse_context, request.context)
 
         try:
             latitude, longitude = request.parse_location()
         except Exception:
             # Defensive: invalid coordinates should not trigger a 500.
             return SearchResponse(results=[])
+        if not coordinates_in_range(latitude, longitude):
+            return SearchResponse(results=[])
 
         category = parsed.category
         brand = parsed.brand
         street = parsed.street
 
+        cache = get_response_cache()
+        if cache is not None:
+            places = await self._cached_rows(cache, latitude, longitude, category, brand, street)
+            if places is not None:
+                return SearchResponse(results=self._to_results(places))
 
-        places = await self.find_nearest_places(
-            latitude=latitude,
-            longitude=longitude,
-            category=category,
-            brand=brand,
-            street=street,
-        )
+        async def query() -> List[NearbyPlace]:
+            return await self.find_nearest_rows(
+                latitude=latitude,
+                longitude=longitude,
+                category=category,
+                brand=brand,
+                street=street,
+            )
+
+        if SEARCH_COALESCE:
+            key = (
+                round(latitude, SEARCH_COALESCE_PRECISION),
+                round(longitude, SEARCH_COALESCE_PRECISION),
+                category,
+                brand,
+                normalize_street(street),
+            )
+            places = await _SEARCH_FLIGHTS.run(key, query)
+        else:
+            places = await query()
+
+        return SearchResponse(results=self._to_results(places))
+
+    async def _cached_rows(
+            self,
+            cache: ResponseCache,
+            latitude: float,
+            longitude: float,
+            category: Optional[str],
+            brand: Optional[str],
+            street: Optional[str],
+    ) -> Optional[List[NearbyPlace]]:
+        """
+        Rank the cached candidates of the request's grid cell for the exact
+        point, filling the cell on a miss. None means the cell is too dense
+        to cache and the caller should query directly.
+        """
+        street = normalize_street(street)
+        cell = cache.cell(latitude, longitude)
+        key = cache.key(cell, category, brand, street, SEARCH_RADIUS_M, SEARCH_LIMIT)
+
+        candidates = cache.get(key)
+        if candidates is None:
+            if cache.is_dense(key):
+                return None
+
+            async def fill() -> Optional[CellCandidates]:
+                # Distances here are from the cell centre; build() widens the
+                # set so it covers every point of the cell.
+                fill_query = dict(
+                    latitude=cell.center_lat,
+                    longitude=cell.center_lon,
+                    radius_m=cache.fill_radius(cell, SEARCH_RADIUS_M),
+                    limit=cache.candidates,
+                    category=category,
+                    brand=brand,
+                    street=street,
+                )
+                if self.fill_sessionmaker is None:
+                    rows = await self.repository.find_nearest_lean(**fill_query)
+                else:
+                    async with self.fill_sessionmaker() as session:
+                        rows = await get_places_repository(session).find_nearest_lean(**fill_query)
+                built = cache.build(key, cell, rows, SEARCH_RADIUS_M, SEARCH_LIMIT)
+                if built is not None:
+                    cache.set(key, built)
+                return built
+
+            # Requests for the same cell arriving during the fill share it.
+            candidates = await _CELL_FILLS.run(key, fill)
+            if candidates is None:
+                return None
 
-        results = [
+        return candidates.nearest(latitude, longitude, SEARCH_RADIUS_M, SEARCH_LIMIT)
+
+    async def search_batch(self, request: BatchSearchRequest) -> BatchSearchResponse:
+        """
+        Many (location, context) pairs: contexts are parsed in one executor
+        dispatch and all points are resolved by a single SQL statement.
+        Items keep their request order; a bad location fails only its item.
+        """
+        items = [BatchSearchItemResult() for _ in request.items]
+
+        valid = []
+        for position, item in enumerate(request.items):
+            try:
+                # Same validation as the single-item endpoint.
+                location = SearchRequest(location=item.location, context=item.context).parse_location()
+            except (ValidationError, ValueError):
+                items[position].error = "Location must be 'lat:lon'"
+                continue
+            # Checked here: one out-of-range point would fail the whole batch statement.
+            if not coordinates_in_range(*location):
+                items[position].error = "Location is out of range"
+                continue
+            valid.append((position, location, item.context))
+
+        if valid:
+            with timed(PARSE):
+                parsed = await get_parse_executor().parse_many([context for _, _, context in valid])
+            queries = [
+                NearbyQuery(
+                    latitude=latitude,
+                    longitude=longitude,
+                    category=context.category,
+                    brand=context.brand,
+                    street=normalize_street(context.street),
+                )
+                for (_, (latitude, longitude), _), context in zip(valid, parsed)
+            ]
+            rows = await self.repository.find_nearest_batch(queries)
+            for (position, _, _), places in zip(valid, rows):
+                items[position].results = self._to_results(places)
+
+        return BatchSearchResponse(items=items)
+
+    @staticmethod
+    def _to_results(places: List[NearbyPlace]) -> List[SearchResult]:
+        return [
             SearchResult(
-                name=place_dict["place"].name,
-                latitude=place_dict["latitude"],
-                longitude=place_dict["longitude"],
-                distance_meters=place_dict["distance_meters"],
+                name=place.name,
+                latitude=place.latitude,
+                longitude=place.longitude,
+                distance_meters=place.distance_meters,
             )
-            for place_dict in places
+            for place in places
         ]
-
-        return SearchResponse(results=results)
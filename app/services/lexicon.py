@@ -0,0 +1,113 @@
+import hashlib
+import itertools
+import json
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.services.matchers import BrandMatcher, CategoryIndex
+
+
+# Bump when the artifact layout or the lemmatization rules change.
+ARTIFACT_FORMAT_VERSION = 1
+
+_GENERATIONS = itertools.count(1)
+
+
+class Lexicon:
+    """
+    Compiled category/brand lemma tables plus the matchers built on them.
+    Instances are never mutated after construction, so one can be swapped
+    in for another with a single assignment.
+    """
+
+    def __init__(
+        self,
+        category_lemmas: Dict[str, Set[str]],
+        brand_lemma_map: Dict[str, str],
+        source_checksum: Optional[str] = None,
+    ):
+        self.category_lemmas = category_lemmas
+        self.brand_lemma_map = brand_lemma_map
+        self.source_checksum = source_checksum
+        self.category_index = CategoryIndex(category_lemmas)
+        self.brand_matcher = BrandMatcher.from_lemma_map(brand_lemma_map)
+        # Unique per instance; result caches use it to detect table changes.
+        self.generation = next(_GENERATIONS)
+
+
+def build_lexicon(
+    categories_config: dict,
+    brands: List[str],
+    lemmatize: Callable[[str], List[str]],
+    source_checksum: Optional[str] = None,
+) -> Lexicon:
+    """
+    Lemmatize keywords and brand names from config so matching works
+    across cases/inflections. `lemmatize` maps a raw phrase to its lemmas.
+    """
+    category_lemmas = {}
+    for cat, keywords in categories_config.items():
+        lemmas = set()
+        for kw in keywords:
+            lemmas.update(lemmatize(kw))
+        category_lemmas[cat] = lemmas
+
+    brand_lemma_map = {}
+    for b in brands:
+        # Store brand names by lemma sequence to match across cases/inflections.
+        brand_lemma_map[" ".join(lemmatize(b))] = b
+
+    return Lexicon(category_lemmas, brand_lemma_map, source_checksum)
+
+
+def _dictionary_version() -> str:
+    # Lemmas depend on the pymorphy3 dictionary, not only on our JSON files.
+    try:
+        return metadata.version("pymorphy3-dicts-ru")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def sources_checksum(paths: Iterable[Path]) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"format={ARTIFACT_FORMAT_VERSION};dict={_dictionary_version()}".encode())
+    for path in paths:
+        digest.update(b"\0" + path.name.encode() + b"\0")
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def save_artifact(lexicon: Lexicon, path: Path) -> None:
+    payload = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "source_checksum": lexicon.source_checksum,
+        "categories": {cat: sorted(lemmas) for cat, lemmas in lexicon.category_lemmas.items()},
+        "brands": lexicon.brand_lemma_map,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    # Rename is atomic, so a reader never sees a half-written artifact.
+    tmp_path.replace(path)
+
+
+def load_artifact(path: Path, expected_checksum: str) -> Optional[Lexicon]:
+    """
+    Return the compiled lexicon, or None when the artifact is missing,
+    unreadable or was built from different sources.
+    """
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if payload.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        return None
+    if payload.get("source_checksum") != expected_checksum:
+        return None
+    return Lexicon(
+        category_lemmas={cat: set(lemmas) for cat, lemmas in payload["categories"].items()},
+        brand_lemma_map=payload["brands"],
+        source_checksum=expected_checksum,
+    )
@@ -0,0 +1,125 @@
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+class _Node:
+    """Trie node with its Aho-Corasick failure link."""
+
+    __slots__ = ("children", "fail", "brand", "depth", "longest")
+
+    def __init__(self, depth: int):
+        self.children: Dict[str, "_Node"] = {}
+        self.fail: Optional["_Node"] = None
+        # Brand whose lemmas end exactly here.
+        self.brand: Optional[str] = None
+        self.depth = depth
+        # (length, brand) of the longest brand ending here, this node's own
+        # or one reached through failure links; (0, None) when there is none.
+        self.longest: Tuple[int, Optional[str]] = (0, None)
+
+
+class BrandMatcher:
+    """
+    Aho-Corasick automaton over brand lemma sequences, compiled once at load
+    time. Lookup is one left-to-right pass over the request lemmas, so its
+    cost depends on the request length, not on how many brands are loaded
+    or how long they are.
+    """
+
+    def __init__(self):
+        self._root = _Node(0)
+        self._compiled = True
+        self.max_len = 0
+
+    @classmethod
+    def from_lemma_map(cls, lemma_map: Dict[str, str]) -> "BrandMatcher":
+        matcher = cls()
+        for key, brand in lemma_map.items():
+            matcher.add(key.split(), brand)
+        matcher._compile()
+        return matcher
+
+    def add(self, lemmas: Sequence[str], brand: str) -> None:
+        if not lemmas:
+            return
+        node = self._root
+        for lemma in lemmas:
+            child = node.children.get(lemma)
+            if child is None:
+                child = node.children[lemma] = _Node(node.depth + 1)
+            node = child
+        node.brand = brand
+        self.max_len = max(self.max_len, len(lemmas))
+        self._compiled = False
+
+    def _compile(self) -> None:
+        # Breadth-first, so a node's failure target (always shallower) is
+        # complete before the node itself.
+        root = self._root
+        root.fail = root
+        queue = deque()
+        for child in root.children.values():
+            child.fail = root
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            own = (node.depth, node.brand) if node.brand is not None else (0, None)
+            node.longest = own if own[0] else node.fail.longest
+            for lemma, child in node.children.items():
+                fail = node.fail
+                while fail is not root and lemma not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children.get(lemma, root)
+                queue.append(child)
+        self._compiled = True
+
+    def find_longest(self, lemmas: List[str]) -> Optional[str]:
+        """
+        Return the longest brand occurring in lemmas; ties go to the leftmost
+        occurrence, matching the old sliding-window order.
+        """
+        if not self._compiled:
+            self._compile()
+        root = self._root
+        node = root
+        best_len = 0
+        best_brand = None
+        for lemma in lemmas:
+            while node is not root and lemma not in node.children:
+                node = node.fail
+            node = node.children.get(lemma, root)
+            # Matches are seen by end position; for equal lengths the
+            # earlier end is also the earlier start, so only strictly
+            # longer ones replace the best.
+            length, brand = node.longest
+            if length > best_len:
+                best_len, best_brand = length, brand
+        return best_brand
+
+
+class CategoryIndex:
+    """
+    Inverted index lemma -> categories containing it. Only categories touched
+    by the request lemmas are scored, so cost does not grow with taxonomy size.
+    """
+
+    def __init__(self, category_lemmas: Dict[str, Set[str]]):
+        # Insertion order of categories breaks score ties, as the linear scan did.
+        self._order = {cat: i for i, cat in enumerate(category_lemmas)}
+        self._postings: Dict[str, List[str]] = {}
+        for cat, lemmas in category_lemmas.items():
+            for lemma in lemmas:
+                self._postings.setdefault(lemma, []).append(cat)
+
+    def best_match(self, lemmas: Set[str]) -> Optional[str]:
+        scores: Dict[str, int] = {}
+        for lemma in lemmas:
+            for cat in self._postings.get(lemma, ()):
+                scores[cat] = scores.get(cat, 0) + 1
+        best_cat = None
+        best_key = None
+        for cat, score in scores.items():
+            key = (-score, self._order[cat])
+            if best_key is None or key < best_key:
+                best_cat, best_key = cat, key
+        return best_cat
@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional
+
+from app.core.db import engine_pool_stats, replica_stats
+from app.core.metrics import prometheus_histogram, prometheus_samples
+from app.core.timing import stage_histograms
+from app.repositories.nearest_statements import statement_cache_stats
+from app.services.geo_service import cell_fill_coalescing_stats, search_coalescing_stats
+from app.services.response_cache import response_cache_stats
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics(pools: Optional[Dict[str, dict]] = None) -> str:
+    """
+    This worker's metrics in the Prometheus text format: request stage
+    histograms plus the pool, statement cache, coalescing, response cache
+    and replica counters already reported by the stats helpers. Pool
+    series are labelled by engine: "primary" or the replica's name.
+    """
+    lines: List[str] = []
+    lines += prometheus_histogram(
+        "geo_request_stage_seconds",
+        "Time per request stage (parse, pool, db, serialize, total).",
+        [(labels, histogram.snapshot()) for labels, histogram in stage_histograms()],
+    )
+
+    if pools is None:
+        pools = engine_pool_stats()
+    lines += prometheus_histogram(
+        "geo_db_pool_wait_seconds",
+        "Connection pool checkout wait.",
+        [({"engine": name}, pool["wait_seconds"]) for name, pool in pools.items()],
+    )
+    lines += prometheus_samples(
+        "geo_db_pool_connections",
+        "gauge",
+        "Pool connections by state.",
+        [
+            ({"engine": name, "state": state}, pool[state])
+            for name, pool in pools.items()
+            for state in ("checked_out", "checked_in", "overflow")
+        ],
+    )
+    lines += prometheus_samples(
+        "geo_db_pool_size", "gauge", "Pool size.", [({"engine": name}, pool["pool_size"]) for name, pool in pools.items()]
+    )
+    lines += prometheus_samples(
+        "geo_db_pool_timeouts_total",
+        "counter",
+        "Pool checkouts that timed out.",
+        [({"engine": name}, pool["timeouts"]) for name, pool in pools.items()],
+    )
+
+    statements = statement_cache_stats()
+    lines += prometheus_samples(
+        "geo_statement_cache_lookups_total",
+        "counter",
+        "Nearest-places statement cache lookups.",
+        [({"result": "hit"}, statements["hits"]), ({"result": "miss"}, statements["misses"])],
+    )
+
+    coalescing = search_coalescing_stats()
+    lines += prometheus_samples(
+        "geo_search_queries_total",
+        "counter",
+        "Searches that ran their own query or joined one in flight.",
+        [({"mode": "executed"}, coalescing["executed"]), ({"mode": "coalesced"}, coalescing["coalesced"])],
+    )
+    lines += prometheus_samples(
+        "geo_search_in_flight", "gauge", "Distinct searches in flight.", [({}, coalescing["in_flight"])]
+    )
+
+    cache = response_cache_stats()
+    if cache["enabled"]:
+        lines += prometheus_samples(
+            "geo_response_cache_lookups_total",
+            "counter",
+            "Search response cache lookups.",
+            [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])],
+        )
+        lines += prometheus_samples(
+            "geo_response_cache_fills_total", "counter", "Cell entries built from the database.", [({}, cache["fills"])]
+        )
+        fills = cell_fill_coalescing_stats()
+        lines += prometheus_samples(
+            "geo_response_cache_fill_requests_total",
+            "counter",
+            "Cache misses that ran a cell fill or joined one in flight.",
+            [({"mode": "executed"}, fills["executed"]), ({"mode": "coalesced"}, fills["coalesced"])],
+        )
+
+    replicas = replica_stats()
+    if replicas is not None:
+        lines += prometheus_samples(
+            "geo_reads_total",
+            "counter",
+            "Read sessions by target.",
+            [({"target": "replica"}, replicas["reads_on_replicas"]), ({"target": "primary"}, replicas["reads_on_primary"])],
+        )
+        members = replicas["replicas"]
+        lines += prometheus_samples(
+            "geo_replica_healthy",
+            "gauge",
+            "1 while the replica is in rotation.",
+            [({"replica": member["name"]}, member["healthy"]) for member in members],
+        )
+        lines += prometheus_samples(
+            "geo_replica_lag_seconds",
+            "gauge",
+            "Replay lag at the last check.",
+            [({"replica": member["name"]}, member["lag_seconds"]) for member in members if member["lag_seconds"] is not None],
+        )
+        lines += prometheus_samples(
+            "geo_replica_ejections_total",
+            "counter",
+            "Times the replica was taken out of rotation.",
+            [({"replica": member["name"]}, member["ejections"]) for member in members],
+        )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,140 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional, Set
+
+from app.core.env import env_int, load_env
+from app.services.context_parser import ParsedContext, parse_contexts
+
+
+load_env()
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+STRATEGIES = (INLINE, THREAD, PROCESS)
+
+
+def _warm_worker() -> None:
+    # Runs once per worker process: pay analyzer and lexicon load up front.
+    from app.services import context_parser
+
+    context_parser._get_lexicon()
+    context_parser._get_morph()
+
+
+def _worker_pid() -> int:
+    # Only runs once the initializer has returned, so a reply means this
+    # worker is warm. The pause stops one fast worker from answering a whole
+    # round while the others are still loading.
+    time.sleep(0.01)
+    return os.getpid()
+
+
+class ParseExecutor:
+    """
+    Where CPU-bound context parsing runs: inline on the event loop, in a
+    bounded thread pool, or in a process pool of pre-warmed workers.
+    """
+
+    def __init__(self, strategy: str = INLINE, workers: Optional[int] = None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown parse executor strategy {strategy!r}; expected one of {STRATEGIES}")
+        self.strategy = strategy
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[Executor] = None
+
+    def _new_pool(self) -> Executor:
+        if self.strategy == THREAD:
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        # Spawn, not fork: forking a process that runs an event loop is unsafe.
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            self._pool = self._new_pool()
+        return self._pool
+
+    async def _warm(self, pool: Executor) -> Set[int]:
+        """Block until every worker is warm; returns the process workers' pids."""
+        loop = asyncio.get_running_loop()
+        if self.strategy != PROCESS:
+            await loop.run_in_executor(pool, _warm_worker)
+            return set()
+        # The first round spawns all workers. A reply can come from any warm
+        # one, so keep asking until each has answered at least once.
+        pids: Set[int] = set()
+        while len(pids) < self.workers:
+            pids.update(await asyncio.gather(*(loop.run_in_executor(pool, _worker_pid) for _ in range(self.workers))))
+        return pids
+
+    async def start(self) -> None:
+        """Create the pool and make sure every worker has finished warming up."""
+        if self.strategy == INLINE:
+            return
+        await self._warm(self._get_pool())
+
+    async def refresh(self) -> None:
+        """
+        Replace process workers after a dictionary reload: they hold their own
+        copy of the lexicon. The new pool is warm before it takes traffic and
+        the old one finishes its queued work in the background.
+        """
+        if self.strategy != PROCESS or self._pool is None:
+            return
+        new_pool = self._new_pool()
+        await self._warm(new_pool)
+        old_pool, self._pool = self._pool, new_pool
+        old_pool.shutdown(wait=False)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.strategy == INLINE:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), partial(fn, *args))
+
+    async def parse_many(self, texts: List[str]) -> List[ParsedContext]:
+        # One dispatch for the whole batch amortizes queue/pickling overhead.
+        return await self.run(parse_contexts, list(texts))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_EXECUTOR: Optional[ParseExecutor] = None
+
+
+def get_parse_executor() -> ParseExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ParseExecutor(
+            strategy=os.getenv("PARSE_EXECUTOR", INLINE).strip().lower() or INLINE,
+            workers=env_int("PARSE_WORKERS", 0) or None,
+        )
+    return _EXECUTOR
+
+
+def configure_parse_executor(strategy: str, workers: Optional[int] = None) -> ParseExecutor:
+    """Replace the process-wide executor, shutting down the previous pool."""
+    global _EXECUTOR
+    new_executor = ParseExecutor(strategy, workers)
+    old, _EXECUTOR = _EXECUTOR, new_executor
+    if old is not None:
+        old.shutdown()
+    return new_executor
+
+
+def shutdown_parse_executor() -> None:
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+        _EXECUTOR = None
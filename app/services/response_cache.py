@@ -0,0 +1,411 @@
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.env import env_float, env_int, load_env
+from app.models.place import Place
+from app.repositories.memory_places_repository import ellipsoid_distance_m
+from app.repositories.places_copy import PLACES_CHANGED_CHANNEL
+from app.repositories.places_repository import NearbyPlace
+
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+LOCAL = "local"
+SHARED = "shared"
+STORES = (LOCAL, SHARED)
+
+# Metres per degree of latitude; only used to size grid cells.
+_M_PER_DEG = 111_320.0
+
+
+class CellCandidates:
+    """
+    Every place that can appear in a search answer for any point of one grid
+    cell. Answers for a concrete point are ranked from this set with exact
+    distances, so two requests in the same cell get their own correct order.
+    """
+
+    __slots__ = ("ids", "names", "lats", "lons")
+
+    def __init__(self, ids: Sequence[int], names: Sequence[str], lats: Sequence[float], lons: Sequence[float]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = list(names)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[NearbyPlace]) -> "CellCandidates":
+        return cls([r.id for r in rows], [r.name for r in rows], [r.latitude for r in rows], [r.longitude for r in rows])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def nearest(self, latitude: float, longitude: float, radius_m: float, limit: int) -> List[NearbyPlace]:
+        if not self.names:
+            return []
+        dist = ellipsoid_distance_m(latitude, longitude, self.lats, self.lons)
+        idx = np.flatnonzero(dist <= radius_m)
+        # Same ordering key as the SQL query: distance rounded to centimetres, then id.
+        rounded = np.round(dist[idx], 2)
+        order = idx[np.lexsort((self.ids[idx], rounded))[:limit]]
+        return [
+            NearbyPlace(int(self.ids[i]), self.names[i], float(self.lats[i]), float(self.lons[i]), float(round(dist[i], 2)))
+            for i in order.tolist()
+        ]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            [self.ids.tolist(), self.names, self.lats.tolist(), self.lons.tolist()],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "CellCandidates":
+        ids, names, lats, lons = json.loads(payload)
+        return cls(ids, names, lats, lons)
+
+
+class GridCell:
+    """Square-ish cell of roughly `size_m` metres; lon width follows the row latitude."""
+
+    __slots__ = ("row", "col", "center_lat", "center_lon", "half_diagonal_m")
+
+    def __init__(self, latitude: float, longitude: float, size_m: float):
+        lat_step = size_m / _M_PER_DEG
+        self.row = math.floor(latitude / lat_step)
+        self.center_lat = (self.row + 0.5) * lat_step
+        lon_step = size_m / (_M_PER_DEG * max(0.01, math.cos(math.radians(self.center_lat))))
+        self.col = math.floor(longitude / lon_step)
+        self.center_lon = (self.col + 0.5) * lon_step
+        # Exact half-diagonal is size * 0.707; the margin covers the
+        # spherical approximation used for the steps above.
+        self.half_diagonal_m = size_m * 0.75
+
+    @property
+    def key(self) -> str:
+        return f"{self.row}:{self.col}"
+
+
+class CacheStore(Protocol):
+    """Storage behind the response cache; keys are strings scoped by namespace()."""
+
+    def get(self, key: str) -> Optional[CellCandidates]: ...
+
+    def set(self, key: str, value: CellCandidates) -> None: ...
+
+    def namespace(self) -> str: ...
+
+    def invalidate(self) -> None: ...
+
+    def stats(self) -> dict: ...
+
+
+class LocalCacheStore:
+    """Per-process LRU/TTL storage."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self._cache = LRUCache(maxsize, ttl=ttl)
+        self._version = 0
+
+    def get(self, key: str) -> Optional[CellCandidates]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: CellCandidates) -> None:
+        self._cache.set(key, value)
+
+    def namespace(self) -> str:
+        return str(self._version)
+
+    def invalidate(self) -> None:
+        # New namespace first, so a fill racing the clear lands in the old one.
+        self._version += 1
+        self._cache.invalidate()
+
+    def stats(self) -> dict:
+        return {"store": LOCAL, "version": self._version, **self._cache.stats()}
+
+
+class InMemorySharedClient:
+    """
+    Stand-in for a shared key-value store (the get/set/incr subset of a Redis
+    client), so the serialized code path runs in development and tests.
+    Like Redis under `volatile-lru`, values stored with `set` are evicted
+    least recently used past `maxsize`, and expired ones are purged as new
+    values arrive; counters from `incr` are never evicted.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, clock=time.monotonic):
+        self.maxsize = maxsize
+        # name -> (value, expires_at or None), least recently used first.
+        self._data: "OrderedDict[str, Tuple[object, Optional[float]]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def get(self, name: str):
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name]
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[name]
+                return None
+            self._data.move_to_end(name)
+            return value
+
+    def set(self, name: str, value, ex: Optional[float] = None) -> None:
+        now = self._clock()
+        with self._lock:
+            self._counters.pop(name, None)
+            self._data[name] = (value, now + ex if ex else None)
+            self._data.move_to_end(name)
+            # Keys of an invalidated version are never read again, so they
+            # sink to the front and leave by expiry or by the size cap.
+            while self._data:
+                expires_at = next(iter(self._data.values()))[1]
+                if expires_at is None or expires_at > now:
+                    break
+                self._data.popitem(last=False)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            value = int(self._counters.get(name, 0)) + 1
+            self._counters[name] = value
+            return value
+
+    def __len__(self) -> int:
+        return len(self._data) + len(self._counters)
+
+
+class SharedCacheStore:
+    """
+    Storage in a key-value store shared by all workers. Entries are JSON and
+    expire by TTL; invalidation bumps a version key instead of deleting, so
+    every worker moves to fresh keys on its next lookup.
+    """
+
+    def __init__(self, client, ttl: Optional[float] = None, prefix: str = "search-cells"):
+        self.client = client
+        self.ttl = ttl or None
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CellCandidates]:
+        payload = self.client.get(f"{self.prefix}:{key}")
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CellCandidates.from_json(payload)
+
+    def set(self, key: str, value: CellCandidates) -> None:
+        self.client.set(f"{self.prefix}:{key}", value.to_json(), ex=self.ttl)
+
+    def namespace(self) -> str:
+        return str(self.client.get(f"{self.prefix}:version") or 0)
+
+    def invalidate(self) -> None:
+        self.client.incr(f"{self.prefix}:version")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "store": SHARED,
+            "version": self.namespace(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """
+    Search candidates keyed by grid cell plus parsed filters. A cell entry is
+    built from one query around the cell centre, wide enough that the top
+    `limit` places of any point in the cell are inside it.
+    """
+
+    def __init__(self, store: CacheStore, cell_size_m: float = 100.0, candidates: int = 50):
+        self.store = store
+        self.cell_size_m = cell_size_m
+        # Rows fetched per cell; denser cells are not cached (see fill radius).
+        self.candidates = candidates
+        self.fills = 0
+        self.uncacheable = 0
+        # Keys of cells too dense to cache, remembered so they are not re-tried per request.
+        self._dense = LRUCache(1024, ttl=60.0)
+
+    def cell(self, latitude: float, longitude: float) -> GridCell:
+        return GridCell(latitude, longitude, self.cell_size_m)
+
+    def key(
+        self,
+        cell: GridCell,
+        category: Optional[str],
+        brand: Optional[str],
+        street: Optional[str],
+        radius_m: float,
+        limit: int,
+    ) -> str:
+        filters = json.dumps([category, brand, street], ensure_ascii=False)
+        return f"{self.store.namespace()}|{self.cell_size_m:g}|{cell.key}|{radius_m:g}|{limit}|{filters}"
+
+    def fill_radius(self, cell: GridCell, radius_m: float) -> float:
+        # A place within radius_m of any point in the cell is within
+        # radius_m + half-diagonal of its centre.
+        return radius_m + cell.half_diagonal_m
+
+    def is_dense(self, key: str) -> bool:
+        """True when this key recently failed to build; skip straight to a direct query."""
+        return self._dense.get(key) is not None
+
+    def build(
+        self, key: str, cell: GridCell, rows: Sequence[NearbyPlace], radius_m: float, limit: int
+    ) -> Optional[CellCandidates]:
+        """
+        Turn the centre query (nearest `self.candidates` rows within
+        fill_radius, distances from the centre) into the cell's candidate set,
+        or None when the rows cannot prove the set is complete.
+        """
+        h = cell.half_diagonal_m
+        cutoff = self.fill_radius(cell, radius_m)
+        if len(rows) >= limit:
+            # Any point's limit-th neighbour is within d_limit(centre) + h, so
+            # its answers are within d_limit(centre) + 2h of the centre.
+            cutoff = min(cutoff, rows[limit - 1].distance_meters + 2 * h)
+        # The centimetre rounding of SQL distances is the only slack needed.
+        cutoff += 0.01
+        if len(rows) >= self.candidates and rows[-1].distance_meters <= cutoff:
+            # Every fetched row is inside the cutoff, so more may lie beyond
+            # the fetch limit: the set cannot be proven complete.
+            self.uncacheable += 1
+            self._dense.set(key, True)
+            return None
+        self.fills += 1
+        return CellCandidates.from_rows([r for r in rows if r.distance_meters <= cutoff])
+
+    def get(self, key: str) -> Optional[CellCandidates]:
+        return self.store.get(key)
+
+    def set(self, key: str, value: CellCandidates) -> None:
+        self.store.set(key, value)
+
+    def invalidate(self) -> None:
+        self.store.invalidate()
+        self._dense.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            **self.store.stats(),
+            "cell_size_m": self.cell_size_m,
+            "fills": self.fills,
+            "uncacheable": self.uncacheable,
+        }
+
+
+def _store_from_env() -> Optional[CacheStore]:
+    size = env_int("RESPONSE_CACHE_SIZE", 0)
+    if size <= 0:
+        return None
+    ttl = env_float("RESPONSE_CACHE_TTL", 60.0)
+    kind = (os.getenv("RESPONSE_CACHE_STORE") or LOCAL).strip().lower()
+    if kind not in STORES:
+        raise RuntimeError(f"RESPONSE_CACHE_STORE must be one of {STORES}, got {kind!r}")
+    if kind == SHARED:
+        return SharedCacheStore(InMemorySharedClient(maxsize=size), ttl=ttl)
+    return LocalCacheStore(size, ttl=ttl)
+
+
+def _cache_from_env() -> Optional[ResponseCache]:
+    store = _store_from_env()
+    if store is None:
+        return None
+    return ResponseCache(
+        store,
+        cell_size_m=env_float("RESPONSE_CACHE_CELL_M", 100.0),
+        candidates=env_int("RESPONSE_CACHE_CANDIDATES", 50),
+    )
+
+
+_RESPONSE_CACHE: Optional[ResponseCache] = _cache_from_env()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide response cache, or None when RESPONSE_CACHE_SIZE is 0."""
+    return _RESPONSE_CACHE
+
+
+def configure_response_cache(cache: Optional[ResponseCache]) -> None:
+    global _RESPONSE_CACHE
+    _RESPONSE_CACHE = cache
+
+
+def invalidate_response_cache(reason: str = "") -> None:
+    """
+    Forget every cached cell in this process. Other processes (workers,
+    loaders) reach it through a PLACES_CHANGED_CHANNEL notification picked
+    up by app.repositories.places_copy.listen_for_place_changes; committed
+    ORM writes call it through the session events below.
+    """
+    cache = _RESPONSE_CACHE
+    if cache is None:
+        return
+    cache.invalidate()
+    if reason:
+        logger.info("Search response cache invalidated: %s", reason)
+
+
+def response_cache_stats() -> dict:
+    cache = _RESPONSE_CACHE
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+def _mark_place_changes(session: Session, flush_context) -> None:
+    if session.info.get("places_changed"):
+        return
+    if any(isinstance(obj, Place) for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info["places_changed"] = True
+        # NOTIFY is transactional: other processes hear it only if this commits.
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, :reason)"), {"channel": PLACES_CHANGED_CHANNEL, "reason": "orm write"}
+        )
+
+
+def _invalidate_after_commit(session: Session) -> None:
+    # After commit, not on flush: a fill racing an uncommitted write would
+    # otherwise re-cache the old rows under the new namespace.
+    if session.info.pop("places_changed", False):
+        invalidate_response_cache()
+
+
+def _forget_place_changes(session: Session) -> None:
+    session.info.pop("places_changed", None)
+
+
+event.listen(Session, "after_flush", _mark_place_changes)
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_rollback", _forget_place_changes)
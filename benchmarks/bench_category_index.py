@@ -0,0 +1,60 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Set
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.matchers import CategoryIndex
+
+
+def _synthetic_taxonomy(size: int, vocab_size: int, rng: random.Random) -> Dict[str, Set[str]]:
+    vocab = [f"lemma{i}" for i in range(vocab_size)]
+    return {f"category{i}": set(rng.sample(vocab, rng.randint(2, 8))) for i in range(size)}
+
+
+def _linear_scan(category_lemmas: Dict[str, Set[str]], lemmas: Set[str]):
+    # Previous implementation, kept here for comparison.
+    best_cat, best_score = None, 0
+    for cat, kw_lemmas in category_lemmas.items():
+        score = len(lemmas & kw_lemmas)
+        if score > best_score:
+            best_cat, best_score = cat, score
+    return best_cat
+
+
+def _time_per_call(fn, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Category detection latency vs taxonomy size.")
+    parser.add_argument("--sizes", default="5,50,500,5000", help="Comma-separated taxonomy sizes.")
+    parser.add_argument("--queries", type=int, default=20_000, help="Lookups per size.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for deterministic output.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(f"{'categories':>10} {'index us/call':>14} {'linear us/call':>15}")
+    for size in sizes:
+        # Vocabulary grows with taxonomy so each lemma hits a similar number of categories.
+        taxonomy = _synthetic_taxonomy(size, vocab_size=max(50, size * 4), rng=rng)
+        vocab = sorted(set().union(*taxonomy.values()))
+        queries = [set(rng.sample(vocab, min(6, len(vocab)))) for _ in range(args.queries)]
+
+        index = CategoryIndex(taxonomy)
+        indexed = _time_per_call(index.best_match, queries)
+        linear = _time_per_call(lambda q: _linear_scan(taxonomy, q), queries)
+        print(f"{size:>10} {indexed:>14.2f} {linear:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
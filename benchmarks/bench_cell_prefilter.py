@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import io
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Arkhangelsk centre; synthetic rows are spread uniformly over a square around it.
+CENTER = (64.5430, 40.5369)
+BENCH_SOURCE = "bench-cells"
+CATEGORIES = ["аптека", "продукты", "кафе", "зоомагазин", "кондитерская", "банк", "салон красоты", "заправка"]
+COPY_CHUNK = 200_000
+
+
+def _asyncpg_dsn(url: str) -> str:
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def _populate(dsn: str, target: int, area_km: float, seed: int) -> int:
+    import asyncpg
+
+    from app.core.geocell import cell_keys
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        existing = await conn.fetchval("SELECT count(*) FROM places WHERE source = $1", BENCH_SOURCE)
+        missing = target - existing
+        if missing <= 0:
+            return existing
+        rng = np.random.default_rng(seed + existing)
+        d_lat = area_km * 500 / 111_320.0
+        d_lon = d_lat / np.cos(np.radians(CENTER[0]))
+        started = time.perf_counter()
+        for offset in range(0, missing, COPY_CHUNK):
+            n = min(COPY_CHUNK, missing - offset)
+            lats = CENTER[0] + rng.uniform(-d_lat, d_lat, n)
+            lons = CENTER[1] + rng.uniform(-d_lon, d_lon, n)
+            keys = cell_keys(lats, lons)
+            cats = rng.integers(0, len(CATEGORIES), n)
+            buf = io.StringIO()
+            for i in range(n):
+                buf.write(
+                    f"Bench {existing + offset + i},{CATEGORIES[cats[i]]},"
+                    f"SRID=4326;POINT({lons[i]:.7f} {lats[i]:.7f}),{keys[i]},{BENCH_SOURCE}\n"
+                )
+            await conn.copy_to_table(
+                "places",
+                source=io.BytesIO(buf.getvalue().encode()),
+                columns=["name", "category", "geog", "cell_key", "source"],
+                format="csv",
+            )
+            print(f"  copied {offset + n:,}/{missing:,} rows", flush=True)
+        await conn.execute("ANALYZE places")
+        print(f"  populated in {time.perf_counter() - started:.1f}s")
+        return target
+    finally:
+        await conn.close()
+
+
+async def _cleanup(dsn: str) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute("DELETE FROM places WHERE source = $1", BENCH_SOURCE)
+        await conn.execute("ANALYZE places")
+    finally:
+        await conn.close()
+
+
+def _queries(count: int, area_km: float, seed: int):
+    rng = random.Random(seed)
+    d_lat = area_km * 400 / 111_320.0
+    d_lon = d_lat / np.cos(np.radians(CENTER[0]))
+    out = []
+    for _ in range(count):
+        # Half unfiltered, half with a category, as /search traffic is.
+        category = rng.choice(CATEGORIES) if rng.random() < 0.5 else None
+        out.append((CENTER[0] + rng.uniform(-d_lat, d_lat), CENTER[1] + rng.uniform(-d_lon, d_lon), category))
+    return out
+
+
+async def _run_mode(sessionmaker, prefilter: str, queries, radius_m: float, limit: int):
+    from app.repositories.places_repository import PlacesRepository
+
+    timings = []
+    results = []
+    async with sessionmaker() as session:
+        repository = PlacesRepository(session, prefilter=prefilter)
+        # Warm the plan and buffer caches.
+        for lat, lon, category in queries[:20]:
+            await repository.find_nearest_lean(latitude=lat, longitude=lon, radius_m=radius_m, limit=limit, category=category)
+        for lat, lon, category in queries:
+            started = time.perf_counter()
+            rows = await repository.find_nearest_lean(
+                latitude=lat, longitude=lon, radius_m=radius_m, limit=limit, category=category
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+            results.append([row.id for row in rows])
+    return timings, results
+
+
+async def _main(args) -> None:
+    sys.path.insert(0, str(ROOT_DIR))
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.core.db import _build_database_url
+    from app.repositories.nearest_statements import CELLS, GIST
+
+    url = _build_database_url()
+    if args.cleanup:
+        await _cleanup(_asyncpg_dsn(url))
+        print("Removed benchmark rows.")
+        return
+
+    engine = create_async_engine(url)
+    sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        print(f"{'rows':>11} {'mode':<6} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+        for rows in args.rows:
+            await _populate(_asyncpg_dsn(url), rows, args.area_km, args.seed)
+            queries = _queries(args.queries, args.area_km, args.seed)
+            by_mode = {}
+            for mode in (GIST, CELLS):
+                timings, results = await _run_mode(sessionmaker, mode, queries, args.radius, args.limit)
+                by_mode[mode] = results
+                ordered = sorted(timings)
+                print(
+                    f"{rows:>11,} {mode:<6} {statistics.fmean(timings):>8.2f} "
+                    f"{ordered[len(ordered) // 2]:>7.2f} {ordered[int(len(ordered) * 0.95)]:>7.2f} "
+                    f"{ordered[int(len(ordered) * 0.99)]:>7.2f}"
+                )
+            mismatches = sum(a != b for a, b in zip(by_mode[GIST], by_mode[CELLS]))
+            print(f"{'':>11} result mismatches between modes: {mismatches}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare the GiST KNN path with the cell_key prefilter on synthetic rows in DATABASE_URL's "
+            "places table (tagged source='bench-cells'; remove them with --cleanup)."
+        )
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000],
+                        help="Row counts to test; rows are added incrementally between sizes.")
+    parser.add_argument("--area-km", type=float, default=40.0, help="Side of the square the rows are spread over.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--radius", type=float, default=500.0)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=19)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the benchmark rows and exit.")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.context_parser import configure_lemma_cache, configure_parse_cache, parse_context
+from app.services.parse_executor import STRATEGIES, ParseExecutor
+
+_WORDS = ["купить", "корм", "кошке", "в", "Чемпионе", "аптеке", "лекарства", "торт", "на", "Троицком",
+          "Воскресенской", "продукты", "Магните", "заехать", "Титан-Арену", "пекарня", "свежий", "хлеб"]
+
+
+def _contexts(count: int, rng: random.Random) -> list:
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 10))) for _ in range(count)]
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _io_request(io_ms: float, lateness: list) -> None:
+    # Stand-in for a DB round trip: any delay beyond io_ms is event-loop stall.
+    start = time.perf_counter()
+    await asyncio.sleep(io_ms / 1000)
+    lateness.append((time.perf_counter() - start) * 1000 - io_ms)
+
+
+async def _parse_request(executor: ParseExecutor, text: str, parse_ms: list) -> None:
+    start = time.perf_counter()
+    await executor.run(parse_context, text)
+    parse_ms.append((time.perf_counter() - start) * 1000)
+
+
+async def _run_mode(strategy: str, workers: int, contexts: list, io_ms: float) -> dict:
+    executor = ParseExecutor(strategy, workers)
+    await executor.start()
+    lateness, parse_ms = [], []
+    start = time.perf_counter()
+    tasks = []
+    for text in contexts:
+        # Interleave parses with I/O-bound requests, as mixed traffic would.
+        tasks.append(asyncio.create_task(_parse_request(executor, text, parse_ms)))
+        tasks.append(asyncio.create_task(_io_request(io_ms, lateness)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return {
+        "io_p50": statistics.median(lateness),
+        "io_p99": _percentile(lateness, 0.99),
+        "parse_p99": _percentile(parse_ms, 0.99),
+        "rps": len(contexts) / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Event-loop stall caused by context parsing per executor strategy.")
+    parser.add_argument("--requests", type=int, default=2000, help="Parse requests per strategy.")
+    parser.add_argument("--workers", type=int, default=2, help="Pool size for thread/process strategies.")
+    parser.add_argument("--io-ms", type=float, default=2.0, help="Simulated DB latency of I/O requests.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for deterministic output.")
+    args = parser.parse_args()
+
+    # Caches off so every parse exercises pymorphy3.
+    configure_lemma_cache(0)
+    configure_parse_cache(0)
+    contexts = _contexts(args.requests, random.Random(args.seed))
+
+    print(f"{'strategy':<8} {'I/O stall p50 ms':>17} {'I/O stall p99 ms':>17} {'parse p99 ms':>13} {'parses/s':>9}")
+    for strategy in STRATEGIES:
+        r = asyncio.run(_run_mode(strategy, args.workers, contexts, args.io_ms))
+        print(f"{strategy:<8} {r['io_p50']:>17.2f} {r['io_p99']:>17.2f} {r['parse_p99']:>13.2f} {r['rps']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
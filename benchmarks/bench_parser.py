@@ -0,0 +1,134 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services import context_parser as cp
+from benchmarks.corpus import generate_contexts
+
+STAGES = ("normalize", "tokenize", "lemmatize", "category", "brand", "street", "total")
+
+
+def _percentile(sorted_values: List[int], pct: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+
+def _time_stages(contexts: List[str]) -> Dict[str, List[int]]:
+    lexicon = cp._get_lexicon()
+    clock = time.perf_counter_ns
+    samples = {stage: [] for stage in STAGES}
+    for text in contexts:
+        original = text.strip()
+        t0 = clock()
+        normalized = cp._normalize_text(original)
+        t1 = clock()
+        toks = cp._tokens(normalized)
+        t2 = clock()
+        lemmas = cp._lemmatize_list(toks)
+        t3 = clock()
+        cp._detect_category_from_lemmas(set(lemmas), lexicon)
+        t4 = clock()
+        cp._detect_brand_from_lemmas(lemmas, lexicon)
+        t5 = clock()
+        cp._detect_street(original)
+        t6 = clock()
+        for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t4, t5, t0), (t1, t2, t3, t4, t5, t6, t6)):
+            samples[stage].append(end - start)
+    return samples
+
+
+def _throughput(contexts: List[str]) -> float:
+    lexicon = cp._get_lexicon()
+    start = time.perf_counter()
+    for text in contexts:
+        cp._parse_context(text, lexicon)
+    return len(contexts) / (time.perf_counter() - start)
+
+
+def run(count: int, seed: int, cold: bool, repeats: int = 3) -> dict:
+    contexts = generate_contexts(count, seed)
+    cp.configure_parse_cache(0)
+    if cold:
+        cp.configure_lemma_cache(0)
+    else:
+        # Warm pass so the lemma cache is in its steady state.
+        cp.parse_contexts(contexts)
+
+    # Best of several repeats filters out noise from other processes.
+    stages = {}
+    for _ in range(repeats):
+        for stage, values in _time_stages(contexts).items():
+            values.sort()
+            p50 = _percentile(values, 0.50) / 1000
+            p99 = _percentile(values, 0.99) / 1000
+            best = stages.get(stage)
+            if best is None or p50 < best["p50_us"]:
+                stages[stage] = {"p50_us": p50, "p99_us": p99}
+    return {
+        "contexts": count,
+        "seed": seed,
+        "cold": cold,
+        "python": platform.python_version(),
+        "throughput_per_s": max(_throughput(contexts) for _ in range(repeats)),
+        "stages": stages,
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> List[str]:
+    """Return human-readable regressions beyond threshold (0.2 = 20%)."""
+    problems = []
+    base_rps = baseline["throughput_per_s"]
+    if result["throughput_per_s"] < base_rps * (1 - threshold):
+        problems.append(f"throughput {result['throughput_per_s']:.0f}/s < baseline {base_rps:.0f}/s")
+    for stage, base in baseline["stages"].items():
+        current = result["stages"].get(stage)
+        if current is None:
+            continue
+        # p50 only: p99 of microsecond stages is too noisy to gate on.
+        if current["p50_us"] > base["p50_us"] * (1 + threshold):
+            problems.append(f"{stage} p50 {current['p50_us']:.2f}us > baseline {base['p50_us']:.2f}us")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-stage parse_context micro-benchmark.")
+    parser.add_argument("--contexts", type=int, default=5000, help="Generated contexts to parse.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for deterministic output.")
+    parser.add_argument("--cold", action="store_true", help="Disable the lemma cache (pymorphy3 on every token).")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement; the best one is kept.")
+    parser.add_argument("--save-baseline", type=Path, help="Write results as JSON baseline.")
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved JSON baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown ratio before failing.")
+    args = parser.parse_args()
+
+    result = run(args.contexts, args.seed, args.cold, args.repeats)
+
+    print(f"throughput: {result['throughput_per_s']:.0f} contexts/s ({args.contexts} contexts)")
+    print(f"{'stage':<10} {'p50 us':>9} {'p99 us':>9}")
+    for stage, values in result["stages"].items():
+        print(f"{stage:<10} {values['p50_us']:>9.2f} {values['p99_us']:>9.2f}")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.save_baseline}.")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        problems = compare(result, baseline, args.threshold)
+        if problems:
+            print("REGRESSION:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} of baseline.")
+
+
+if __name__ == "__main__":
+    main()
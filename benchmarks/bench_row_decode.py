@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Arkhangelsk centre, where scripts/seed_places.py puts its data.
+CENTER = (64.5430, 40.5369)
+
+
+def _points(count: int, seed: int):
+    rng = random.Random(seed)
+    return [(CENTER[0] + rng.uniform(-0.01, 0.01), CENTER[1] + rng.uniform(-0.02, 0.02)) for _ in range(count)]
+
+
+async def _run_mode(sessionmaker, method: str, points, radius_m: float, limit: int) -> dict:
+    from app.repositories.places_repository import PlacesRepository
+
+    rows = 0
+    elapsed = 0.0
+    allocated = 0
+    for lat, lon in points:
+        # A fresh session per query, as each request gets one.
+        async with sessionmaker() as session:
+            repository = PlacesRepository(session)
+            find = getattr(repository, method)
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = await find(latitude=lat, longitude=lon, radius_m=radius_m, limit=limit)
+            elapsed += time.perf_counter() - started
+            allocated += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rows += len(result)
+    return {"rows": rows, "elapsed": elapsed, "allocated": allocated, "queries": len(points)}
+
+
+async def _main(args) -> None:
+    sys.path.insert(0, str(ROOT_DIR))
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.core.db import _build_database_url
+
+    engine = create_async_engine(_build_database_url())
+    sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    points = _points(args.queries, args.seed)
+    try:
+        # Warm the pool and the server-side plan cache before measuring.
+        await _run_mode(sessionmaker, "find_nearest_lean", points[:10], args.radius, args.limit)
+        print(f"{'mode':<16} {'rows':>7} {'ms/query':>9} {'us/row':>8} {'peak KB/query':>14} {'peak B/row':>11}")
+        for name, method in (("full ORM", "find_nearest"), ("lean columns", "find_nearest_lean")):
+            stats = await _run_mode(sessionmaker, method, points, args.radius, args.limit)
+            rows = max(stats["rows"], 1)
+            print(
+                f"{name:<16} {stats['rows']:>7} {stats['elapsed'] * 1000 / stats['queries']:>9.2f} "
+                f"{stats['elapsed'] * 1e6 / rows:>8.1f} {stats['allocated'] / 1024 / stats['queries']:>14.1f} "
+                f"{stats['allocated'] / rows:>11.0f}"
+            )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare find_nearest (ORM entities) with find_nearest_lean (column tuples) against DATABASE_URL."
+    )
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--radius", type=float, default=2000.0)
+    parser.add_argument("--limit", type=int, default=50, help="Large limits make per-row costs dominate.")
+    parser.add_argument("--seed", type=int, default=13)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
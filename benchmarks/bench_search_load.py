@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import generate_contexts
+
+# (scheduled start offset in seconds, latency in seconds, HTTP status or 0 on a transport error)
+Sample = Tuple[float, float, int]
+Send = Callable[[dict], Awaitable[int]]
+
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+
+async def load_locations(count: int, seed: int) -> List[Tuple[float, float]]:
+    """Coordinates of up to `count` places sampled from DATABASE_URL's places table."""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.core.db import _build_database_url
+
+    engine = create_async_engine(_build_database_url())
+    try:
+        async with engine.connect() as conn:
+            estimate = await conn.scalar(text("SELECT reltuples FROM pg_class WHERE relname = 'places'"))
+            # Sample a little more than needed; ORDER BY random() would scan tens of millions of rows.
+            percent = 100.0 if not estimate or estimate <= 0 else min(100.0, 200.0 * count / estimate)
+            rows = await conn.execute(
+                text(
+                    "SELECT ST_Y(geog::geometry), ST_X(geog::geometry) "
+                    "FROM places TABLESAMPLE BERNOULLI (:percent) REPEATABLE (:seed) LIMIT :count"
+                ),
+                {"percent": percent, "seed": seed, "count": count},
+            )
+            return [(lat, lon) for lat, lon in rows]
+    finally:
+        await engine.dispose()
+
+
+def build_payloads(
+    locations: List[Tuple[float, float]],
+    contexts: List[str],
+    count: int,
+    seed: int,
+    jitter_m: float = 300.0,
+    empty_share: float = 0.05,
+) -> List[dict]:
+    """
+    /search bodies: a random context at a random seeded place, moved up to
+    jitter_m away; empty_share of them point far from any data (empty results).
+    """
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        if not locations or rng.random() < empty_share:
+            # Open ocean in the South Pacific.
+            lat, lon = rng.uniform(-50, -40), rng.uniform(-140, -120)
+        else:
+            lat, lon = rng.choice(locations)
+            distance = jitter_m * math.sqrt(rng.random())
+            bearing = rng.uniform(0, 2 * math.pi)
+            lat += distance * math.cos(bearing) / 111_320.0
+            lon += distance * math.sin(bearing) / (111_320.0 * max(0.01, math.cos(math.radians(lat))))
+        payloads.append({"location": f"{lat:.6f}:{lon:.6f}", "context": rng.choice(contexts)})
+    return payloads
+
+
+def _sender(client: httpx.AsyncClient) -> Send:
+    async def send(payload: dict) -> int:
+        try:
+            response = await client.post("/search", json=payload)
+        except httpx.HTTPError:
+            return 0
+        return response.status_code
+
+    return send
+
+
+async def closed_loop(send: Send, payloads: List[dict], concurrency: int, duration_s: float) -> List[Sample]:
+    """`concurrency` workers sending back to back: measures capacity."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + duration_s
+    samples: List[Sample] = []
+    counter = iter(range(10**12))
+
+    async def worker() -> None:
+        while loop.time() < deadline:
+            payload = payloads[next(counter) % len(payloads)]
+            sent = loop.time()
+            status = await send(payload)
+            samples.append((sent - start, loop.time() - sent, status))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def open_loop(
+    send: Send,
+    payloads: List[dict],
+    rate: float,
+    concurrency: int,
+    duration_s: float,
+    seed: int,
+) -> List[Sample]:
+    """
+    Poisson arrivals at `rate` per second regardless of how the service
+    keeps up. Latency counts from the scheduled send time, so queueing
+    behind the `concurrency` cap shows up (no coordinated omission).
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    limit = asyncio.Semaphore(concurrency)
+    samples: List[Sample] = []
+    tasks = []
+    start = loop.time()
+
+    async def one(payload: dict, scheduled: float) -> None:
+        async with limit:
+            status = await send(payload)
+        samples.append((scheduled - start, loop.time() - scheduled, status))
+
+    offset = 0.0
+    index = 0
+    while True:
+        offset += rng.expovariate(rate)
+        if offset >= duration_s:
+            break
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(payloads[index % len(payloads)], start + offset)))
+        index += 1
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def summarize(samples: List[Sample], warmup_s: float, duration_s: float) -> dict:
+    """RPS, error rate and latency percentiles (ms) of the samples after warmup."""
+    measured = [(latency, status) for offset, latency, status in samples if offset >= warmup_s]
+    window = max(duration_s - warmup_s, 1e-9)
+    latencies = np.array([latency for latency, _ in measured]) * 1000
+    errors = sum(1 for _, status in measured if status != 200)
+    statuses = {}
+    for _, status in measured:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    latency_ms = {"mean": 0.0, "max": 0.0, **{name: 0.0 for name in PERCENTILES}}
+    if len(latencies):
+        latency_ms = {
+            "mean": float(latencies.mean()),
+            "max": float(latencies.max()),
+            **{name: float(np.percentile(latencies, pct)) for name, pct in PERCENTILES.items()},
+        }
+    return {
+        "requests": len(measured),
+        "errors": errors,
+        "error_rate": errors / len(measured) if measured else 0.0,
+        "rps": (len(measured) - errors) / window,
+        "latency_ms": latency_ms,
+        "status": statuses,
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> List[str]:
+    """Return human-readable regressions beyond threshold (0.2 = 20%)."""
+    problems = []
+    if result["rps"] < baseline["rps"] * (1 - threshold):
+        problems.append(f"rps {result['rps']:.0f} < baseline {baseline['rps']:.0f}")
+    # p999 depends on a handful of requests; too noisy to gate on.
+    for name in ("p50", "p99"):
+        current, base = result["latency_ms"][name], baseline["latency_ms"][name]
+        if current > base * (1 + threshold):
+            problems.append(f"{name} {current:.1f}ms > baseline {base:.1f}ms")
+    # Absolute: a baseline with no errors must not start failing requests.
+    if result["error_rate"] > baseline["error_rate"] + 0.01:
+        problems.append(f"error rate {result['error_rate']:.2%} > baseline {baseline['error_rate']:.2%}")
+    return problems
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawn_server(workers: int) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=ROOT_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{url}/openapi.json", timeout=1.0).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 60s")
+
+
+async def run(args) -> dict:
+    locations = await load_locations(args.locations, args.seed)
+    if not locations:
+        print("warning: no places found; every request will miss. Seed the database first.")
+    payloads = build_payloads(
+        locations, generate_contexts(args.contexts, args.seed), args.payloads, args.seed, args.jitter, args.empty_share
+    )
+
+    process = None
+    lifespan = None
+    if args.url:
+        target = args.url
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency))
+    elif args.spawn:
+        process, target = _spawn_server(args.workers)
+        client = httpx.AsyncClient(base_url=target, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        # In-process ASGI: no sockets, but client and app share one event loop and CPU.
+        from app.main import app
+
+        target = "asgi"
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+
+    try:
+        async with client:
+            send = _sender(client)
+            duration = args.warmup + args.duration
+            if args.rate:
+                samples = await open_loop(send, payloads, args.rate, args.concurrency, duration, args.seed)
+            else:
+                samples = await closed_loop(send, payloads, args.concurrency, duration)
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    return {
+        "target": target,
+        "mode": "open" if args.rate else "closed",
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "locations": len(locations),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        **summarize(samples, args.warmup, duration),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Load test POST /search with contexts from benchmarks/corpus.py at places sampled from "
+            "DATABASE_URL. Closed loop by default; --rate switches to open-loop Poisson arrivals."
+        )
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Running service to test, e.g. http://localhost:8000.")
+    target.add_argument("--spawn", action="store_true", help="Start uvicorn app.main:app on a free port and test it.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Closed-loop workers, or in-flight cap with --rate.")
+    parser.add_argument("--rate", type=float, help="Open-loop request rate per second.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds.")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds sent before measuring.")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout; timeouts count as errors.")
+    parser.add_argument("--locations", type=int, default=5000, help="Places to sample from the database.")
+    parser.add_argument("--contexts", type=int, default=500, help="Distinct generated contexts.")
+    parser.add_argument("--payloads", type=int, default=20000, help="Request bodies, cycled through.")
+    parser.add_argument("--jitter", type=float, default=300.0, help="Max metres between a request and its sampled place.")
+    parser.add_argument("--empty-share", type=float, default=0.05, help="Share of requests far from any place.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for deterministic output.")
+    parser.add_argument("--save-baseline", type=Path, help="Write results as JSON baseline.")
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved JSON baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression ratio before failing.")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    latency = result["latency_ms"]
+    print(
+        f"{result['target']} {result['mode']} loop, concurrency {result['concurrency']}"
+        + (f", rate {result['rate']:.0f}/s" if result["rate"] else "")
+    )
+    print(f"requests: {result['requests']}  rps: {result['rps']:.1f}  errors: {result['error_rate']:.2%} {result['status']}")
+    print("latency ms: " + "  ".join(f"{name} {latency[name]:.1f}" for name in (*PERCENTILES, "max")))
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.save_baseline}.")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        problems = compare(result, baseline, args.threshold)
+        if problems:
+            print("REGRESSION:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} of baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter so import caches do not leak between modes.
+_PROBE = """
+import json, resource, time
+t0 = time.perf_counter()
+import app.services.context_parser as cp
+t1 = time.perf_counter()
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+cp.parse_context("Купить лекарства в аптеке на Троицком")
+t2 = time.perf_counter()
+rss_first = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_parse_ms": (t2 - t1) * 1000,
+    "rss_after_import_kb": rss_import,
+    "rss_after_first_parse_kb": rss_first,
+}))
+"""
+
+
+def _run_probe(artifact_path: Path, cwd: Path = ROOT_DIR) -> dict:
+    env = dict(os.environ, LEXICON_ARTIFACT_PATH=str(artifact_path))
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=cwd,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@contextmanager
+def _worktree(ref: str):
+    """Detached checkout of `ref` in a temporary directory, removed afterwards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tree"
+        subprocess.run(["git", "worktree", "add", "--detach", str(path), ref], cwd=ROOT_DIR, check=True, capture_output=True)
+        try:
+            yield path
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(path)], cwd=ROOT_DIR, check=True, capture_output=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Report context_parser import time and RSS with and without the lexicon artifact, "
+            "optionally against another revision's import path."
+        )
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per mode; best run is reported.")
+    parser.add_argument(
+        "--baseline-ref",
+        help="Also measure this git revision's import path (e.g. the commit before the artifact was introduced).",
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT_DIR))
+    from app.services.context_parser import build_lexicon_artifact
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = build_lexicon_artifact(Path(tmp) / "lexicon.json")
+        modes = {
+            "derive (no artifact)": (Path(tmp) / "missing.json", ROOT_DIR),
+            "artifact": (artifact, ROOT_DIR),
+        }
+        with ExitStack() as stack:
+            if args.baseline_ref:
+                modes = {f"baseline {args.baseline_ref}": (artifact, stack.enter_context(_worktree(args.baseline_ref))), **modes}
+            print(f"{'mode':<22} {'import ms':>10} {'first parse ms':>15} {'RSS import MB':>14} {'RSS first MB':>13}")
+            for name, (path, cwd) in modes.items():
+                runs = [_run_probe(path, cwd) for _ in range(args.runs)]
+                best = min(runs, key=lambda r: r["import_ms"] + r["first_parse_ms"])
+                print(
+                    f"{name:<22} {best['import_ms']:>10.1f} {best['first_parse_ms']:>15.1f} "
+                    f"{best['rss_after_import_kb'] / 1024:>14.1f} {best['rss_after_first_parse_kb'] / 1024:>13.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
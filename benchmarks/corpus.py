@@ -0,0 +1,54 @@
+import random
+from typing import List
+
+from app.services import context_parser
+
+
+CASES = ("nomn", "gent", "datv", "accs", "ablt", "loct")
+
+VERBS = ["Купить", "Заказать", "Найти", "Заехать", "Зайти", "Где", "Нужно"]
+PREPOSITIONS = ["в", "у", "возле", "около", ""]
+STREETS = ["Троицкий", "Воскресенская", "Ломоносова", "Поморская", "Северной Двины", "Садовая", "Гагарина"]
+STREET_PHRASINGS = [
+    "на улице {}",
+    "на ул. {}",
+    "на проспекте {}",
+    "на пер. {}",
+    "на {}",
+    "в районе {}",
+    "",
+]
+
+
+def _inflect(word: str, case: str) -> str:
+    parsed = context_parser._get_morph().parse(word.lower())
+    if not parsed:
+        return word
+    form = parsed[0].inflect({case})
+    return form.word if form else word
+
+
+def _inflect_phrase(phrase: str, case: str) -> str:
+    return " ".join(_inflect(w, case) for w in phrase.split())
+
+
+def generate_contexts(count: int, seed: int = 42) -> List[str]:
+    """
+    Realistic-looking contexts: category keywords x brands x street phrasings,
+    each word put into a random grammatical case. Deterministic for a seed.
+    """
+    rng = random.Random(seed)
+    keywords = [kw for kws in context_parser._CATEGORIES_CONFIG.values() for kw in kws]
+    brands = list(context_parser._BRANDS) + [""]
+    out = []
+    for _ in range(count):
+        parts = [rng.choice(VERBS), _inflect_phrase(rng.choice(keywords), rng.choice(CASES))]
+        brand = rng.choice(brands)
+        if brand:
+            parts += [rng.choice(PREPOSITIONS), _inflect_phrase(brand, rng.choice(CASES)).capitalize()]
+        phrasing = rng.choice(STREET_PHRASINGS)
+        if phrasing:
+            street = _inflect_phrase(rng.choice(STREETS), rng.choice(("loct", "nomn", "gent")))
+            parts.append(phrasing.format(street.title()))
+        out.append(" ".join(p for p in parts if p))
+    return out
@@ -0,0 +1,10 @@
+#!/bin/bash
+# Runs once on a fresh primary volume (docker-entrypoint-initdb.d):
+# a login for streaming replication and a pg_hba rule that admits it.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD '${REPLICATION_PASSWORD:-replicator}';
+SQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,15 @@
+#!/bin/bash
+# Hot standby of $PRIMARY_HOST: clone it with pg_basebackup on first start
+# (-R writes standby.signal and primary_conninfo), then run postgres.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h "$PRIMARY_HOST" -p 5432 -q; do
+        sleep 1
+    done
+    PGPASSWORD="${REPLICATION_PASSWORD:-replicator}" pg_basebackup \
+        -h "$PRIMARY_HOST" -p 5432 -U replicator -D "$PGDATA" -X stream -R
+    chmod 0700 "$PGDATA"
+fi
+
+exec postgres -c hot_standby=on
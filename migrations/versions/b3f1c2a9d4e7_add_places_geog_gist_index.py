@@ -0,0 +1,19 @@
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c2a9d4e7'
+down_revision = '7d229feda349'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GiST index serves both ST_DWithin and KNN (<->) ordering on geography.
+    # Same name GeoAlchemy2 uses, so databases created via metadata.create_all
+    # (which already have it) are left untouched.
+    op.execute('CREATE INDEX IF NOT EXISTS idx_places_geog ON places USING gist (geog)')
+    op.execute('ANALYZE places')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS idx_places_geog')
@@ -0,0 +1,86 @@
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c81e5d0f6a2b'
+down_revision = 'b3f1c2a9d4e7'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+
+# Frozen copy of app.services.context_parser.normalize_street as of this
+# revision, so later parser or lexicon changes do not alter what this
+# migration writes; rows written afterwards follow the ORM listener.
+_TOKEN_RE = re.compile(r"[A-Za-zА-Яа-я0-9\-]+")
+_STREET_TYPE_LEMMAS = {
+    "улица", "ул", "проспект", "пр", "пер", "переулок", "район",
+    "пр-т", "набережная", "наб", "площадь", "пл", "шоссе", "бульвар", "б-р", "проезд", "тупик",
+}
+
+
+def _normalize_street(address, morph, lemmas):
+    if not address:
+        return None
+    words = []
+    for token in _TOKEN_RE.findall(address.split(",", 1)[0].lower()):
+        lemma = lemmas.get(token)
+        if lemma is None:
+            parsed = morph.parse(token)
+            lemma = lemmas[token] = parsed[0].normal_form if parsed else token
+        if lemma not in _STREET_TYPE_LEMMAS and not lemma.isdigit():
+            words.append(lemma)
+    return " ".join(words) or None
+
+
+def _backfill(bind) -> None:
+    import pymorphy3
+
+    morph = pymorphy3.MorphAnalyzer()
+    lemmas = {}
+    places = sa.table(
+        'places',
+        sa.column('id', sa.Integer),
+        sa.column('address', sa.Text),
+        sa.column('street_norm', sa.Text),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(places.c.id, places.c.address)
+            .where(places.c.id > last_id, places.c.address.is_not(None))
+            .order_by(places.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            places.update()
+            .where(places.c.id == sa.bindparam('row_id'))
+            .values(street_norm=sa.bindparam('norm')),
+            [{'row_id': row.id, 'norm': _normalize_street(row.address, morph, lemmas)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('places', sa.Column('street_norm', sa.Text, nullable=True))
+
+    if not op.get_context().as_sql:
+        _backfill(op.get_bind())
+
+    op.create_index(
+        'ix_places_street_norm_trgm',
+        'places',
+        ['street_norm'],
+        postgresql_using='gin',
+        postgresql_ops={'street_norm': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_places_street_norm_trgm', table_name='places')
+    op.drop_column('places', 'street_norm')
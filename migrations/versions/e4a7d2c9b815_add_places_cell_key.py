@@ -0,0 +1,73 @@
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7d2c9b815'
+down_revision = 'c81e5d0f6a2b'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+
+# Frozen copy of app.core.geocell.cell_key as of this revision (16 bits per
+# axis, longitude on even bits), so a later CELL_BITS or layout change does
+# not alter what this migration writes; such a change needs its own
+# migration recomputing the column.
+_CELL_BITS = 16
+
+
+def _spread_bits(v: int) -> int:
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def _cell_key(latitude: float, longitude: float) -> int:
+    size = 1 << _CELL_BITS
+    row = min(size - 1, max(0, math.floor((latitude + 90.0) / 180.0 * size)))
+    col = math.floor((longitude + 180.0) / 360.0 * size) % size
+    return _spread_bits(col) | (_spread_bits(row) << 1)
+
+
+def _backfill(bind) -> None:
+    places = sa.table(
+        'places',
+        sa.column('id', sa.Integer),
+        sa.column('cell_key', sa.BigInteger),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                'SELECT id, ST_Y(geog::geometry) AS lat, ST_X(geog::geometry) AS lon '
+                'FROM places WHERE id > :last_id ORDER BY id LIMIT :batch'
+            ),
+            {'last_id': last_id, 'batch': BACKFILL_BATCH},
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            places.update()
+            .where(places.c.id == sa.bindparam('row_id'))
+            .values(cell_key=sa.bindparam('key')),
+            [{'row_id': row.id, 'key': _cell_key(row.lat, row.lon)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('places', sa.Column('cell_key', sa.BigInteger, nullable=True))
+
+    if not op.get_context().as_sql:
+        _backfill(op.get_bind())
+
+    op.create_index('ix_places_cell_key_category_brand', 'places', ['cell_key', 'category', 'brand'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_places_cell_key_category_brand', table_name='places')
+    op.drop_column('places', 'cell_key')
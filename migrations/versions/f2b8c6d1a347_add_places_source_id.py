@@ -0,0 +1,19 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c6d1a347'
+down_revision = 'e4a7d2c9b815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('places', sa.Column('source_id', sa.Text, nullable=True))
+    # Existing rows keep source_id NULL, which never conflicts.
+    op.create_index('uq_places_source_source_id', 'places', ['source', 'source_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_places_source_source_id', table_name='places')
+    op.drop_column('places', 'source_id')
@@ -0,0 +1,29 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.context_parser import LEXICON_ARTIFACT_PATH, build_lexicon_artifact
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile categories.json/brands.json lemma tables into an on-disk artifact."
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=LEXICON_ARTIFACT_PATH,
+        help="Artifact path (defaults to LEXICON_ARTIFACT_PATH).",
+    )
+    args = parser.parse_args()
+
+    path = build_lexicon_artifact(args.output)
+    print(f"Wrote lexicon artifact to {path}.")
+
+
+if __name__ == "__main__":
+    main()
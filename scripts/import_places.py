@@ -0,0 +1,504 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.db import _build_database_url
+from app.core.geocell import cell_keys
+from app.repositories.places_copy import (
+    address_street_norm,
+    asyncpg_dsn,
+    copy_connection,
+    ewkb_point,
+    notify_places_changed,
+)
+
+
+GEOJSON = "geojson"
+NDJSON = "ndjson"
+CSV = "csv"
+FORMATS = (GEOJSON, NDJSON, CSV)
+
+_SUFFIX_FORMATS = {
+    ".geojson": GEOJSON,
+    ".json": GEOJSON,
+    ".ndjson": NDJSON,
+    ".jsonl": NDJSON,
+    ".geojsonl": NDJSON,
+    ".geojsons": NDJSON,
+    ".csv": CSV,
+    ".tsv": CSV,
+}
+
+# Place columns filled from source fields; the rest are derived.
+MAPPED_FIELDS = ("name", "category", "brand", "address")
+LAT_FIELDS = ("lat", "latitude", "y")
+LON_FIELDS = ("lon", "lng", "long", "longitude", "x")
+
+IMPORT_COLUMNS = [
+    "name", "category", "brand", "address", "street_norm", "geog", "cell_key", "source_id", "metadata_json",
+]
+
+# Staging table for one chunk; emptied by each chunk's commit.
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE places_import (
+    name text,
+    category varchar,
+    brand varchar,
+    address text,
+    street_norm text,
+    geog geography(Point, 4326),
+    cell_key bigint,
+    source_id text,
+    metadata_json jsonb
+) ON COMMIT DELETE ROWS
+"""
+
+# Rows whose values did not change are left alone (and not returned), so
+# re-importing an unchanged file writes nothing.
+UPSERT_SQL = """
+INSERT INTO places AS p
+    (name, category, brand, address, street_norm, geog, cell_key, source, source_id, metadata_json)
+SELECT name, category, brand, address, street_norm, geog, cell_key, $1, source_id, metadata_json
+FROM places_import
+ON CONFLICT (source, source_id) DO UPDATE SET
+    name = EXCLUDED.name,
+    category = EXCLUDED.category,
+    brand = EXCLUDED.brand,
+    address = EXCLUDED.address,
+    street_norm = EXCLUDED.street_norm,
+    geog = EXCLUDED.geog,
+    cell_key = EXCLUDED.cell_key,
+    metadata_json = EXCLUDED.metadata_json
+WHERE (p.name, p.category, p.brand, p.address, p.metadata_json, ST_AsEWKB(p.geog::geometry))
+    IS DISTINCT FROM
+    (EXCLUDED.name, EXCLUDED.category, EXCLUDED.brand, EXCLUDED.address, EXCLUDED.metadata_json,
+     ST_AsEWKB(EXCLUDED.geog::geometry))
+RETURNING (xmax = 0) AS inserted
+"""
+
+
+class SourceRecord(NamedTuple):
+    # Feature-level id (GeoJSON); flat records carry theirs in properties.
+    id: Any
+    properties: Dict[str, Any]
+    # (lat, lon) from a Point geometry; flat records carry coordinates in properties.
+    point: Optional[Tuple[float, float]]
+
+
+# Largest single JSON value (one feature) the GeoJSON reader buffers, in
+# characters; beyond it the input is treated as malformed or truncated
+# instead of reading the rest of the file into memory.
+MAX_RECORD_CHARS = 1 << 24
+
+
+class _JsonStream:
+    """
+    Incremental JSON tokenizer over a text stream: decodes one value at a
+    time, keeping only the unconsumed part of the input buffered.
+    """
+
+    def __init__(self, stream, read_size: int = 1 << 16, max_value_size: int = MAX_RECORD_CHARS):
+        self._stream = stream
+        self._read_size = read_size
+        self._max_value_size = max_value_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        # Characters of input dropped before _buf, for error offsets.
+        self._consumed = 0
+        self._eof = False
+
+    @property
+    def offset(self) -> int:
+        """Character offset of the next unread input."""
+        return self._consumed + self._pos
+
+    def _fill(self, size: int) -> bool:
+        chunk = self._stream.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._consumed += self._pos
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _skip_ws(self) -> None:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill(self._read_size):
+                return
+
+    def next_char(self) -> str:
+        self._skip_ws()
+        if self._pos >= len(self._buf):
+            raise ValueError(f"unexpected end of JSON input at character {self.offset}")
+        char = self._buf[self._pos]
+        self._pos += 1
+        return char
+
+    def peek_char(self) -> str:
+        self._skip_ws()
+        return self._buf[self._pos] if self._pos < len(self._buf) else ""
+
+    def expect(self, char: str) -> None:
+        got = self.next_char()
+        if got != char:
+            raise ValueError(f"expected {char!r} in JSON input at character {self.offset - 1}, got {got!r}")
+
+    def value(self) -> Any:
+        self._skip_ws()
+        size = self._read_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as error:
+                # Incomplete value: read more (doubling, so huge values stay
+                # linear), up to the cap; malformed input fails there.
+                pending = len(self._buf) - self._pos
+                if pending < self._max_value_size and self._fill(min(size, self._max_value_size - pending)):
+                    size *= 2
+                    continue
+                if pending >= self._max_value_size:
+                    raise ValueError(
+                        f"JSON value at character {self.offset} is larger than {self._max_value_size} "
+                        "characters; the input is malformed or truncated"
+                    ) from None
+                raise ValueError(f"invalid JSON at character {self._consumed + error.pos}: {error.msg}") from None
+            # A number ending exactly at the buffer end may continue in the next read.
+            if end == len(self._buf) and not self._eof and self._fill(size):
+                continue
+            self._pos = end
+            return value
+
+
+def iter_geojson_features(
+    stream, read_size: int = 1 << 16, max_feature_size: int = MAX_RECORD_CHARS
+) -> Iterator[dict]:
+    """
+    Features of a FeatureCollection, one at a time; other top-level keys are
+    skipped. A value longer than max_feature_size characters raises
+    ValueError instead of being buffered.
+    """
+    reader = _JsonStream(stream, read_size, max_feature_size)
+    reader.expect("{")
+    if reader.peek_char() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "features":
+            reader.expect("[")
+            if reader.peek_char() == "]":
+                reader.next_char()
+            else:
+                while True:
+                    yield reader.value()
+                    separator = reader.next_char()
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError(f"expected ',' or ']' in features, got {separator!r}")
+        else:
+            reader.value()
+        separator = reader.next_char()
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"expected ',' or '}}' in FeatureCollection, got {separator!r}")
+
+
+def _feature_record(feature: dict) -> SourceRecord:
+    geometry = feature.get("geometry") or {}
+    point = None
+    if geometry.get("type") == "Point":
+        coordinates = geometry.get("coordinates") or []
+        if len(coordinates) >= 2:
+            point = (coordinates[1], coordinates[0])
+    return SourceRecord(feature.get("id"), feature.get("properties") or {}, point)
+
+
+def read_geojson(stream) -> Iterator[SourceRecord]:
+    for feature in iter_geojson_features(stream):
+        yield _feature_record(feature)
+
+
+def read_ndjson(stream) -> Iterator[SourceRecord]:
+    """One GeoJSON Feature or flat object per line; blank lines are ignored."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        if item.get("type") == "Feature":
+            yield _feature_record(item)
+        else:
+            yield SourceRecord(None, item, None)
+
+
+def read_csv(stream, delimiter: str = ",") -> Iterator[SourceRecord]:
+    for row in csv.DictReader(stream, delimiter=delimiter):
+        # Empty cells are missing values, not empty strings.
+        yield SourceRecord(None, {key: value for key, value in row.items() if value not in ("", None)}, None)
+
+
+@dataclass
+class FieldMapping:
+    """Which source property feeds each column; unmapped properties go to metadata_json."""
+
+    fields: Dict[str, str] = field(default_factory=lambda: {name: name for name in MAPPED_FIELDS})
+    id_field: str = "id"
+    lat_field: Optional[str] = None
+    lon_field: Optional[str] = None
+    keep_metadata: bool = True
+
+    def _coordinate(self, properties: dict, explicit: Optional[str], candidates: Tuple[str, ...]):
+        if explicit:
+            return properties.get(explicit), {explicit}
+        for name in candidates:
+            if name in properties:
+                return properties[name], {name}
+        return None, set()
+
+    def to_row(self, record: SourceRecord) -> Tuple[Optional[tuple], Optional[str]]:
+        """(staging row without derived columns, None) or (None, skip reason)."""
+        properties = record.properties
+        used = set(self.fields.values()) | {self.id_field}
+
+        source_id = record.id if record.id is not None else properties.get(self.id_field)
+        if source_id is None or source_id == "":
+            return None, "no id"
+
+        if record.point is not None:
+            lat, lon = record.point
+        else:
+            lat, lat_used = self._coordinate(properties, self.lat_field, LAT_FIELDS)
+            lon, lon_used = self._coordinate(properties, self.lon_field, LON_FIELDS)
+            used |= lat_used | lon_used
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            return None, "no point"
+        if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+            return None, "bad point"
+
+        values = {}
+        for column, source_field in self.fields.items():
+            value = properties.get(source_field)
+            values[column] = str(value).strip() if value is not None and str(value).strip() else None
+        if values["name"] is None:
+            return None, "no name"
+
+        metadata = None
+        if self.keep_metadata:
+            metadata = {key: value for key, value in properties.items() if key not in used} or None
+        return (
+            values["name"],
+            values["category"],
+            values["brand"],
+            values["address"],
+            lat,
+            lon,
+            str(source_id),
+            metadata,
+        ), None
+
+
+def staging_records(rows: List[tuple]) -> List[tuple]:
+    """Staging rows in IMPORT_COLUMNS order, with street_norm, EWKB point and cell_key."""
+    keys = cell_keys([row[4] for row in rows], [row[5] for row in rows]).tolist()
+    return [
+        (
+            name,
+            category,
+            brand,
+            address,
+            address_street_norm(address),
+            ewkb_point(lon, lat),
+            key,
+            source_id,
+            json.dumps(metadata, ensure_ascii=False) if metadata is not None else None,
+        )
+        for (name, category, brand, address, lat, lon, source_id, metadata), key in zip(rows, keys)
+    ]
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+
+    def skip(self, reason: str) -> None:
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def line(self, position: Optional[int] = None, size: Optional[int] = None) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        text = (
+            f"{self.read:,} read, {self.inserted:,} inserted, {self.updated:,} updated, "
+            f"{self.unchanged:,} unchanged, {sum(self.skipped.values()):,} skipped, "
+            f"{self.read / elapsed:,.0f} rows/s"
+        )
+        if position is not None and size:
+            text += f", {position / size:.0%} of input ({position / elapsed / 1e6:.1f} MB/s)"
+        return text
+
+
+def detect_format(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes = suffixes[:-1]
+    if suffixes and suffixes[-1] in _SUFFIX_FORMATS:
+        return _SUFFIX_FORMATS[suffixes[-1]]
+    raise ValueError(f"Cannot tell the format of {path}; pass --format")
+
+
+def open_records(path: Path, fmt: str, raw, delimiter: Optional[str] = None) -> Iterator[SourceRecord]:
+    """Records from the binary file `raw` (gzip-compressed when the name ends in .gz)."""
+    binary = gzip.GzipFile(fileobj=raw) if path.suffix.lower() == ".gz" else raw
+    stream = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="" if fmt == CSV else None)
+    if fmt == GEOJSON:
+        return read_geojson(stream)
+    if fmt == NDJSON:
+        return read_ndjson(stream)
+    if delimiter is None:
+        delimiter = "\t" if ".tsv" in [suffix.lower() for suffix in path.suffixes] else ","
+    return read_csv(stream, delimiter=delimiter)
+
+
+async def _write_chunk(conn, source: str, chunk: Dict[str, tuple], stats: ImportStats) -> None:
+    async with conn.transaction():
+        await conn.copy_records_to_table(
+            "places_import", records=staging_records(list(chunk.values())), columns=IMPORT_COLUMNS
+        )
+        written = await conn.fetch(UPSERT_SQL, source)
+    inserted = sum(1 for row in written if row["inserted"])
+    stats.inserted += inserted
+    stats.updated += len(written) - inserted
+    stats.unchanged += len(chunk) - len(written)
+
+
+async def import_places(
+    path: Path,
+    source: str,
+    fmt: Optional[str] = None,
+    mapping: Optional[FieldMapping] = None,
+    chunk_size: int = 10_000,
+    delimiter: Optional[str] = None,
+) -> ImportStats:
+    """
+    Stream `path` into places in chunks of chunk_size rows, upserting on
+    (source, source_id). Memory use does not depend on the file size.
+    """
+    fmt = fmt or detect_format(path)
+    mapping = mapping or FieldMapping()
+    stats = ImportStats()
+    size = path.stat().st_size
+    conn = await copy_connection(asyncpg_dsn(_build_database_url()))
+    last_report = stats.started
+    try:
+        await conn.execute(CREATE_STAGING_SQL)
+        with open(path, "rb") as raw:
+            # Keyed by source_id: the last occurrence within a chunk wins,
+            # as it would across chunks.
+            chunk: Dict[str, tuple] = {}
+            for record in open_records(path, fmt, raw, delimiter):
+                stats.read += 1
+                row, reason = mapping.to_row(record)
+                if row is None:
+                    stats.skip(reason)
+                    continue
+                if row[6] in chunk:
+                    stats.skip("duplicate id")
+                chunk[row[6]] = row
+                if len(chunk) >= chunk_size:
+                    await _write_chunk(conn, source, chunk, stats)
+                    chunk = {}
+                    now = time.perf_counter()
+                    if now - last_report >= 1.0:
+                        last_report = now
+                        print(f"  {stats.line(raw.tell(), size)}", flush=True)
+            if chunk:
+                await _write_chunk(conn, source, chunk, stats)
+        if stats.inserted or stats.updated:
+            await conn.execute("ANALYZE places")
+            # Raw upserts bypass ORM change tracking; running servers drop cached results.
+            await notify_places_changed(conn, "import_places")
+    finally:
+        await conn.close()
+    return stats
+
+
+def _parse_mapping(pairs: List[str]) -> Dict[str, str]:
+    fields = {name: name for name in MAPPED_FIELDS}
+    for pair in pairs:
+        column, sep, source_field = pair.partition("=")
+        if not sep or column not in MAPPED_FIELDS or not source_field:
+            raise SystemExit(f"--map expects COLUMN=FIELD with COLUMN in {MAPPED_FIELDS}, got {pair!r}")
+        fields[column] = source_field
+    return fields
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Stream a GeoJSON FeatureCollection, NDJSON or CSV file (optionally .gz) into places, "
+            "upserting on (source, source id) so re-imports only touch changed rows."
+        )
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--source", required=True, help="Dataset name stored in places.source, e.g. osm-arkhangelsk.")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension).")
+    parser.add_argument(
+        "--map",
+        action="append",
+        default=[],
+        metavar="COLUMN=FIELD",
+        help="Source property for name/category/brand/address (default: same name). Repeatable.",
+    )
+    parser.add_argument("--id-field", default="id", help="Property holding the source id (GeoJSON feature ids win).")
+    parser.add_argument("--lat-field", help="Latitude property for CSV/flat NDJSON (default: lat/latitude/y).")
+    parser.add_argument("--lon-field", help="Longitude property for CSV/flat NDJSON (default: lon/lng/longitude/x).")
+    parser.add_argument("--delimiter", help="CSV delimiter (default: tab for .tsv, comma otherwise).")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per COPY + upsert transaction.")
+    parser.add_argument(
+        "--no-metadata",
+        action="store_true",
+        help="Do not keep unmapped properties in metadata_json.",
+    )
+    args = parser.parse_args()
+
+    mapping = FieldMapping(
+        fields=_parse_mapping(args.map),
+        id_field=args.id_field,
+        lat_field=args.lat_field,
+        lon_field=args.lon_field,
+        keep_metadata=not args.no_metadata,
+    )
+    stats = asyncio.run(
+        import_places(args.path, args.source, args.format, mapping, max(1, args.chunk_size), args.delimiter)
+    )
+    print(f"Done: {stats.line()}.")
+    for reason, count in sorted(stats.skipped.items()):
+        print(f"  skipped ({reason}): {count:,}")
+
+
+if __name__ == "__main__":
+    main()
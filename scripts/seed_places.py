@@ -1,14 +1,16 @@
 import argparse
 import asyncio
+import itertools
 import math
 import os
 import random
 import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
-from sqlalchemy import delete
+from sqlalchemy import delete, text
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
@@ -17,6 +19,16 @@ if str(ROOT_DIR) not in sys.path:
 
 from app.models.place import Place
 from app.core.env import load_env
+from app.core.geocell import cell_keys
+from app.repositories.places_copy import (
+    PLACES_CHANGED_CHANNEL,
+    address_street_norm,
+    asyncpg_dsn,
+    copy_connection,
+    ewkb_point,
+    notify_places_changed,
+)
+from scripts.synthetic_places import PlaceColumns, iter_synthetic_places, load_spec
 
 
 load_env()
@@ -36,9 +48,6 @@ def _build_database_url() -> str:
     raise RuntimeError("DATABASE_URL or DB_* environment variables must be set")
 
 
-DATABASE_URL = _build_database_url()
-
-
 CENTER_LAT = 64.5430
 CENTER_LON = 40.5369
 
@@ -163,6 +172,11 @@ def base_places() -> List[SeedPlace]:
 
 
 def generate_random_places(count: int, seed: int) -> List[SeedPlace]:
+    return list(iter_random_places(count, seed))
+
+
+def iter_random_places(count: int, seed: int) -> Iterator[SeedPlace]:
+    # Lazy so bulk loads never hold every row in memory.
     rng = random.Random(seed)
     categories = [
         ("аптека", None),
@@ -181,7 +195,6 @@ def generate_random_places(count: int, seed: int) -> List[SeedPlace]:
         "Ломоносова проспект",
     ]
 
-    places: List[SeedPlace] = []
     for i in range(count):
         category, brand = rng.choice(categories)
         street = rng.choice(streets)
@@ -197,21 +210,18 @@ def generate_random_places(count: int, seed: int) -> List[SeedPlace]:
         if brand:
             name = f"{brand} {i + 1}"
 
-        places.append(
-            SeedPlace(
-                name=name,
-                category=category,
-                brand=brand,
-                address=f"{street}, {house}",
-                lat=lat,
-                lon=lon,
-            )
+        yield SeedPlace(
+            name=name,
+            category=category,
+            brand=brand,
+            address=f"{street}, {house}",
+            lat=lat,
+            lon=lon,
         )
-    return places
 
 
 async def seed(reset: bool, random_count: int, seed_value: int) -> int:
-    engine = create_async_engine(DATABASE_URL, echo=False)
+    engine = create_async_engine(_build_database_url(), echo=False)
     Session = async_sessionmaker(engine, expire_on_commit=False)
 
     base = base_places()
@@ -236,12 +246,124 @@ async def seed(reset: bool, random_count: int, seed_value: int) -> int:
                 for p in all_places
             ]
         )
+        # Running servers drop cached results once this commits.
+        await session.execute(
+            text("SELECT pg_notify(:channel, :reason)"), {"channel": PLACES_CHANGED_CHANNEL, "reason": "seed_places"}
+        )
         await session.commit()
 
     await engine.dispose()
     return len(all_places)
 
 
+COPY_COLUMNS = ["name", "category", "brand", "address", "street_norm", "geog", "cell_key", "source"]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def place_rows(places: Iterable[SeedPlace]) -> Iterator[tuple]:
+    for p in places:
+        yield p.name, p.category, p.brand, p.address, p.lat, p.lon
+
+
+def synthetic_rows(count: int, seed_value: int, spec: Optional[dict] = None) -> Iterator[tuple]:
+    """Multi-city synthetic places (scripts/synthetic_places.py), one block in memory at a time."""
+    for block in iter_synthetic_places(count, seed_value, spec):
+        yield from block.rows()
+
+
+def copy_records(rows: List[tuple], source: str = "seed") -> List[tuple]:
+    """
+    COPY rows for (name, category, brand, address, lat, lon) tuples, with the
+    derived columns the ORM would fill (street_norm, cell_key).
+    """
+    keys = cell_keys([row[4] for row in rows], [row[5] for row in rows]).tolist()
+    return [
+        (
+            name,
+            category,
+            brand,
+            address,
+            address_street_norm(address),
+            ewkb_point(lon, lat),
+            key,
+            source,
+        )
+        for (name, category, brand, address, lat, lon), key in zip(rows, keys)
+    ]
+
+
+async def bulk_seed(
+    reset: bool,
+    rows: Iterable[tuple],
+    chunk_size: int = 50_000,
+    connections: int = 1,
+    source: str = "seed",
+) -> int:
+    """
+    Stream (name, category, brand, address, lat, lon) rows into places with
+    binary COPY, chunk_size rows at a time over `connections` parallel
+    connections. Rows are consumed lazily, so memory stays at a few chunks
+    per connection.
+    """
+    dsn = asyncpg_dsn(_build_database_url())
+    conns = [await copy_connection(dsn) for _ in range(connections)]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=connections * 2)
+    loaded = 0
+    started = time.perf_counter()
+    last_report = started
+
+    async def writer(conn) -> None:
+        nonlocal loaded, last_report
+        while True:
+            records = await queue.get()
+            if records is None:
+                return
+            await conn.copy_records_to_table("places", records=records, columns=COPY_COLUMNS)
+            loaded += len(records)
+            now = time.perf_counter()
+            if now - last_report >= 1.0:
+                last_report = now
+                print(f"  {loaded:,} rows, {loaded / (now - started):,.0f} rows/s", flush=True)
+
+    async def produce() -> None:
+        for chunk in _chunks(rows, chunk_size):
+            await queue.put(copy_records(chunk, source))
+        for _ in conns:
+            await queue.put(None)
+
+    try:
+        if reset:
+            # Bulk alternative to the ORM path's DELETE.
+            await conns[0].execute("TRUNCATE places")
+        tasks = [asyncio.create_task(produce())] + [asyncio.create_task(writer(conn)) for conn in conns]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A failed COPY stops the rest instead of leaving the producer blocked on a full queue.
+            for task in tasks:
+                task.cancel()
+        await conns[0].execute("ANALYZE places")
+        # COPY bypasses ORM change tracking; running servers drop cached results.
+        await notify_places_changed(conns[0], "seed_places")
+    finally:
+        for conn in conns:
+            await conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Copied {loaded:,} rows in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f} rows/s).")
+    return loaded
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Seed places around central Archangelsk.")
     parser.add_argument(
@@ -261,8 +383,54 @@ def main() -> None:
         default=42,
         help="Random seed for deterministic output.",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Stream rows with binary COPY instead of ORM inserts (for millions of rows).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=50_000,
+        help="Rows per COPY in --bulk mode.",
+    )
+    parser.add_argument(
+        "--connections",
+        type=int,
+        default=1,
+        help="Parallel COPY connections in --bulk mode.",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="N",
+        help="Bulk-load N generated multi-city places (see scripts/synthetic_places.py) instead of the samples.",
+    )
+    parser.add_argument(
+        "--spec",
+        type=Path,
+        help="City/category spec JSON for --synthetic.",
+    )
+    parser.add_argument(
+        "--from-file",
+        type=Path,
+        help="Bulk-load places from a .npz written by scripts/synthetic_places.py.",
+    )
     args = parser.parse_args()
 
+    connections = max(1, args.connections)
+    if args.from_file:
+        rows = PlaceColumns.load(args.from_file).rows()
+        asyncio.run(bulk_seed(args.reset, rows, args.chunk_size, connections, source="synthetic"))
+        return
+    if args.synthetic:
+        rows = synthetic_rows(args.synthetic, args.seed, load_spec(args.spec))
+        asyncio.run(bulk_seed(args.reset, rows, args.chunk_size, connections, source="synthetic"))
+        return
+    if args.bulk:
+        rows = place_rows(itertools.chain(base_places(), iter_random_places(args.random_count, args.seed)))
+        asyncio.run(bulk_seed(args.reset, rows, args.chunk_size, connections))
+        return
     inserted = asyncio.run(seed(args.reset, args.random_count, args.seed))
     print(f"Inserted {inserted} places.")
 
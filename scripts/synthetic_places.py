@@ -0,0 +1,294 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+# Rows are generated in fixed blocks, each from its own child seed, so the
+# data for a seed is identical however it is consumed (file or loader).
+BLOCK_SIZE = 1_000_000
+METERS_PER_DEGREE = 111_320.0
+
+STREET_NAMES = [
+    "Ленина", "Мира", "Гагарина", "Пушкина", "Ломоносова", "Кирова", "Победы", "Горького",
+    "Маяковского", "Чкалова", "Труда", "Лермонтова", "Чехова", "Тимирязева", "Суворова",
+    "Жукова", "Мичурина", "Некрасова", "Калинина", "Фрунзе",
+]
+STREET_TYPES = ["улица", "проспект", "переулок", "бульвар"]
+
+# Weights are shares of all places; brand weights are shares within the
+# category, the rest being unbranded. Categories match app/data/categories.json.
+DEFAULT_SPEC = {
+    "cities": [
+        {"name": "Москва", "lat": 55.7558, "lon": 37.6173, "radius_km": 18.0, "weight": 0.40, "streets": 80},
+        {"name": "Санкт-Петербург", "lat": 59.9386, "lon": 30.3141, "radius_km": 14.0, "weight": 0.22, "streets": 80},
+        {"name": "Новосибирск", "lat": 55.0084, "lon": 82.9357, "radius_km": 10.0, "weight": 0.10, "streets": 60},
+        {"name": "Екатеринбург", "lat": 56.8389, "lon": 60.6057, "radius_km": 9.0, "weight": 0.09, "streets": 60},
+        {"name": "Казань", "lat": 55.7961, "lon": 49.1064, "radius_km": 9.0, "weight": 0.08, "streets": 50},
+        {"name": "Архангельск", "lat": 64.5430, "lon": 40.5369, "radius_km": 6.0, "weight": 0.07, "streets": 30},
+        {"name": "Северодвинск", "lat": 64.5635, "lon": 39.8302, "radius_km": 4.0, "weight": 0.04, "streets": 20},
+    ],
+    # Share of places strung along commercial streets; the rest fall off
+    # from the centre as a Gaussian with sigma = radius_km / 2.
+    "street_share": 0.6,
+    "street_length_km": [0.5, 3.0],
+    "street_width_m": 15.0,
+    "categories": [
+        {"name": "продукты", "weight": 0.40, "brands": {"Магнит": 0.30, "Пятёрочка": 0.35}},
+        {"name": "аптека", "weight": 0.30, "brands": {}},
+        {"name": "кондитерская", "weight": 0.15, "brands": {}},
+        {"name": "зоомагазин", "weight": 0.13, "brands": {"Чемпион": 0.30}},
+        {"name": "арена", "weight": 0.02, "brands": {"Титан-Арена": 0.20}},
+    ],
+}
+
+NAME_PREFIXES = {
+    "аптека": "Аптека",
+    "продукты": "Магазин",
+    "кондитерская": "Кондитерская",
+    "зоомагазин": "Зоомагазин",
+    "арена": "Арена",
+}
+
+
+@dataclass
+class PlaceColumns:
+    """
+    Generated places as dictionary-encoded columns: per-row codes into the
+    small string tables, so tens of millions of rows stay compact.
+    """
+
+    latitude: np.ndarray
+    longitude: np.ndarray
+    city: np.ndarray  # int16 into cities
+    category: np.ndarray  # int16 into categories
+    brand: np.ndarray  # int16 into brands, -1 = unbranded
+    street: np.ndarray  # int32 into streets
+    house: np.ndarray  # int16
+    cities: np.ndarray
+    categories: np.ndarray
+    brands: np.ndarray
+    streets: np.ndarray
+    # Global index of the first row, for names that stay unique across blocks.
+    offset: int = 0
+
+    def __len__(self) -> int:
+        return len(self.latitude)
+
+    def rows(self) -> Iterator[tuple]:
+        """(name, category, brand, address, lat, lon) per row, as seed_places writes them."""
+        categories = self.categories.tolist()
+        brands = self.brands.tolist()
+        streets = self.streets.tolist()
+        columns = zip(
+            self.category.tolist(), self.brand.tolist(), self.street.tolist(), self.house.tolist(),
+            self.latitude.tolist(), self.longitude.tolist(),
+        )
+        for i, (category, brand, street, house, lat, lon) in enumerate(columns, start=self.offset + 1):
+            category_name = categories[category]
+            brand_name = brands[brand] if brand >= 0 else None
+            label = brand_name or NAME_PREFIXES.get(category_name, category_name.capitalize())
+            yield f"{label} {i}", category_name, brand_name, f"{streets[street]}, {house}", lat, lon
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            **{name: getattr(self, name) for name in _ARRAY_FIELDS},
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "PlaceColumns":
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in _ARRAY_FIELDS})
+
+    @classmethod
+    def concat(cls, parts: List["PlaceColumns"]) -> "PlaceColumns":
+        first = parts[0]
+        per_row = {
+            name: np.concatenate([getattr(part, name) for part in parts])
+            for name in ("latitude", "longitude", "city", "category", "brand", "street", "house")
+        }
+        return cls(
+            **per_row, cities=first.cities, categories=first.categories, brands=first.brands,
+            streets=first.streets, offset=first.offset,
+        )
+
+
+_ARRAY_FIELDS = (
+    "latitude", "longitude", "city", "category", "brand", "street", "house",
+    "cities", "categories", "brands", "streets",
+)
+
+
+def load_spec(path: Optional[Path]) -> dict:
+    if path is None:
+        return DEFAULT_SPEC
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    # Unspecified keys keep their defaults.
+    return {**DEFAULT_SPEC, **spec}
+
+
+class _Layout:
+    """Per-city commercial streets and name tables; drawn once per seed."""
+
+    def __init__(self, spec: dict, rng: np.random.Generator):
+        cities = spec["cities"]
+        self.city_names = np.array([c["name"] for c in cities])
+        self.city_weights = _normalized([c["weight"] for c in cities])
+        self.street_share = float(spec["street_share"])
+        self.street_width_m = float(spec["street_width_m"])
+
+        combos = [f"{kind} {name}" for kind in STREET_TYPES for name in STREET_NAMES]
+        street_table: List[str] = []
+        self.cities = []
+        min_km, max_km = spec["street_length_km"]
+        for city in cities:
+            n_streets = max(1, min(int(city.get("streets", 30)), len(combos)))
+            radius_m = float(city["radius_km"]) * 1000
+            # Commercial streets start near the centre, with Zipf-like traffic.
+            start = rng.normal(0.0, radius_m / 3, size=(n_streets, 2))
+            length = rng.uniform(min_km * 1000, max_km * 1000, size=n_streets)
+            bearing = rng.uniform(0, 2 * np.pi, size=n_streets)
+            names = rng.choice(len(combos), size=n_streets, replace=False)
+            codes = np.arange(len(street_table), len(street_table) + n_streets, dtype=np.int32)
+            street_table.extend(combos[i] for i in names)
+            self.cities.append(
+                {
+                    "lat": float(city["lat"]),
+                    "lon": float(city["lon"]),
+                    "sigma_m": radius_m / 2,
+                    "start": start,
+                    "direction": np.stack([np.cos(bearing), np.sin(bearing)], axis=1) * length[:, None],
+                    "weights": _normalized(1.0 / np.arange(1, n_streets + 1)),
+                    "codes": codes,
+                }
+            )
+        self.streets = np.array(street_table)
+
+        categories = spec["categories"]
+        self.categories = np.array([c["name"] for c in categories])
+        self.category_weights = _normalized([c["weight"] for c in categories])
+        brand_table: List[str] = []
+        self.brand_choices = []
+        for category in categories:
+            brands = category.get("brands") or {}
+            codes = []
+            for brand in brands:
+                if brand not in brand_table:
+                    brand_table.append(brand)
+                codes.append(brand_table.index(brand))
+            shares = list(brands.values())
+            unbranded = max(0.0, 1.0 - sum(shares))
+            self.brand_choices.append(
+                (np.array(codes + [-1], dtype=np.int16), _normalized(shares + [unbranded]))
+            )
+        self.brands = np.array(brand_table, dtype=str)
+
+
+def _normalized(weights) -> np.ndarray:
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def _block(layout: _Layout, count: int, rng: np.random.Generator, offset: int) -> PlaceColumns:
+    per_city = rng.multinomial(count, layout.city_weights)
+    lat_parts, lon_parts, city_parts, street_parts = [], [], [], []
+    for code, (city, n) in enumerate(zip(layout.cities, per_city)):
+        on_street = rng.binomial(n, layout.street_share)
+        off_street = n - on_street
+
+        # Along streets: a point on the segment plus a little sideways spread.
+        street = rng.choice(len(city["codes"]), size=on_street, p=city["weights"])
+        t = rng.random(on_street)[:, None]
+        along = city["start"][street] + t * city["direction"][street]
+        along += rng.normal(0.0, layout.street_width_m, size=(on_street, 2))
+        # Elsewhere: denser towards the centre, on any of the city's streets.
+        around = rng.normal(0.0, city["sigma_m"], size=(off_street, 2))
+        any_street = rng.integers(0, len(city["codes"]), size=off_street)
+
+        offsets = np.concatenate([along, around])  # (north, east) metres
+        lat = city["lat"] + offsets[:, 0] / METERS_PER_DEGREE
+        lon = city["lon"] + offsets[:, 1] / (METERS_PER_DEGREE * np.cos(np.radians(lat)))
+        lat_parts.append(lat)
+        lon_parts.append(lon)
+        city_parts.append(np.full(n, code, dtype=np.int16))
+        street_parts.append(city["codes"][np.concatenate([street, any_street])])
+
+    category = rng.choice(len(layout.categories), size=count, p=layout.category_weights).astype(np.int16)
+    brand = np.full(count, -1, dtype=np.int16)
+    for code, (brand_codes, brand_weights) in enumerate(layout.brand_choices):
+        rows = np.flatnonzero(category == code)
+        brand[rows] = rng.choice(brand_codes, size=len(rows), p=brand_weights)
+
+    return PlaceColumns(
+        latitude=np.clip(np.concatenate(lat_parts), -90.0, 90.0),
+        longitude=(np.concatenate(lon_parts) + 180.0) % 360.0 - 180.0,
+        city=np.concatenate(city_parts),
+        category=category,
+        brand=brand,
+        street=np.concatenate(street_parts).astype(np.int32),
+        house=rng.integers(1, 120, size=count, dtype=np.int16),
+        cities=layout.city_names,
+        categories=layout.categories,
+        brands=layout.brands,
+        streets=layout.streets,
+        offset=offset,
+    )
+
+
+def iter_synthetic_places(count: int, seed: int, spec: Optional[dict] = None) -> Iterator[PlaceColumns]:
+    """Blocks of up to BLOCK_SIZE generated places; deterministic for (count, seed, spec)."""
+    if count < 0:
+        raise ValueError(f"count must be >= 0, got {count}")
+    layout_seed, *block_seeds = np.random.SeedSequence(seed).spawn(1 + -(-count // BLOCK_SIZE))
+    layout = _Layout(spec or DEFAULT_SPEC, np.random.default_rng(layout_seed))
+    for index, block_seed in enumerate(block_seeds):
+        offset = index * BLOCK_SIZE
+        yield _block(layout, min(BLOCK_SIZE, count - offset), np.random.default_rng(block_seed), offset)
+
+
+def generate_synthetic_places(count: int, seed: int, spec: Optional[dict] = None) -> PlaceColumns:
+    blocks = list(iter_synthetic_places(count, seed, spec))
+    if not blocks:
+        # count == 0: no rows, but the string tables of the same layout as any other count.
+        (layout_seed,) = np.random.SeedSequence(seed).spawn(1)
+        layout = _Layout(spec or DEFAULT_SPEC, np.random.default_rng(layout_seed))
+        return _block(layout, 0, np.random.default_rng(layout_seed), 0)
+    return PlaceColumns.concat(blocks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Generate synthetic places over several cities (clustered commercial streets, "
+            "configurable category/brand mix) into a columnar .npz file. Load it, or generate "
+            "straight into the database, with scripts/seed_places.py --bulk --synthetic N."
+        )
+    )
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--spec", type=Path, help="JSON overriding cities/categories (see DEFAULT_SPEC).")
+    parser.add_argument("--out", type=Path, required=True, help="Output .npz path.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    columns = generate_synthetic_places(args.count, args.seed, load_spec(args.spec))
+    generated = time.perf_counter() - started
+    columns.save(args.out)
+    print(
+        f"Generated {len(columns):,} places in {generated:.1f}s "
+        f"({len(columns) / max(generated, 1e-9):,.0f} rows/s) -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
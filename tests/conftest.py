@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.models.base import Base
 from app.main import app
-from app.core.db import get_session
+from app.core.db import get_read_session, get_session
 from app.core.env import load_env
 
 load_env()
@@ -66,6 +66,7 @@ async def client(db_session):
         yield db_session
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
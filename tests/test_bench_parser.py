@@ -0,0 +1,19 @@
+from benchmarks.bench_parser import compare
+from benchmarks.corpus import generate_contexts
+
+
+def _result(rps, p50):
+    return {"throughput_per_s": rps, "stages": {"total": {"p50_us": p50, "p99_us": p50 * 2}}}
+
+
+def test_generated_corpus_is_deterministic():
+    assert generate_contexts(20, seed=3) == generate_contexts(20, seed=3)
+    assert generate_contexts(20, seed=3) != generate_contexts(20, seed=4)
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = _result(rps=1000, p50=10.0)
+
+    assert compare(_result(rps=900, p50=11.0), baseline, threshold=0.2) == []
+    problems = compare(_result(rps=700, p50=13.0), baseline, threshold=0.2)
+    assert len(problems) == 2
@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+from benchmarks.bench_search_load import build_payloads, closed_loop, compare, open_loop, summarize
+
+
+def _result(rps, p50, p99, error_rate=0.0):
+    return {"rps": rps, "error_rate": error_rate, "latency_ms": {"p50": p50, "p99": p99}}
+
+
+def test_payloads_are_deterministic_and_well_formed():
+    locations = [(64.5430, 40.5369), (55.7558, 37.6173)]
+    contexts = ["аптека", "продукты Магнит"]
+
+    first = build_payloads(locations, contexts, 50, seed=3)
+
+    assert first == build_payloads(locations, contexts, 50, seed=3)
+    assert first != build_payloads(locations, contexts, 50, seed=4)
+    for payload in first:
+        lat, lon = map(float, payload["location"].split(":"))
+        assert -90 <= lat <= 90 and -180 <= lon <= 180
+        assert payload["context"] in contexts
+
+
+def test_summary_skips_warmup_and_counts_errors():
+    samples = [(0.5, 1.0, 200)] + [(2.0 + i / 100, 0.010, 200) for i in range(99)] + [(3.0, 0.5, 500)]
+
+    summary = summarize(samples, warmup_s=1.0, duration_s=11.0)
+
+    assert summary["requests"] == 100
+    assert summary["errors"] == 1
+    assert summary["rps"] == 9.9
+    assert summary["latency_ms"]["p50"] == 10.0
+    assert summary["latency_ms"]["max"] == 500.0
+    assert summary["status"] == {"200": 99, "500": 1}
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = _result(rps=500, p50=10.0, p99=40.0)
+
+    assert compare(_result(rps=450, p50=11.0, p99=45.0), baseline, threshold=0.2) == []
+    problems = compare(_result(rps=300, p50=15.0, p99=80.0, error_rate=0.05), baseline, threshold=0.2)
+    assert len(problems) == 4
+
+
+def test_closed_loop_hands_out_payloads_in_order():
+    sent = []
+
+    async def send(payload):
+        sent.append(payload["i"])
+        await asyncio.sleep(0)
+        return 200
+
+    payloads = [{"i": i} for i in range(5)]
+    samples = asyncio.run(closed_loop(send, payloads, concurrency=3, duration_s=0.05))
+
+    assert len(samples) == len(sent)
+    # Payloads are handed out round-robin, in order.
+    assert sent == [i % 5 for i in range(len(sent))]
+    assert all(status == 200 and offset >= 0 for offset, _, status in samples)
+
+
+def test_open_loop_sends_every_scheduled_arrival_in_order():
+    rate, duration, seed = 400, 0.1, 3
+    rng = random.Random(seed)
+    arrivals, offset = 0, rng.expovariate(rate)
+    while offset < duration:
+        arrivals += 1
+        offset += rng.expovariate(rate)
+
+    async def send(payload):
+        await asyncio.sleep(0)
+        return 200 if payload["i"] % 2 else 503
+
+    payloads = [{"i": i} for i in range(arrivals)]
+    samples = asyncio.run(open_loop(send, payloads, rate=rate, concurrency=1, duration_s=duration, seed=seed))
+
+    # Arrivals depend only on the seed, never on how fast the service answers.
+    assert len(samples) == arrivals
+    offsets = [offset for offset, _, _ in samples]
+    assert offsets == sorted(offsets)
+    assert [status for _, _, status in samples] == [200 if i % 2 else 503 for i in range(arrivals)]
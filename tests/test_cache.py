@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.cache import LRUCache
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.evictions == 1
+
+
+def test_lru_cache_resize_shrinks():
+    cache = LRUCache(maxsize=3)
+    for key in "abc":
+        cache.set(key, key)
+
+    cache.resize(1)
+
+    assert len(cache) == 1
+    assert "c" in cache
+    assert cache.evictions == 2
+
+
+def test_lru_cache_rejects_negative_size():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=-1)
+
+
+def test_lru_cache_ttl_expires_entries():
+    now = [100.0]
+    cache = LRUCache(maxsize=4, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+
+    now[0] = 105.0
+    assert cache.get("a") == 1
+
+    now[0] = 111.0
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
@@ -52,3 +52,122 @@ def test_go_to_titan_arena_without_dash():
     txt = "Заехать в Титан Арену"
     parsed = parse_context(txt)
     assert parsed.brand is not None or parsed.category == "арена"
+
+
+def test_lemma_cache_hits_on_repeated_context():
+    from app.services import context_parser
+
+    context_parser._LEMMA_CACHE.clear()
+    parse_context("Купить корм в Чемпионе")
+    misses = context_parser.lemma_cache_stats()["misses"]
+    parse_context("Купить корм в Чемпионе")
+
+    stats = context_parser.lemma_cache_stats()
+    assert stats["misses"] == misses
+    assert stats["hits"] >= 4
+
+
+def test_prefill_lemma_cache_covers_dictionary_lemmas():
+    from app.services import context_parser
+
+    context_parser._LEMMA_CACHE.clear()
+    size = context_parser.prefill_lemma_cache()
+
+    assert size > 0
+    assert "аптека" in context_parser._LEMMA_CACHE
+    assert "чемпион" in context_parser._LEMMA_CACHE
+    assert context_parser.lemma_cache_stats()["misses"] == 0
+
+
+def _reference_detect_street(original_text, normalized_text):
+    # Copy of the previous multi-scan implementation, kept for parity checks.
+    import re
+    from app.services.context_parser import _STREET_PATTERNS, _lemmatize_list, _tokens
+
+    for pat in _STREET_PATTERNS:
+        m = re.search(pat, original_text, flags=re.IGNORECASE)
+        if m:
+            street_raw = m.group(1).strip()
+            street_raw = re.sub(r"\s+(улица|ул|проспект|пр|пер|переулок|район)$", "", street_raw, flags=re.IGNORECASE)
+            tokens = _tokens(street_raw.lower())
+            return " ".join(_lemmatize_list(tokens)).strip()
+    m2 = re.search(r"на\s+([а-яa-z0-9\-\s]+)$", normalized_text)
+    if m2:
+        tokens = _tokens(m2.group(1).strip().lower())
+        return " ".join(_lemmatize_list(tokens)).strip()
+    return None
+
+
+def _generated_street_contexts(count, seed):
+    import random
+
+    rng = random.Random(seed)
+    heads = ["Купить лекарства в аптеке", "Заказать торт", "Купить корм в Чемпионе", "Найти", "", "Магазин"]
+    markers = ["на улице", "на ул.", "на ул", "НА УЛИЦЕ", "на проспекте", "на пер.", "на переулке", "на пер",
+               "на", "На", "в районе", "в РАЙОНЕ", "возле", ""]
+    streets = ["Троицком", "Воскресенской", "Ломоносова", "Северной Двины", "Пятёрочки", "Троицкий проспект",
+               "Поморская ул", "Садовой 5", "Набережной", "Гагарина-2"]
+    tails = ["", ".", "!", "?", ", 5", " дом 3", " улица", " ул", " район", " на Троицком", " в районе Центра",
+             " на улице Поморской", "!!", " на", " на.", "..."]
+    out = []
+    for _ in range(count):
+        parts = [rng.choice(heads), rng.choice(markers), rng.choice(streets)]
+        text = " ".join(p for p in parts if p) + rng.choice(tails)
+        if rng.random() < 0.2:
+            text = text.upper()
+        out.append(text.strip())
+    return out
+
+
+def test_street_detection_matches_reference_implementation():
+    from app.services.context_parser import _detect_street, _normalize_text
+
+    for text in _generated_street_contexts(3000, seed=5):
+        expected = _reference_detect_street(text, _normalize_text(text))
+        assert _detect_street(text) == expected, text
+
+
+def test_parse_cache_serves_repeated_phrasing():
+    from app.services import context_parser
+
+    context_parser.configure_parse_cache(maxsize=16)
+    context_parser.clear_parse_cache()
+    try:
+        first = parse_context("Купить корм в Чемпионе")
+        second = parse_context("  купить КОРМ в  чемпионе ")
+
+        stats = context_parser.parse_cache_stats()
+        assert second is first
+        assert stats["hits"] == 1
+        assert stats["size"] == 1
+    finally:
+        context_parser.configure_parse_cache(maxsize=0)
+
+
+def test_parse_cache_invalidated_when_dictionaries_change(monkeypatch):
+    from app.services import context_parser
+    from app.services.lexicon import Lexicon
+
+    context_parser.configure_parse_cache(maxsize=16)
+    context_parser.clear_parse_cache()
+    try:
+        assert parse_context("Зайти в Ленту").brand is None
+
+        lexicon = Lexicon(category_lemmas={}, brand_lemma_map={"лента": "Лента"})
+        monkeypatch.setattr(context_parser, "_LEXICON", lexicon)
+
+        assert parse_context("Зайти в Ленту").brand == "Лента"
+    finally:
+        context_parser.configure_parse_cache(maxsize=0)
+
+
+def test_normalize_street_matches_parsed_and_stored_forms():
+    from app.services.context_parser import normalize_street
+
+    assert normalize_street("Троицкий проспект, 35") == "троицкий"
+    assert normalize_street(parse_context("Аптека на Троицком проспекте").street) == "троицкий"
+    assert normalize_street("Воскресенская ул., 7") == normalize_street(
+        parse_context("Заказать торт на Воскресенской").street
+    )
+    assert normalize_street("Набережная Северной Двины, 30") == "северный двина"
+    assert normalize_street(None) is None
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.services import context_parser
+from app.services.dictionary_reloader import watch_dictionaries
+
+
+@pytest.fixture
+def data_files(tmp_path, monkeypatch):
+    categories = tmp_path / "categories.json"
+    brands = tmp_path / "brands.json"
+    categories.write_text(json.dumps({"продукты": ["продукты", "магазин"]}), encoding="utf-8")
+    brands.write_text(json.dumps(["Магнит"]), encoding="utf-8")
+
+    monkeypatch.setattr(context_parser, "CATEGORIES_PATH", categories)
+    monkeypatch.setattr(context_parser, "BRANDS_PATH", brands)
+    monkeypatch.setattr(context_parser, "LEXICON_ARTIFACT_PATH", tmp_path / "lexicon.json")
+    # Restore the real tables after the test.
+    monkeypatch.setattr(context_parser, "_LEXICON", context_parser._get_lexicon())
+    monkeypatch.setattr(context_parser, "_CATEGORIES_CONFIG", context_parser._CATEGORIES_CONFIG)
+    monkeypatch.setattr(context_parser, "_BRANDS", context_parser._BRANDS)
+    context_parser.reload_lexicon()
+    return categories, brands
+
+
+def test_reload_swaps_in_new_tables(data_files):
+    _, brands = data_files
+    old = context_parser._get_lexicon()
+    assert context_parser.parse_context("Зайти в Ленту").brand is None
+
+    brands.write_text(json.dumps(["Магнит", "Лента"]), encoding="utf-8")
+    new = context_parser.reload_lexicon()
+
+    assert new is context_parser._get_lexicon()
+    assert new.generation != old.generation
+    assert context_parser.parse_context("Зайти в Ленту").brand == "Лента"
+    # The previous tables stay intact for requests that still hold them.
+    assert "лента" not in old.brand_lemma_map
+
+
+@pytest.mark.asyncio
+async def test_watcher_reloads_on_file_change(data_files):
+    categories, _ = data_files
+    generation = context_parser._get_lexicon().generation
+    watcher = asyncio.create_task(watch_dictionaries(0.01))
+    try:
+        await asyncio.sleep(0.05)
+        categories.write_text(json.dumps({"аптека": ["аптека"], "продукты": ["продукты"]}), encoding="utf-8")
+        for _ in range(200):
+            if context_parser._get_lexicon().generation != generation:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        watcher.cancel()
+
+    assert context_parser.parse_context("Купить лекарства в аптеке").category == "аптека"
+
+
+@pytest.mark.asyncio
+async def test_reload_endpoint_requires_admin_token(data_files, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        denied = await client.post("/admin/reload-dictionaries")
+        allowed = await client.post("/admin/reload-dictionaries", headers={"X-Admin-Token": "secret"})
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.json()["brands"] == 1
+    assert allowed.json()["generation"] == context_parser._get_lexicon().generation
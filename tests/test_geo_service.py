@@ -110,3 +110,30 @@ async def test_find_nearest_places_street_filter(db_session):
     names = [r["place"].name for r in results]
     assert "Аптека на Троицком" in names
     assert "Аптека на Воскресенской" not in names
+
+
+@pytest.mark.asyncio
+async def test_street_norm_filled_on_write_and_used_by_filter(db_session):
+    place = Place(
+        name="Аптека на Троицком",
+        category="аптека",
+        brand=None,
+        address="Троицкий проспект, 35",
+        geog="SRID=4326;POINT(40.5386 64.5426)",
+        source="test",
+    )
+    db_session.add(place)
+    await db_session.commit()
+
+    assert place.street_norm == "троицкий"
+
+    service = GeoService(db_session)
+    # Parser output for "на Троицком проспекте" keeps the street type word.
+    results = await service.find_nearest_places(
+        latitude=64.5430,
+        longitude=40.5369,
+        radius_m=500,
+        street="троицкий проспект",
+    )
+
+    assert [r["place"].name for r in results] == ["Аптека на Троицком"]
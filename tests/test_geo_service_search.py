@@ -1,10 +1,13 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch
 
-from app.services.geo_service import GeoService
+from app.services import geo_service
+from app.services.geo_service import GeoService, search_coalescing_stats
 from app.services.context_parser import ParsedContext
-from app.models.schemas import SearchRequest
-from app.models.place import Place
+from app.models.schemas import BatchSearchRequest, SearchRequest
+from app.repositories.places_repository import NearbyPlace
 
 
 @pytest.mark.asyncio
@@ -19,25 +22,15 @@ async def test_search_parses_context_and_calls_repository():
             brand="Магнит",
         )
 
-        fake_place = Place(
-            id=1,
-            name="Магнит",
-            category="продукты",
-            brand="Магнит",
-            address="Набережная Северной Двины, 30",
-            geog="POINT(30 60)",
-            source=None,
-            metadata_json=None,
-        )
-
-        service.find_nearest_places = AsyncMock(
+        service.find_nearest_rows = AsyncMock(
             return_value=[
-                {
-                    "place": fake_place,
-                    "distance_meters": 120.0,
-                    "latitude": 60.0,
-                    "longitude": 30.0,
-                }
+                NearbyPlace(
+                    id=1,
+                    name="Магнит",
+                    latitude=60.0,
+                    longitude=30.0,
+                    distance_meters=120.0,
+                )
             ]
         )
 
@@ -50,7 +43,7 @@ async def test_search_parses_context_and_calls_repository():
 
         mock_parser.assert_called_once_with("купить продукты в Магните")
 
-        service.find_nearest_places.assert_awaited_once_with(
+        service.find_nearest_rows.assert_awaited_once_with(
             latitude=64.5430,
             longitude=40.5369,
             category="продукты",
@@ -75,3 +68,95 @@ async def test_search_invalid_location_returns_empty():
 
     response = await service.search(request)
     assert response.results == []
+
+
+@pytest.mark.asyncio
+async def test_search_batch_keeps_order_and_isolates_bad_items():
+    session = AsyncMock()
+    service = GeoService(session)
+    service.repository = AsyncMock()
+    service.repository.find_nearest_batch.return_value = [
+        [NearbyPlace(id=1, name="Аптека", latitude=64.54, longitude=40.53, distance_meters=10.0)],
+        [],
+    ]
+
+    request = BatchSearchRequest(
+        items=[
+            {"location": "64.5430:40.5369", "context": "найди аптеку"},
+            {"location": "bad", "context": "найди аптеку"},
+            {"location": "64.5500:40.5400", "context": "найди заправку"},
+        ]
+    )
+
+    response = await service.search_batch(request)
+
+    (queries,), _ = service.repository.find_nearest_batch.await_args
+    assert [(q.latitude, q.longitude) for q in queries] == [(64.5430, 40.5369), (64.5500, 40.5400)]
+    assert queries[0].category == "аптека"
+    assert [item.error for item in response.items] == [None, "Location must be 'lat:lon'", None]
+    assert response.items[0].results[0].name == "Аптека"
+    assert response.items[1].results == []
+    assert response.items[2].results == []
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_searches_run_one_query(monkeypatch):
+    monkeypatch.setattr(geo_service, "SEARCH_COALESCE", True)
+    release = asyncio.Event()
+    calls = 0
+
+    async def slow_rows(**kwargs):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return [NearbyPlace(id=1, name="Аптека", latitude=64.54, longitude=40.53, distance_meters=10.0)]
+
+    services = [GeoService(AsyncMock()) for _ in range(3)]
+    for service in services:
+        service.find_nearest_rows = slow_rows
+    requests = [
+        SearchRequest(location="64.54301:40.53691", context="найди аптеку"),
+        SearchRequest(location="64.54302:40.53692", context="аптека рядом"),
+        SearchRequest(location="64.54301:40.53691", context="найди заправку"),
+    ]
+    before = search_coalescing_stats()
+
+    tasks = [asyncio.create_task(s.search(r)) for s, r in zip(services, requests)]
+    await asyncio.sleep(0.05)
+    release.set()
+    responses = await asyncio.gather(*tasks)
+
+    after = search_coalescing_stats()
+    # Same rounded location and filters for the first two; a different category for the third.
+    assert calls == 2
+    assert after["coalesced"] - before["coalesced"] == 1
+    assert after["executed"] - before["executed"] == 2
+    assert responses[0] == responses[1]
+
+
+@pytest.mark.asyncio
+async def test_search_batch_isolates_out_of_range_items():
+    session = AsyncMock()
+    service = GeoService(session)
+    service.repository = AsyncMock()
+    service.repository.find_nearest_batch.return_value = [[]]
+
+    request = BatchSearchRequest(
+        items=[
+            {"location": "100:40", "context": "аптека"},
+            {"location": "64.5430:40.5369", "context": "аптека"},
+            {"location": "nan:0", "context": "аптека"},
+            {"location": "0:-180.5", "context": "аптека"},
+        ]
+    )
+
+    response = await service.search_batch(request)
+
+    (queries,), _ = service.repository.find_nearest_batch.await_args
+    assert [(q.latitude, q.longitude) for q in queries] == [(64.5430, 40.5369)]
+    assert [item.error for item in response.items] == [
+        "Location is out of range",
+        None,
+        "Location is out of range",
+        "Location is out of range",
+    ]
@@ -0,0 +1,56 @@
+import math
+import random
+import struct
+
+import numpy as np
+from geoalchemy2.elements import WKBElement
+
+from app.core.geocell import cell_key, cell_keys, cells_covering
+from app.models.place import _point_lat_lon
+
+
+def _offset(latitude, longitude, distance_m, bearing):
+    d_lat = distance_m * math.cos(bearing) / 111_320.0
+    d_lon = distance_m * math.sin(bearing) / (111_320.0 * math.cos(math.radians(latitude)))
+    return latitude + d_lat, (longitude + d_lon + 180.0) % 360.0 - 180.0
+
+
+def test_vectorized_keys_match_scalar():
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(-90, 90, 1000)
+    lons = rng.uniform(-180, 180, 1000)
+
+    assert cell_keys(lats, lons).tolist() == [cell_key(lat, lon) for lat, lon in zip(lats, lons)]
+
+
+def test_covering_contains_every_point_in_radius():
+    rng = random.Random(7)
+    for _ in range(300):
+        latitude, longitude = rng.uniform(-75, 75), rng.uniform(-180, 180)
+        radius = rng.choice([100, 500, 1000])
+        covering = set(cells_covering(latitude, longitude, radius))
+        for _ in range(20):
+            point = _offset(latitude, longitude, rng.uniform(0, radius), rng.uniform(0, 2 * math.pi))
+            assert cell_key(*point) in covering
+
+
+def test_covering_wraps_the_antimeridian():
+    covering = set(cells_covering(0.0, 179.999, 1000))
+
+    assert cell_key(0.0, 179.9995) in covering
+    assert cell_key(0.0, -179.995) in covering
+
+
+def test_large_radius_falls_back():
+    assert len(cells_covering(64.5430, 40.5369, 500)) <= 30
+    assert cells_covering(64.5430, 40.5369, 50_000) is None
+    assert cells_covering(89.99, 0.0, 500) is None
+
+
+def test_point_coordinates_from_wkt_and_ewkb():
+    # Little-endian point with the SRID flag, as PostGIS returns it.
+    ewkb = struct.pack("<BIIdd", 1, 0x20000001, 4326, 40.5369, 64.5430)
+
+    assert _point_lat_lon("SRID=4326;POINT(40.5369 64.543)") == (64.543, 40.5369)
+    assert _point_lat_lon(WKBElement(ewkb, srid=4326, extended=True)) == (64.5430, 40.5369)
+    assert _point_lat_lon("SRID=4326;LINESTRING(0 0, 1 1)") is None
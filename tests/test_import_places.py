@@ -0,0 +1,138 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from app.core.geocell import cell_key
+from app.models.place import Place
+from app.services.context_parser import normalize_street
+from scripts.import_places import (
+    CSV,
+    GEOJSON,
+    NDJSON,
+    FieldMapping,
+    SourceRecord,
+    detect_format,
+    import_places,
+    iter_geojson_features,
+    read_csv,
+    read_ndjson,
+    staging_records,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+
+def _feature(i, lon=40.5369, lat=64.5430, **properties):
+    return {
+        "type": "Feature",
+        "id": i,
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"name": f"Аптека {i}", "category": "аптека", **properties},
+    }
+
+
+def _collection(features):
+    return {"type": "FeatureCollection", "name": "test", "features": features, "crs": {"type": "name"}}
+
+
+def test_geojson_features_stream_across_small_reads():
+    features = [_feature(i, lon=40.5 + i / 1000, address="Троицкий проспект, 1") for i in range(30)]
+    text = json.dumps(_collection(features), ensure_ascii=False, indent=1)
+
+    assert list(iter_geojson_features(io.StringIO(text))) == features
+    # Odd read sizes split tokens, strings and numbers at every position.
+    for read_size in (1, 3, 7):
+        assert list(iter_geojson_features(io.StringIO(text), read_size=read_size)) == features
+
+
+def test_empty_and_malformed_collections():
+    assert list(iter_geojson_features(io.StringIO('{"type": "FeatureCollection", "features": []}'))) == []
+    with pytest.raises(ValueError):
+        list(iter_geojson_features(io.StringIO('{"features": [{"type": "Feature"} {"type": "Feature"}]}')))
+
+
+def test_malformed_feature_fails_without_buffering_the_rest():
+    good = json.dumps(_feature(1))
+    # An unterminated string swallows everything after it.
+    text = '{"features": [' + good + ', {"type": "Feature", "id": "' + "x" * 100_000 + "]}"
+    stream = io.StringIO(text)
+
+    features = iter_geojson_features(stream, read_size=256, max_feature_size=4096)
+
+    assert next(features) == json.loads(good)
+    with pytest.raises(ValueError, match=f"character {len(good) + 16}"):
+        next(features)
+    assert stream.tell() < 8192
+
+
+def test_ndjson_accepts_features_and_flat_objects():
+    lines = [json.dumps(_feature(1)), "", json.dumps({"id": "b", "name": "Кафе", "lat": 64.5, "lon": 40.5})]
+
+    records = list(read_ndjson(io.StringIO("\n".join(lines))))
+
+    assert records[0].point == (64.5430, 40.5369)
+    assert records[1] == SourceRecord(None, {"id": "b", "name": "Кафе", "lat": 64.5, "lon": 40.5}, None)
+
+
+def test_csv_rows_map_to_places_with_metadata():
+    text = "osm_id,title,amenity,lat,lng,opening_hours\n7,Аптека Север,аптека,64.5436,40.5351,24/7\n8,,кафе,64.5,40.5,\n"
+    mapping = FieldMapping(
+        fields={"name": "title", "category": "amenity", "brand": "brand", "address": "address"},
+        id_field="osm_id",
+    )
+
+    rows = [mapping.to_row(record) for record in read_csv(io.StringIO(text))]
+
+    assert rows[0] == (("Аптека Север", "аптека", None, None, 64.5436, 40.5351, "7", {"opening_hours": "24/7"}), None)
+    assert rows[1] == (None, "no name")
+
+
+def test_rows_without_id_or_point_are_skipped():
+    mapping = FieldMapping()
+
+    assert mapping.to_row(SourceRecord(None, {"name": "x", "lat": 1, "lon": 2}, None)) == (None, "no id")
+    assert mapping.to_row(SourceRecord(1, {"name": "x"}, None)) == (None, "no point")
+    assert mapping.to_row(SourceRecord(1, {"name": "x"}, (95.0, 0.0))) == (None, "bad point")
+
+
+def test_staging_records_fill_derived_columns():
+    row, _ = FieldMapping().to_row(SourceRecord(5, {"name": "Аптека", "address": "Троицкий проспект, 35"}, (64.5426, 40.5386)))
+
+    (record,) = staging_records([row])
+
+    assert record[4] == normalize_street("Троицкий проспект, 35")
+    assert record[6] == cell_key(64.5426, 40.5386)
+    assert record[7] == "5"
+    assert record[8] is None
+
+
+def test_format_detection():
+    assert detect_format(Path("places.geojson")) == GEOJSON
+    assert detect_format(Path("places.ndjson.gz")) == NDJSON
+    assert detect_format(Path("places.tsv")) == CSV
+    with pytest.raises(ValueError):
+        detect_format(Path("places.xml"))
+
+
+@pytest.mark.asyncio
+async def test_reimport_only_touches_changed_rows(engine, db_session, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    path = tmp_path / "places.geojson"
+    features = [_feature(i, lon=40.5369 + i * 0.001) for i in range(3)]
+    path.write_text(json.dumps(_collection(features), ensure_ascii=False), encoding="utf-8")
+
+    first = await import_places(path, source="test-import")
+
+    features[1]["properties"]["name"] = "Аптека переименована"
+    features.append(_feature(3))
+    path.write_text(json.dumps(_collection(features), ensure_ascii=False), encoding="utf-8")
+    second = await import_places(path, source="test-import", chunk_size=2)
+
+    assert (first.inserted, first.updated, first.unchanged) == (3, 0, 0)
+    assert (second.inserted, second.updated, second.unchanged) == (1, 1, 2)
+    names = (await db_session.execute(select(Place.name).order_by(Place.source_id))).scalars().all()
+    assert names == ["Аптека 0", "Аптека переименована", "Аптека 2", "Аптека 3"]
+    place = (await db_session.execute(select(Place).where(Place.source_id == "0"))).scalar_one()
+    assert place.cell_key == cell_key(64.5430, 40.5369)
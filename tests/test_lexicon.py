@@ -0,0 +1,46 @@
+import json
+
+from app.services import context_parser
+from app.services.lexicon import Lexicon, load_artifact, save_artifact, sources_checksum
+
+
+def test_artifact_round_trip(tmp_path):
+    lexicon = Lexicon(
+        category_lemmas={"аптека": {"аптека", "лекарство"}, "продукты": {"еда"}},
+        brand_lemma_map={"титан арена": "Титан Арена"},
+        source_checksum="abc",
+    )
+    path = tmp_path / "lexicon.json"
+    save_artifact(lexicon, path)
+
+    loaded = load_artifact(path, "abc")
+
+    assert loaded is not None
+    assert loaded.category_lemmas == lexicon.category_lemmas
+    assert list(loaded.category_lemmas) == ["аптека", "продукты"]
+    assert loaded.brand_matcher.find_longest(["в", "титан", "арена"]) == "Титан Арена"
+
+
+def test_artifact_rejected_when_sources_change(tmp_path):
+    source = tmp_path / "categories.json"
+    source.write_text(json.dumps({"аптека": ["аптека"]}), encoding="utf-8")
+    checksum = sources_checksum([source])
+    path = tmp_path / "lexicon.json"
+    save_artifact(Lexicon({"аптека": {"аптека"}}, {}, checksum), path)
+
+    source.write_text(json.dumps({"аптека": ["аптека", "таблетка"]}), encoding="utf-8")
+
+    assert load_artifact(path, checksum) is not None
+    assert load_artifact(path, sources_checksum([source])) is None
+    assert load_artifact(tmp_path / "missing.json", checksum) is None
+
+
+def test_built_artifact_matches_derived_tables(tmp_path):
+    path = context_parser.build_lexicon_artifact(tmp_path / "lexicon.json")
+
+    loaded = load_artifact(path, sources_checksum(context_parser._source_paths()))
+    derived = context_parser._compile_lexicon()
+
+    assert loaded is not None
+    assert loaded.category_lemmas == derived.category_lemmas
+    assert loaded.brand_lemma_map == derived.brand_lemma_map
@@ -0,0 +1,88 @@
+import random
+
+from app.services.matchers import BrandMatcher, CategoryIndex
+
+
+def _sliding_window_brand(lemma_map, lemmas):
+    # Reference copy of the previous n-gram scan.
+    joined = " ".join(lemmas)
+    if joined in lemma_map:
+        return lemma_map[joined]
+    max_len = max((len(k.split()) for k in lemma_map), default=0)
+    for size in range(max_len, 0, -1):
+        for i in range(0, len(lemmas) - size + 1):
+            seg = " ".join(lemmas[i : i + size])
+            if seg in lemma_map:
+                return lemma_map[seg]
+    return None
+
+
+def test_brand_matcher_prefers_longest_brand():
+    matcher = BrandMatcher.from_lemma_map(
+        {"титан": "Титан", "титан арена": "Титан Арена"}
+    )
+
+    assert matcher.find_longest(["заехать", "в", "титан", "арена"]) == "Титан Арена"
+    assert matcher.find_longest(["заехать", "в", "титан"]) == "Титан"
+    assert matcher.find_longest(["арена"]) is None
+
+
+def test_brand_matcher_leftmost_on_tie():
+    matcher = BrandMatcher.from_lemma_map({"магнит": "Магнит", "чемпион": "Чемпион"})
+
+    assert matcher.find_longest(["чемпион", "или", "магнит"]) == "Чемпион"
+
+
+def test_brand_matcher_follows_failure_links():
+    matcher = BrandMatcher.from_lemma_map({"дом книга центр": "Дом Книги Центр", "книга": "Книга"})
+
+    # The walk leaves the longer brand at "лавка" and still reports "книга".
+    assert matcher.find_longest(["дом", "книга", "лавка"]) == "Книга"
+
+    matcher.add(["книга", "лавка"], "Книжная лавка")
+    assert matcher.find_longest(["дом", "книга", "лавка"]) == "Книжная лавка"
+
+
+def test_brand_matcher_matches_sliding_window_scan():
+    rng = random.Random(7)
+    vocab = ["а", "б", "в", "г", "д", "е"]
+    lemma_map = {}
+    for i in range(40):
+        key = " ".join(rng.choice(vocab) for _ in range(rng.randint(1, 3)))
+        lemma_map[key] = f"brand-{i}"
+    matcher = BrandMatcher.from_lemma_map(lemma_map)
+
+    for _ in range(500):
+        lemmas = [rng.choice(vocab) for _ in range(rng.randint(0, 8))]
+        assert matcher.find_longest(lemmas) == _sliding_window_brand(lemma_map, lemmas)
+
+
+def _linear_category(category_lemmas, lemmas):
+    # Reference copy of the previous per-category intersection scan.
+    best_cat, best_score = None, 0
+    for cat, kw_lemmas in category_lemmas.items():
+        score = len(lemmas & kw_lemmas)
+        if score > best_score:
+            best_cat, best_score = cat, score
+    return best_cat
+
+
+def test_category_index_tie_goes_to_first_category():
+    index = CategoryIndex({"продукты": {"магазин", "еда"}, "зоомагазин": {"магазин", "корм"}})
+
+    assert index.best_match({"магазин"}) == "продукты"
+    assert index.best_match({"магазин", "корм"}) == "зоомагазин"
+    assert index.best_match({"торт"}) is None
+
+
+def test_category_index_matches_linear_scan():
+    rng = random.Random(11)
+    vocab = [f"w{i}" for i in range(30)]
+    category_lemmas = {
+        f"cat-{i}": set(rng.sample(vocab, rng.randint(1, 5))) for i in range(25)
+    }
+    index = CategoryIndex(category_lemmas)
+
+    for _ in range(500):
+        lemmas = set(rng.sample(vocab, rng.randint(0, 6)))
+        assert index.best_match(lemmas) == _linear_category(category_lemmas, lemmas)
@@ -0,0 +1,186 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from app.models.place import Place
+from app.repositories import backends
+from app.repositories.memory_places_repository import (
+    InMemoryPlacesRepository,
+    PlacesIndex,
+    ellipsoid_distance_m,
+    load_places_index,
+)
+from app.repositories.places_repository import NearbyQuery, PlacesRepository
+from app.services.context_parser import normalize_street
+
+
+CENTER = (64.5430, 40.5369)
+CATEGORIES = [("аптека", None), ("продукты", "Магнит"), ("продукты", "Пятёрочка"), ("зоомагазин", "Чемпион")]
+STREETS = ["Троицкий проспект", "Воскресенская ул.", "Набережная Северной Двины"]
+
+
+def _random_rows(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        category, brand = rng.choice(CATEGORIES)
+        lat = CENTER[0] + rng.uniform(-0.012, 0.012)
+        lon = CENTER[1] + rng.uniform(-0.025, 0.025)
+        address = f"{rng.choice(STREETS)}, {rng.randint(1, 50)}"
+        rows.append((i + 1, f"Место {i + 1}", category, brand, address, normalize_street(address), lat, lon))
+    return rows
+
+
+def _brute_force(rows, lat, lon, radius_m, limit, category=None, brand=None, street=None):
+    out = []
+    for pid, name, cat, br, address, street_norm, plat, plon in rows:
+        if category and cat != category:
+            continue
+        if brand and br != brand:
+            continue
+        if street and street not in (street_norm or ""):
+            continue
+        d = float(ellipsoid_distance_m(lat, lon, np.array([plat]), np.array([plon]))[0])
+        if d <= radius_m:
+            out.append((round(d, 2), pid))
+    return [pid for _, pid in sorted(out)[:limit]]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"category": "продукты"},
+        {"category": "продукты", "brand": "Магнит"},
+        {"category": "аптека", "street": "троицкий"},
+        {"brand": "Лента"},
+    ],
+)
+def test_index_matches_brute_force(filters):
+    rows = _random_rows(2000, seed=1)
+    index = PlacesIndex(rows, cell_size_m=300)
+    rng = random.Random(2)
+
+    for _ in range(50):
+        lat = CENTER[0] + rng.uniform(-0.01, 0.01)
+        lon = CENTER[1] + rng.uniform(-0.02, 0.02)
+        radius = rng.choice([100, 500, 1500])
+        got = index.find_nearest(lat, lon, radius_m=radius, limit=5, **filters)
+        assert [r["place"].id for r in got] == _brute_force(rows, lat, lon, radius, 5, **filters)
+
+
+@pytest.mark.asyncio
+async def test_repository_result_shape():
+    rows = [(1, "Аптека на Троицком", "аптека", None, "Троицкий проспект, 35", "троицкий", 64.5426, 40.5386)]
+    repository = InMemoryPlacesRepository(PlacesIndex(rows))
+
+    results = await repository.find_nearest(latitude=64.5430, longitude=40.5369)
+
+    assert len(results) == 1
+    assert set(results[0]) == {"place", "distance_meters", "latitude", "longitude"}
+    assert results[0]["place"].name == "Аптека на Троицком"
+    assert results[0]["latitude"] == 64.5426
+    assert results[0]["distance_meters"] == pytest.approx(92.96, abs=0.01)
+
+
+def test_empty_index_returns_no_results():
+    assert PlacesIndex([]).find_nearest(64.5, 40.5) == []
+
+
+@pytest.mark.asyncio
+async def test_index_matches_postgis(db_session):
+    rows = _random_rows(300, seed=3)
+    db_session.add_all(
+        [
+            Place(
+                name=name,
+                category=category,
+                brand=brand,
+                address=address,
+                geog=f"SRID=4326;POINT({lon} {lat})",
+                source="test",
+            )
+            for _, name, category, brand, address, _, lat, lon in rows
+        ]
+    )
+    await db_session.commit()
+
+    memory = InMemoryPlacesRepository(await load_places_index(db_session))
+    postgis = PlacesRepository(db_session)
+    rng = random.Random(4)
+
+    for filters in [{}, {"category": "продукты"}, {"category": "продукты", "brand": "Магнит"}, {"street": "троицкий"}]:
+        for _ in range(10):
+            query = {
+                "latitude": CENTER[0] + rng.uniform(-0.01, 0.01),
+                "longitude": CENTER[1] + rng.uniform(-0.02, 0.02),
+                "radius_m": 500,
+                "limit": 5,
+                **filters,
+            }
+            expected = await postgis.find_nearest(**query)
+            got = await memory.find_nearest(**query)
+
+            assert [r["place"].name for r in got] == [r["place"].name for r in expected]
+            for g, e in zip(got, expected):
+                assert g["distance_meters"] == pytest.approx(float(e["distance_meters"]), abs=0.011)
+                assert g["latitude"] == pytest.approx(e["latitude"], abs=1e-9)
+                assert g["longitude"] == pytest.approx(e["longitude"], abs=1e-9)
+
+
+def test_lean_rows_match_full_results():
+    index = PlacesIndex(_random_rows(500, seed=5))
+
+    full = index.find_nearest(*CENTER, radius_m=500, limit=5, category="продукты")
+    lean = index.find_nearest_lean(*CENTER, radius_m=500, limit=5, category="продукты")
+
+    assert [row.id for row in lean] == [r["place"].id for r in full]
+    assert [row.distance_meters for row in lean] == [r["distance_meters"] for r in full]
+
+
+@pytest.mark.asyncio
+async def test_batch_results_align_with_queries():
+    index = PlacesIndex(_random_rows(500, seed=6))
+    repository = InMemoryPlacesRepository(index)
+    queries = [
+        NearbyQuery(*CENTER, category="продукты"),
+        NearbyQuery(0.0, 0.0),
+        NearbyQuery(*CENTER),
+    ]
+
+    results = await repository.find_nearest_batch(queries, radius_m=500, limit=3)
+
+    assert len(results) == 3
+    assert results[0] == index.find_nearest_lean(*CENTER, radius_m=500, limit=3, category="продукты")
+    assert results[1] == []
+    assert results[2] == index.find_nearest_lean(*CENTER, radius_m=500, limit=3)
+
+
+async def test_reload_requests_during_a_rebuild_coalesce(monkeypatch):
+    monkeypatch.setenv("PLACES_BACKEND", backends.MEMORY)
+    release = asyncio.Event()
+    builds = 0
+
+    async def fake_init(sessionmaker):
+        nonlocal builds
+        builds += 1
+        await release.wait()
+        index = PlacesIndex(_random_rows(10 * builds, seed=builds))
+        backends.set_places_index(index)
+        return index
+
+    monkeypatch.setattr(backends, "init_places_backend", fake_init)
+
+    task = backends.request_places_index_reload(None)
+    await asyncio.sleep(0)
+    # A bulk load notifies several times while the first rebuild runs.
+    for _ in range(3):
+        assert backends.request_places_index_reload(None) is task
+    release.set()
+    await task
+
+    assert builds == 2
+    assert len(backends.get_places_repository(None).index) == 20
+    backends.set_places_index(None)
@@ -0,0 +1,76 @@
+import itertools
+
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.repositories.nearest_statements import (
+    CELLS,
+    FULL,
+    LEAN,
+    NearestStatementCache,
+    nearest_params,
+    query_shape,
+)
+
+
+SHAPES = list(itertools.product((False, True), repeat=3))
+
+
+def test_every_shape_is_built_once():
+    cache = NearestStatementCache()
+
+    for _ in range(3):
+        for kind in (FULL, LEAN):
+            for shape in SHAPES:
+                cache.statement(kind, shape)
+
+    stats = cache.stats()
+    assert stats["misses"] == 16
+    assert stats["hits"] == 32
+    assert stats["statements"] == 16
+
+
+def test_same_statement_object_is_reused():
+    cache = NearestStatementCache()
+
+    first = cache.statement(LEAN, query_shape("аптека", None, None))
+    second = cache.statement(LEAN, query_shape("кафе", None, None))
+
+    assert first is second
+
+
+def test_rendered_sql_binds_request_values():
+    cache = NearestStatementCache()
+    dialect = asyncpg.dialect()
+    shape = query_shape("аптека", None, "ленин")
+
+    rendered = cache.rendered(shape, dialect)
+    again = cache.rendered(shape, dialect)
+    params = rendered.parameters(nearest_params(64.54, 40.53, 500, 5, "аптека", None, "ленин"))
+
+    assert again is rendered
+    assert cache.stats()["misses"] == 1
+    assert "аптека" not in rendered.sql
+    assert len(params) == len(rendered.positions)
+    assert {40.53, 64.54, 500.0, 5, 15, "аптека", "%ленин%"} <= set(params)
+
+
+def test_street_pattern_escapes_like_wildcards():
+    params = nearest_params(0, 0, 500, 5, None, None, "50%_off")
+
+    assert params["street_pattern"] == "%50\\%\\_off%"
+    assert "category" not in params
+
+
+def test_cell_prefilter_is_cached_separately():
+    cache = NearestStatementCache()
+    dialect = asyncpg.dialect()
+    shape = query_shape(None, None, None)
+
+    gist = cache.rendered(shape, dialect)
+    cells = cache.rendered(shape, dialect, CELLS)
+    params = cells.parameters(nearest_params(64.54, 40.53, 500, 5, None, None, None, cells=[1, 2, 3]))
+
+    assert cells is not gist
+    assert cache.stats()["misses"] == 2
+    assert "cell_key" in cells.sql and "cell_key" not in gist.sql
+    assert [1, 2, 3] in params
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.context_parser import parse_context
+from app.services.parse_executor import ParseExecutor
+
+
+TEXTS = ["Купить корм в Чемпионе", "Заказать торт на Воскресенской", "найди заправку"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy", ["inline", "thread", "process"])
+async def test_executor_strategies_match_inline_parse(strategy):
+    executor = ParseExecutor(strategy, workers=2)
+    try:
+        await executor.start()
+        single = await executor.run(parse_context, TEXTS[0])
+        batch = await executor.parse_many(TEXTS)
+    finally:
+        executor.shutdown()
+
+    assert single == parse_context(TEXTS[0])
+    assert batch == [parse_context(t) for t in TEXTS]
+
+
+@pytest.mark.asyncio
+async def test_process_warm_up_waits_for_every_worker():
+    executor = ParseExecutor("process", workers=3)
+    try:
+        pool = executor._get_pool()
+        pids = await executor._warm(pool)
+        workers = set(pool._processes)
+    finally:
+        executor.shutdown()
+
+    assert len(pids) == 3
+    assert pids == workers
+
+
+def test_executor_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        ParseExecutor("fibers")
@@ -0,0 +1,183 @@
+import random
+
+import pytest
+from sqlalchemy import text
+
+from app.core.geocell import cell_key
+from app.models.place import Place
+from app.repositories.nearest_statements import statement_cache_stats
+from app.repositories.places_repository import NearbyPlace, NearbyQuery, PlacesRepository
+
+
+async def _explain(session, stmt) -> str:
+    sql = stmt.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    rows = await session.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(rows.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_nearest_query_uses_gist_index(db_session):
+    rng = random.Random(1)
+    db_session.add_all(
+        [
+            Place(
+                name=f"Место {i}",
+                category="аптека",
+                geog=f"SRID=4326;POINT({40.5369 + rng.uniform(-0.05, 0.05)} {64.5430 + rng.uniform(-0.02, 0.02)})",
+                source="test",
+            )
+            for i in range(500)
+        ]
+    )
+    await db_session.commit()
+    await db_session.execute(text("CREATE INDEX IF NOT EXISTS idx_places_geog ON places USING gist (geog)"))
+    await db_session.execute(text("ANALYZE places"))
+    # The test table is small enough that a seq scan would otherwise win.
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+
+    stmt = PlacesRepository(db_session).build_nearest_query(
+        latitude=64.5430,
+        longitude=40.5369,
+        radius_m=500,
+        limit=5,
+    )
+    plan = await _explain(db_session, stmt)
+
+    assert "idx_places_geog" in plan
+
+
+@pytest.mark.asyncio
+async def test_find_nearest_orders_by_distance_and_limits(db_session):
+    db_session.add_all(
+        [
+            Place(name=f"Аптека {i}", category="аптека", geog=f"SRID=4326;POINT({40.5369 + i * 0.0005} 64.5430)")
+            for i in range(8)
+        ]
+    )
+    await db_session.commit()
+
+    results = await PlacesRepository(db_session).find_nearest(
+        latitude=64.5430,
+        longitude=40.5369,
+        radius_m=500,
+        limit=5,
+    )
+
+    distances = [r["distance_meters"] for r in results]
+    assert [r["place"].name for r in results] == [f"Аптека {i}" for i in range(5)]
+    assert distances == sorted(distances)
+
+
+@pytest.mark.asyncio
+async def test_find_nearest_lean_matches_full_entities(db_session):
+    db_session.add_all(
+        [
+            Place(name=f"Аптека {i}", category="аптека", geog=f"SRID=4326;POINT({40.5369 + i * 0.0005} 64.5430)")
+            for i in range(8)
+        ]
+    )
+    await db_session.commit()
+    repository = PlacesRepository(db_session)
+    query = {"latitude": 64.5430, "longitude": 40.5369, "radius_m": 500, "limit": 5, "category": "аптека"}
+
+    full = await repository.find_nearest(**query)
+    lean = await repository.find_nearest_lean(**query)
+
+    assert all(isinstance(row, NearbyPlace) for row in lean)
+    assert [row.name for row in lean] == [r["place"].name for r in full]
+    assert [row.distance_meters for row in lean] == [float(r["distance_meters"]) for r in full]
+    assert [(row.latitude, row.longitude) for row in lean] == [(r["latitude"], r["longitude"]) for r in full]
+
+
+@pytest.mark.asyncio
+async def test_repeated_searches_do_not_recompile(db_session):
+    repository = PlacesRepository(db_session)
+    await repository.find_nearest_lean(latitude=64.5430, longitude=40.5369, category="аптека")
+    misses = statement_cache_stats()["misses"]
+
+    for i in range(5):
+        await repository.find_nearest_lean(latitude=64.5430 + i * 0.001, longitude=40.5369, category="кафе")
+
+    assert statement_cache_stats()["misses"] == misses
+
+
+@pytest.mark.asyncio
+async def test_find_nearest_batch_matches_single_queries(db_session):
+    rng = random.Random(3)
+    db_session.add_all(
+        [
+            Place(
+                name=f"Место {i}",
+                category=rng.choice(["аптека", "кафе"]),
+                brand=rng.choice([None, "Ригла"]),
+                geog=f"SRID=4326;POINT({40.5369 + rng.uniform(-0.01, 0.01)} {64.5430 + rng.uniform(-0.005, 0.005)})",
+            )
+            for i in range(200)
+        ]
+    )
+    await db_session.commit()
+    repository = PlacesRepository(db_session)
+    queries = [
+        NearbyQuery(64.5430, 40.5369, category="аптека"),
+        NearbyQuery(10.0, 10.0),
+        NearbyQuery(64.5440, 40.5380, category="аптека", brand="Ригла"),
+        NearbyQuery(64.5420, 40.5350),
+    ]
+
+    batch = await repository.find_nearest_batch(queries, radius_m=500, limit=5)
+
+    assert batch[1] == []
+    for query, rows in zip(queries, batch):
+        single = await repository.find_nearest_lean(
+            latitude=query.latitude,
+            longitude=query.longitude,
+            radius_m=500,
+            limit=5,
+            category=query.category,
+            brand=query.brand,
+        )
+        assert rows == single
+
+
+@pytest.mark.asyncio
+async def test_cell_prefilter_matches_gist(db_session):
+    rng = random.Random(19)
+    db_session.add_all(
+        [
+            Place(
+                name=f"Место {i}",
+                category=rng.choice(["аптека", "кафе"]),
+                geog=f"SRID=4326;POINT({40.5369 + rng.uniform(-0.02, 0.02)} {64.5430 + rng.uniform(-0.01, 0.01)})",
+            )
+            for i in range(300)
+        ]
+    )
+    await db_session.commit()
+    gist = PlacesRepository(db_session, prefilter="gist")
+    cells = PlacesRepository(db_session, prefilter="cells")
+
+    for _ in range(10):
+        query = {
+            "latitude": 64.5430 + rng.uniform(-0.008, 0.008),
+            "longitude": 40.5369 + rng.uniform(-0.015, 0.015),
+            "radius_m": 500,
+            "limit": 5,
+            "category": rng.choice([None, "аптека"]),
+        }
+        assert await cells.find_nearest_lean(**query) == await gist.find_nearest_lean(**query)
+        full = await cells.find_nearest(**query)
+        assert [r["place"].id for r in full] == [row.id for row in await gist.find_nearest_lean(**query)]
+
+
+@pytest.mark.asyncio
+async def test_places_get_cell_key_on_write(db_session):
+    place = Place(name="Аптека", category="аптека", geog="SRID=4326;POINT(40.5369 64.5430)")
+    db_session.add(place)
+    await db_session.commit()
+
+    assert place.cell_key == cell_key(64.5430, 40.5369)
+
+    place.geog = "SRID=4326;POINT(30.3 59.9)"
+    await db_session.commit()
+
+    assert place.cell_key == cell_key(59.9, 30.3)
@@ -0,0 +1,209 @@
+import asyncio
+import random
+
+import asyncpg
+import pytest
+from unittest.mock import AsyncMock
+
+from app.repositories.memory_places_repository import InMemoryPlacesRepository, PlacesIndex
+from app.repositories.places_copy import asyncpg_dsn, listen_for_place_changes, notify_places_changed
+from app.repositories.places_repository import NearbyPlace
+from app.services import geo_service, response_cache
+from app.services.geo_service import (
+    SEARCH_LIMIT,
+    SEARCH_RADIUS_M,
+    GeoService,
+    cell_fill_coalescing_stats,
+    search_coalescing_stats,
+)
+from app.services.response_cache import (
+    CellCandidates,
+    InMemorySharedClient,
+    LocalCacheStore,
+    ResponseCache,
+    SharedCacheStore,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+
+CENTER = (64.5430, 40.5369)
+CATEGORIES = [("аптека", None), ("продукты", "Магнит"), ("продукты", "Пятёрочка"), ("кафе", None)]
+
+
+def _rows(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        category, brand = rng.choice(CATEGORIES)
+        lat = CENTER[0] + rng.uniform(-0.01, 0.01)
+        lon = CENTER[1] + rng.uniform(-0.02, 0.02)
+        rows.append((i + 1, f"Место {i + 1}", category, brand, None, None, lat, lon))
+    return rows
+
+
+def _service(index):
+    service = GeoService(AsyncMock())
+    service.repository = InMemoryPlacesRepository(index)
+    return service
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filters", [{}, {"category": "аптека"}, {"category": "продукты", "brand": "Магнит"}])
+async def test_cached_answers_match_direct_queries(filters):
+    index = PlacesIndex(_rows(1500, seed=2))
+    service = _service(index)
+    cache = ResponseCache(LocalCacheStore(1000), cell_size_m=100, candidates=200)
+    rng = random.Random(7)
+    searches_before = search_coalescing_stats()["executed"]
+    fills_before = cell_fill_coalescing_stats()["executed"]
+
+    for _ in range(300):
+        lat = CENTER[0] + rng.uniform(-0.004, 0.004)
+        lon = CENTER[1] + rng.uniform(-0.008, 0.008)
+        cached = await service._cached_rows(
+            cache, lat, lon, filters.get("category"), filters.get("brand"), None
+        )
+        direct = index.find_nearest_lean(lat, lon, radius_m=SEARCH_RADIUS_M, limit=SEARCH_LIMIT, **filters)
+        assert cached == direct
+
+    stats = cache.stats()
+    assert stats["hits"] > 0
+    assert stats["uncacheable"] == 0
+    # Fills are counted on their own, not as coalesced searches.
+    assert cell_fill_coalescing_stats()["executed"] - fills_before == stats["fills"]
+    assert search_coalescing_stats()["executed"] == searches_before
+
+
+@pytest.mark.asyncio
+async def test_dense_cell_falls_back_to_direct_query():
+    index = PlacesIndex(_rows(1500, seed=3))
+    service = _service(index)
+    cache = ResponseCache(LocalCacheStore(100), cell_size_m=100, candidates=10)
+
+    assert await service._cached_rows(cache, *CENTER, None, None, None) is None
+    assert cache.stats()["uncacheable"] == 1
+    # Remembered: the second request does not repeat the fill query.
+    assert await service._cached_rows(cache, *CENTER, None, None, None) is None
+    assert cache.stats()["uncacheable"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cell_fills_read_the_primary_when_reads_go_to_a_replica(monkeypatch):
+    primary_rows = _rows(300, seed=4)
+    # The replica has not replayed the last load yet.
+    replica = PlacesIndex(primary_rows[:150])
+    primary = PlacesIndex(primary_rows)
+    primary_session = object()
+
+    class Sessionmaker:
+        def __call__(self):
+            return self
+
+        async def __aenter__(self):
+            return primary_session
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    def repository_for(session):
+        return InMemoryPlacesRepository(primary if session is primary_session else replica)
+
+    monkeypatch.setattr(geo_service, "get_places_repository", repository_for)
+    service = GeoService(AsyncMock(), fill_sessionmaker=Sessionmaker())
+    cache = ResponseCache(LocalCacheStore(100), cell_size_m=100, candidates=200)
+
+    cached = await service._cached_rows(cache, *CENTER, None, None, None)
+
+    assert cache.stats()["fills"] == 1
+    assert cached == primary.find_nearest_lean(*CENTER, radius_m=SEARCH_RADIUS_M, limit=SEARCH_LIMIT)
+    assert cached != replica.find_nearest_lean(*CENTER, radius_m=SEARCH_RADIUS_M, limit=SEARCH_LIMIT)
+
+
+def test_candidates_rank_by_distance_from_the_real_point():
+    candidates = CellCandidates([1, 2], ["A", "B"], [64.5430, 64.5440], [40.5369, 40.5369])
+
+    near_a = candidates.nearest(64.5431, 40.5369, radius_m=500, limit=5)
+    near_b = candidates.nearest(64.5439, 40.5369, radius_m=500, limit=5)
+
+    assert [p.id for p in near_a] == [1, 2]
+    assert [p.id for p in near_b] == [2, 1]
+    assert near_a[0].distance_meters == pytest.approx(11.16, abs=0.05)
+
+
+def test_shared_store_round_trips_and_invalidates_by_version():
+    store = SharedCacheStore(InMemorySharedClient(), ttl=60)
+    cache = ResponseCache(store)
+    cell = cache.cell(*CENTER)
+    key = cache.key(cell, "аптека", None, None, 500, 5)
+    cache.set(key, CellCandidates.from_rows([NearbyPlace(1, "Аптека", 64.54, 40.53, 0.0)]))
+
+    restored = cache.get(key)
+    assert restored.names == ["Аптека"]
+    assert restored.ids.tolist() == [1]
+
+    cache.invalidate()
+
+    assert cache.key(cell, "аптека", None, None, 500, 5) != key
+    assert cache.get(cache.key(cell, "аптека", None, None, 500, 5)) is None
+
+
+def test_shared_stand_in_drops_entries_of_old_versions():
+    now = [0.0]
+    client = InMemorySharedClient(maxsize=4, clock=lambda: now[0])
+    store = SharedCacheStore(client, ttl=5)
+    empty = CellCandidates([], [], [], [])
+    for _ in range(3):
+        for i in range(4):
+            store.set(f"{store.namespace()}|{i}", empty)
+        store.invalidate()
+
+    # The size cap holds across invalidations and never evicts the version.
+    assert len(client) == 4 + 1
+    assert store.namespace() == "3"
+
+    now[0] = 6.0
+    store.set(f"{store.namespace()}|0", empty)
+
+    assert len(client) == 1 + 1
+
+
+def test_local_store_entries_expire():
+    now = [0.0]
+    store = LocalCacheStore(10, ttl=5)
+    store._cache._clock = lambda: now[0]
+    store.set("k", CellCandidates([], [], [], []))
+
+    assert store.get("k") is not None
+    now[0] = 6.0
+    assert store.get("k") is None
+
+
+def test_invalidation_hook_moves_to_a_new_namespace(monkeypatch):
+    cache = ResponseCache(LocalCacheStore(10))
+    monkeypatch.setattr(response_cache, "_RESPONSE_CACHE", cache)
+    before = cache.store.namespace()
+
+    response_cache.invalidate_response_cache("test")
+
+    assert cache.store.namespace() != before
+
+
+async def test_place_change_notifications_reach_other_processes(engine, monkeypatch):
+    # Loaders run in their own process: only the database carries the signal.
+    cache = ResponseCache(LocalCacheStore(10))
+    monkeypatch.setattr(response_cache, "_RESPONSE_CACHE", cache)
+    dsn = asyncpg_dsn(TEST_DATABASE_URL)
+    listener = asyncio.create_task(listen_for_place_changes(dsn, response_cache.invalidate_response_cache))
+    loader = await asyncpg.connect(dsn)
+    try:
+        before = cache.store.namespace()
+        for _ in range(50):
+            # The listener subscribes asynchronously; keep notifying until it hears one.
+            await notify_places_changed(loader, "test loader")
+            await asyncio.sleep(0.05)
+            if cache.store.namespace() != before:
+                break
+        assert cache.store.namespace() != before
+    finally:
+        listener.cancel()
+        await loader.close()
@@ -87,3 +87,34 @@ async def test_search_invalid_location_returns_422(client):
     )
 
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_batch_returns_items_in_order(client, db_session):
+    db_session.add(
+        Place(
+            name="Аптека на Троицком",
+            category="аптека",
+            address="Троицкий проспект, 35",
+            geog="SRID=4326;POINT(40.5386 64.5426)",
+            source="test",
+        )
+    )
+    await db_session.commit()
+
+    response = await client.post(
+        "/search/batch",
+        json={
+            "items": [
+                {"location": "64.5430:40.5369", "context": "найди заправку"},
+                {"location": "not-a-location", "context": "аптека"},
+                {"location": "64.5430:40.5369", "context": "Купить лекарства в аптеке"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items[0] == {"results": [], "error": None}
+    assert items[1]["error"] == "Location must be 'lat:lon'"
+    assert [r["name"] for r in items[2]["results"]] == ["Аптека на Троицком"]
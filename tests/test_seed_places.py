@@ -0,0 +1,25 @@
+from geoalchemy2 import WKBElement
+
+from app.core.geocell import cell_key
+from app.models.place import _point_lat_lon
+from app.services.context_parser import normalize_street
+from scripts.seed_places import COPY_COLUMNS, copy_records, generate_random_places, iter_random_places, place_rows
+
+
+def test_copy_records_fill_derived_columns():
+    places = generate_random_places(50, seed=7)
+
+    records = copy_records(list(place_rows(places)))
+
+    assert len(records) == 50
+    for place, record in zip(places, records):
+        row = dict(zip(COPY_COLUMNS, record))
+        assert row["street_norm"] == normalize_street(place.address)
+        assert row["cell_key"] == cell_key(place.lat, place.lon)
+        assert _point_lat_lon(WKBElement(row["geog"], srid=4326, extended=True)) == (place.lat, place.lon)
+
+
+def test_random_places_are_generated_lazily_and_deterministically():
+    lazy = iter_random_places(10_000_000, seed=1)
+
+    assert [next(lazy) for _ in range(3)] == generate_random_places(3, seed=1)
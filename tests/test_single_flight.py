@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return ["row"]
+
+    tasks = [asyncio.create_task(flights.run("key", query)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert results == [["row"]] * 5
+    assert flights.stats()["executed"] == 1
+    assert flights.stats()["coalesced"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0)
+        return 1
+
+    await asyncio.gather(flights.run("a", query), flights.run("b", query))
+
+    assert flights.stats()["executed"] == 2
+    assert flights.stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failure_reaches_every_waiter():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def query():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    tasks = [asyncio.create_task(flights.run("key", query)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "leader"
+
+    async def own():
+        return "follower"
+
+    leader = asyncio.create_task(flights.run("key", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.run("key", own))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "follower"
+    assert flights.stats()["executed"] == 2
+    assert flights.stats()["coalesced"] == 0
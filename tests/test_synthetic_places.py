@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from scripts import synthetic_places
+from scripts.synthetic_places import DEFAULT_SPEC, PlaceColumns, generate_synthetic_places, load_spec
+
+
+def test_same_seed_gives_same_places():
+    first = generate_synthetic_places(20_000, seed=5)
+    second = generate_synthetic_places(20_000, seed=5)
+    other = generate_synthetic_places(20_000, seed=6)
+
+    assert np.array_equal(first.latitude, second.latitude)
+    assert list(first.rows())[:100] == list(second.rows())[:100]
+    assert not np.array_equal(first.latitude, other.latitude)
+
+
+def test_blocks_continue_numbering_and_stay_deterministic(monkeypatch):
+    monkeypatch.setattr(synthetic_places, "BLOCK_SIZE", 1_000)
+
+    blocks = list(synthetic_places.iter_synthetic_places(2_500, seed=1))
+    joined = generate_synthetic_places(2_500, seed=1)
+
+    assert [len(block) for block in blocks] == [1_000, 1_000, 500]
+    assert [row[0].rsplit(" ", 1)[1] for row in blocks[1].rows()][:1] == ["1001"]
+    assert [row for block in blocks for row in block.rows()] == list(joined.rows())
+
+
+def test_zero_count_gives_empty_columns_and_negative_is_rejected():
+    empty = generate_synthetic_places(0, seed=1)
+
+    assert len(empty) == 0
+    assert list(empty.rows()) == []
+    assert list(empty.streets) == list(generate_synthetic_places(10, seed=1).streets)
+    with pytest.raises(ValueError):
+        generate_synthetic_places(-1, seed=1)
+
+
+def test_places_follow_city_and_category_weights():
+    places = generate_synthetic_places(200_000, seed=2)
+
+    city_share = np.bincount(places.city) / len(places)
+    category_share = np.bincount(places.category) / len(places)
+    assert np.allclose(city_share, [c["weight"] for c in DEFAULT_SPEC["cities"]], atol=0.01)
+    assert np.allclose(category_share, [c["weight"] for c in DEFAULT_SPEC["categories"]], atol=0.01)
+    # Brands only appear for categories that have them.
+    branded = places.brand >= 0
+    assert set(places.categories[np.unique(places.category[branded])]) == {"продукты", "зоомагазин", "арена"}
+
+    for code, city in enumerate(DEFAULT_SPEC["cities"]):
+        in_city = places.city == code
+        distance_km = np.hypot(
+            (places.latitude[in_city] - city["lat"]) * 111.32,
+            (places.longitude[in_city] - city["lon"]) * 111.32 * np.cos(np.radians(city["lat"])),
+        )
+        # Denser towards the centre.
+        assert np.median(distance_km) < city["radius_km"]
+
+
+def test_columns_round_trip_through_npz(tmp_path):
+    places = generate_synthetic_places(1_000, seed=3)
+    path = tmp_path / "places.npz"
+
+    places.save(path)
+    loaded = PlaceColumns.load(path)
+
+    assert list(loaded.rows()) == list(places.rows())
+
+
+def test_spec_overrides_keep_defaults(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text('{"cities": [{"name": "Город", "lat": 10, "lon": 20, "radius_km": 2, "weight": 1}]}', encoding="utf-8")
+
+    spec = load_spec(path)
+    places = generate_synthetic_places(500, seed=1, spec=spec)
+
+    assert spec["categories"] == DEFAULT_SPEC["categories"]
+    assert set(places.city.tolist()) == {0}
+    assert abs(places.latitude.mean() - 10) < 0.05